@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.merkle_tree import MerkleTree
+
+def time_build(transactions, mode, workers, repeat):
+    """Return the best build time in seconds over several runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        MerkleTree(transactions, mode=mode, workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_benchmark(sizes, workers, repeat=1):
+    """
+    Compare the hex (current) Merkle tree build with the byte-level mode,
+    sequentially and on a thread pool.
+    
+    Returns:
+        list: One result dict per (leaf count, variant)
+    """
+    variants = [
+        ("hex", None),
+        ("bytes", None),
+        ("hex", workers),
+        ("bytes", workers),
+    ]
+    results = []
+    for size in sizes:
+        transactions = [f"Transaction {i}" for i in range(size)]
+        baseline = None
+        for mode, pool in variants:
+            seconds = time_build(transactions, mode, pool, repeat)
+            baseline = baseline or seconds
+            results.append({
+                "leaves": size,
+                "mode": mode,
+                "workers": pool or 1,
+                "seconds": seconds,
+                "speedup": baseline / seconds
+            })
+            print(f"{size:>9} leaves  mode={mode:<5} workers={pool or 1:<3} "
+                  f"{seconds:8.3f}s  x{baseline / seconds:.2f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MerkleTree construction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** 5, 10 ** 6])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    
+    run_benchmark(args.sizes, args.workers, args.repeat)
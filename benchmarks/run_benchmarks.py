@@ -0,0 +1,279 @@
+import sys
+import os
+import io
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+from src.block import Block
+from src.binary_codec import BLOCK_VERSION_JSON, BLOCK_VERSION_BINARY, encode_block, decode_block
+from src.proof_of_work import ProofOfWork
+from src.utils.timestamp import get_current_timestamp
+from bench_merkle_tree import time_build
+import add_transaction
+import add_transaction_tree
+
+FULL_SIZES = {
+    "difficulties": [1, 2, 3, 4, 5],
+    "merkle_leaves": [1, 10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6],
+    "payload_bytes": [100, 1000, 10 ** 4, 10 ** 5, 10 ** 6],
+    "validation_blocks": [10 ** 3, 10 ** 4, 10 ** 5],
+    "save_blocks": 2000,
+    "memory_blocks": 10 ** 6,
+}
+
+QUICK_SIZES = {
+    "difficulties": [1, 2, 3],
+    "merkle_leaves": [1, 10, 100, 1000, 10 ** 4],
+    "payload_bytes": [100, 1000, 10 ** 4],
+    "validation_blocks": [100, 1000],
+    "save_blocks": 200,
+    "memory_blocks": 10 ** 4,
+}
+
+def timed(func, repeat=1):
+    """Return the best wall time in seconds of func over several runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def make_block(index, data, previous_hash="0" * 64, version=BLOCK_VERSION_JSON):
+    return Block(index=index, timestamp=get_current_timestamp(), data=data, previous_hash=previous_hash,
+                 version=version)
+
+def bench_mining(difficulties, blocks_per_difficulty=5):
+    """Hashes per second of ProofOfWork.mine at each difficulty"""
+    results = []
+    for difficulty in difficulties:
+        proof_of_work = ProofOfWork(difficulty=difficulty)
+        hashes = 0
+        seconds = 0.0
+        for i in range(blocks_per_difficulty):
+            block = make_block(i, f"Benchmark block {i}")
+            start = time.perf_counter()
+            proof_of_work.mine(block)
+            seconds += time.perf_counter() - start
+            hashes += block.nonce + 1
+        results.append({
+            "difficulty": difficulty,
+            "blocks": blocks_per_difficulty,
+            "hashes": hashes,
+            "seconds": seconds,
+            "hashes_per_sec": hashes / seconds if seconds else None
+        })
+    return results
+
+def bench_merkle(sizes, repeat):
+    """MerkleTree build time by number of leaves"""
+    results = []
+    for size in sizes:
+        transactions = [f"Transaction {i}" for i in range(size)]
+        seconds = time_build(transactions, "hex", None, repeat)
+        results.append({"leaves": size, "seconds": seconds, "leaves_per_sec": size / seconds})
+    return results
+
+def bench_block(payload_sizes, repeat, hash_rounds=100):
+    """Block construction and calculate_hash cost by payload size"""
+    results = []
+    for size in payload_sizes:
+        data = "x" * size
+        construct = timed(lambda: make_block(1, data), repeat)
+        block = make_block(1, data)
+        calculate = timed(lambda: [block.calculate_hash() for _ in range(hash_rounds)], repeat) / hash_rounds
+        results.append({
+            "payload_bytes": size,
+            "construct_seconds": construct,
+            "calculate_hash_seconds": calculate
+        })
+    return results
+
+def rehash_header(block):
+    # Assigning a header field drops the cached serialization
+    block.timestamp = block.timestamp
+    return block.calculate_hash()
+
+def bench_codec(payload_sizes, repeat, rounds=1000):
+    """Header hashing (version 1 JSON vs version 2 binary) and block file encoding by payload size"""
+    results = []
+    for size in payload_sizes:
+        data = "x" * size
+        result = {"payload_bytes": size}
+        for version, name in ((BLOCK_VERSION_JSON, "json"), (BLOCK_VERSION_BINARY, "binary")):
+            block = make_block(1, data, version=version)
+            result[f"{name}_full_hash_seconds"] = timed(
+                lambda: [rehash_header(block) for _ in range(rounds)], repeat) / rounds
+            result[f"{name}_nonce_hash_seconds"] = timed(
+                lambda: [block.header_hasher().hash(nonce) for nonce in range(rounds)], repeat) / rounds
+
+        record = {"index": 1, "hash": block.hash, "previous_hash": block.previous_hash, "timestamp": block.timestamp,
+                  "data": data, "nonce": block.nonce, "merkle_root": block.merkle_root, "version": block.version}
+        text = json.dumps(record, indent=4)
+        binary = encode_block(record)
+        result.update({
+            "json_bytes": len(text),
+            "binary_bytes": len(binary),
+            "json_encode_seconds": timed(lambda: [json.dumps(record, indent=4) for _ in range(rounds)], repeat) / rounds,
+            "binary_encode_seconds": timed(lambda: [encode_block(record) for _ in range(rounds)], repeat) / rounds,
+            "json_decode_seconds": timed(lambda: [json.loads(text) for _ in range(rounds)], repeat) / rounds,
+            "binary_decode_seconds": timed(lambda: [decode_block(binary) for _ in range(rounds)], repeat) / rounds
+        })
+        results.append(result)
+    return results
+
+def bench_memory(count):
+    """Python heap used by count blocks held in a list, as Blockchain.chain does"""
+    tracemalloc.start()
+    chain = [make_block(i, f"Transaction {i}") for i in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"blocks": len(chain), "bytes": allocated, "bytes_per_block": allocated / count}
+
+def build_linear_folder(folder, count):
+    """Write a linear DLT of count blocks (not mined, validation doesn't check PoW)"""
+    previous_hash = "0" * 64
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            block = make_block(i, f"Transaction {i}", previous_hash)
+            add_transaction.save_block_to_file(block, folder)
+            previous_hash = block.hash
+
+def build_tree_folder(folder, count):
+    """Write a breadth-first tree DLT of count blocks"""
+    hashes = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            parent_hash = hashes[(i - 1) // 2] if i else None
+            block = make_block(i, f"Transaction {i}", parent_hash or "0" * 64)
+            add_transaction_tree.save_block_to_file(block, parent_hash, folder)
+            hashes.append(block.hash)
+
+def bench_validation(sizes, workers):
+    """validate_blockchain and validate_blockchain_tree time by chain size"""
+    results = []
+    for size in sizes:
+        root = tempfile.mkdtemp()
+        try:
+            linear_folder = os.path.join(root, "dlt")
+            tree_folder = os.path.join(root, "dlt_tree")
+            build_linear_folder(linear_folder, size)
+            build_tree_folder(tree_folder, size)
+            with contextlib.redirect_stdout(io.StringIO()):
+                linear = timed(lambda: add_transaction.validate_blockchain(linear_folder, full=True))
+                incremental = timed(lambda: add_transaction.validate_blockchain(linear_folder))
+                linear_parallel = timed(lambda: add_transaction.validate_blockchain_parallel(linear_folder, workers))
+                tree = timed(lambda: add_transaction_tree.validate_blockchain_tree(tree_folder))
+                tree_parallel = timed(lambda: add_transaction_tree.validate_blockchain_tree_parallel(tree_folder, workers))
+            results.append({
+                "blocks": size,
+                "validate_blockchain_seconds": linear,
+                "validate_blockchain_checkpoint_seconds": incremental,
+                "validate_blockchain_parallel_seconds": linear_parallel,
+                "validate_blockchain_tree_seconds": tree,
+                "validate_blockchain_tree_parallel_seconds": tree_parallel
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def bench_save(count, payload_bytes=1000):
+    """save_block_to_file write throughput"""
+    blocks = [make_block(i, "x" * payload_bytes) for i in range(count)]
+    root = tempfile.mkdtemp()
+    try:
+        folder = os.path.join(root, "dlt")
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds = timed(lambda: [add_transaction.save_block_to_file(block, folder) for block in blocks])
+        written = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {
+        "blocks": count,
+        "payload_bytes": payload_bytes,
+        "seconds": seconds,
+        "blocks_per_sec": count / seconds,
+        "bytes_per_sec": written / seconds
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(sizes, repeat=1, workers=None, sections=None):
+    """
+    Run the selected benchmark sections.
+
+    Returns:
+        dict: Environment information and one list of results per section
+    """
+    sections = sections or ["mining", "merkle", "block", "codec", "validation", "save", "memory"]
+    report = {
+        "revision": git_revision(),
+        "timestamp": get_current_timestamp(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": {}
+    }
+    runners = {
+        "mining": lambda: bench_mining(sizes["difficulties"]),
+        "merkle": lambda: bench_merkle(sizes["merkle_leaves"], repeat),
+        "block": lambda: bench_block(sizes["payload_bytes"], repeat),
+        "codec": lambda: bench_codec(sizes["payload_bytes"], repeat),
+        "validation": lambda: bench_validation(sizes["validation_blocks"], workers),
+        "save": lambda: bench_save(sizes["save_blocks"]),
+        "memory": lambda: bench_memory(sizes["memory_blocks"]),
+    }
+    for section in sections:
+        print(f"Running {section} benchmarks...")
+        report["results"][section] = runners[section]()
+    return report
+
+def compare(report, baseline):
+    """Print the ratio of every timing in report to the same timing in baseline"""
+    print("\n=== COMPARISON WITH BASELINE (new / old, lower is faster) ===")
+    for section, results in report["results"].items():
+        old_results = baseline.get("results", {}).get(section)
+        if old_results is None:
+            continue
+        if isinstance(results, dict):
+            results, old_results = [results], [old_results]
+        for new, old in zip(results, old_results):
+            for key, value in new.items():
+                if key.endswith("seconds") and old.get(key) and value is not None:
+                    label = ", ".join(f"{k}={v}" for k, v in new.items() if not isinstance(v, float))
+                    print(f"{section:<10} {label:<40} {key:<45} x{value / old[key]:.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the DLT benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Use small sizes for a fast run")
+    parser.add_argument("--sections", nargs="+", choices=["mining", "merkle", "block", "codec", "validation", "save", "memory"])
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement (best is kept)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for the parallel validators")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = run_suite(QUICK_SIZES if args.quick else FULL_SIZES, args.repeat, args.workers, args.sections)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=4)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            compare(report, json.load(file))
@@ -1,117 +1,326 @@
 import sys
 import os
-import json
 import glob
+import json
+import hmac
+import hashlib
+import argparse
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.blockchain import Blockchain
-from src.proof_of_work import ProofOfWork
+from src.proof_of_work import RetargetPolicy, next_proof_of_work
 from src.block import Block
+from src.binary_codec import (BLOCK_VERSION_JSON, CURRENT_BLOCK_VERSION, FORMAT_EXTENSIONS, block_file_name,
+                              block_files, dump_block_file, load_block_file, storage_format)
+from src.block_index import open_block_index, iter_blocks
+from src.file_lock import holds_folder_lock
+from src.journal import Journal, journaled_file, read_journal, write_block_file
+from src.secondary_index import open_secondary_index
+from src.parallel_validation import iter_hashed_blocks, DEFAULT_CHUNK_SIZE
+from src.utils import metrics
 from src.utils.timestamp import get_current_timestamp
 
+# Chain tip record kept next to the block files
+TIP_FILE = "tip.json"
+
+# Signed record of the highest block verified by validate_blockchain
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_KEY_ENV = "DLT_CHECKPOINT_KEY"
+
 # Function to save block data to a file
-def save_block_to_file(block, folder="dlt"):
+@metrics.timed("block_save_seconds", "Time to write a block file")
+def save_block_to_file(block, folder="dlt", journal=None):
     # Ensure the DLT folder exists
     os.makedirs(folder, exist_ok=True)
     
     # Create a filename with the block index and hash
-    filename = f"{folder}/block_{block.index}_{block.hash[:8]}.json"
+    filename = f"{folder}/{block_file_name(block.index, block.hash, storage_format(folder))}"
     
     # Check if this block already exists
     if os.path.exists(filename):
         print(f"Block {block.index} already exists at {filename}")
         return
     
-    # Create a serializable representation of the block
-    block_data = {
-        "index": block.index,
-        "hash": block.hash,
-        "previous_hash": block.previous_hash,
-        "timestamp": block.timestamp,
-        "data": block.data,
-        "nonce": block.nonce,
-        "merkle_root": block.merkle_root
-    }
-    
-    # Write the block data to the file
-    with open(filename, 'w') as file:
-        json.dump(block_data, file, indent=4)
+    # Open the indexes before writing, so a first-time rebuild doesn't pick up this block
+    with open_block_index(folder) as index, open_secondary_index(folder) as lookup:
+        # Create a serializable representation of the block
+        block_data = {
+            "index": block.index,
+            "hash": block.hash,
+            "previous_hash": block.previous_hash,
+            "timestamp": block.timestamp,
+            "data": block.data,
+            "nonce": block.nonce,
+            "merkle_root": block.merkle_root,
+            "version": block.version
+        }
+        
+        # Record the block in the write-ahead journal before writing its file
+        if journal is not None:
+            journal.append(block_data)
+        
+        # Write the block data to the file
+        dump_block_file(filename, block_data)
+        index.add(block.index, block.hash)
+        lookup.add_block(block_data, os.path.basename(filename))
     
     print(f"Block {block.index} saved to {filename}")
 
+def recover_journal(journal, folder="dlt"):
+    """
+    Repair the folder from the write-ahead journal after a crash.
+    
+    Journaled blocks whose file is missing or torn are rewritten and indexed again,
+    and the chain tip is moved forward if it is behind the last journaled block.
+    
+    Returns:
+        int: Number of block files rewritten
+    """
+    if journal.recovered:
+        return 0
+    journal.recovered = True
+    
+    damaged = journal.damaged_records()
+    if damaged:
+        with open_block_index(folder) as index, open_secondary_index(folder) as lookup:
+            for block_data in damaged:
+                filename = write_block_file(folder, block_data)
+                index.add(block_data["index"], block_data["hash"])
+                lookup.add_block(block_data, filename)
+                print(f"Block {block_data['index']} recovered from the journal")
+    
+    # A writer may have stopped between saving a block and recording the tip
+    recover_chain_tip(folder, journal.records())
+    return len(damaged)
+
+def next_block_files(folder, height):
+    """Paths of the block files (in any format) for index height + 1"""
+    return [file for extension in FORMAT_EXTENSIONS.values()
+            for file in glob.glob(os.path.join(folder, f"block_{height + 1}_*{extension}"))]
+
+def recover_chain_tip(folder="dlt", records=()):
+    """
+    Move the chain tip forward over journaled blocks saved after it.
+    
+    The journal holds every block written since its last checkpoint, before its
+    file, so a block saved past the tip is always among records. While the next
+    journaled block follows the tip and its file holds a valid block with that
+    hash, it is added to the indexes and becomes the new tip. Anything else is
+    left for validation to report. When no record is past the tip, nothing is
+    opened or scanned.
+    
+    Returns:
+        int: Number of blocks the tip moved forward
+    """
+    tip = load_chain_tip(folder)
+    if tip is None:
+        return 0
+    pending = sorted((block_data for block_data in records if block_data["index"] > tip["height"]),
+                     key=lambda block_data: block_data["index"])
+    if not pending:
+        return 0
+    
+    height, block_hash = tip["height"], tip["hash"]
+    storage = storage_format(folder)
+    with open_block_index(folder) as index, open_secondary_index(folder) as lookup:
+        for journaled in pending:
+            if journaled["index"] != height + 1 or journaled["previous_hash"] != block_hash:
+                break
+            path = journaled_file(folder, journaled, storage)
+            try:
+                block_data = load_block_file(path)
+            except (OSError, ValueError):
+                break
+            if block_data["hash"] != journaled["hash"] or recalculate_hash(block_data) != block_data["hash"]:
+                break
+            index.add(block_data["index"], block_data["hash"])
+            lookup.add_block(block_data, os.path.basename(path))
+            height, block_hash = block_data["index"], block_data["hash"]
+            print(f"Block {height} recovered from the folder")
+    if height != tip["height"]:
+        write_chain_tip(height, block_hash, tip["verified_height"], folder)
+    return height - tip["height"]
+
+def recalculate_hash(block_data):
+    """Recreate a stored block and calculate its hash"""
+    temp_block = Block(
+        index=block_data["index"],
+        timestamp=block_data["timestamp"],
+        data=block_data["data"],
+        previous_hash=block_data["previous_hash"],
+        nonce=block_data["nonce"],
+        version=block_data.get("version", BLOCK_VERSION_JSON)
+    )
+    return temp_block.calculate_hash()
+
 def find_highest_block_index(folder="dlt"):
     """Find the highest block index in the dlt folder"""
     if not os.path.exists(folder):
         return -1
-        
-    # Get all block files
-    block_files = glob.glob(f"{folder}/block_*.json")
     
-    if not block_files:
-        return -1
-        
-    # Extract indices from filenames
-    indices = []
-    for file in block_files:
+    # The block index has one record per index up to the highest block
+    with open_block_index(folder) as index:
+        return len(index) - 1
+
+def files_fingerprint(indexed_files):
+    """Digest of the names, sizes and modification times of block files, without reading them"""
+    fingerprint = hashlib.sha256()
+    for _, file in indexed_files:
+        update_fingerprint(fingerprint, file)
+    return fingerprint.hexdigest()
+
+def update_fingerprint(fingerprint, file):
+    """Add one block file to a running files_fingerprint digest"""
+    stat = os.stat(file)
+    fingerprint.update(f"{os.path.basename(file)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+
+def extend_prefix_digest(prefix_digest, block_hash):
+    """Chain a block hash into the digest that covers all verified blocks before it"""
+    return hashlib.sha256((prefix_digest + block_hash).encode()).hexdigest()
+
+def sign_checkpoint(checkpoint, key=None):
+    """HMAC-SHA256 of the checkpoint fields, or a plain SHA-256 when no key is configured"""
+    key = key or os.environ.get(CHECKPOINT_KEY_ENV)
+    payload = json.dumps({k: v for k, v in checkpoint.items() if k != "signature"}, sort_keys=True).encode()
+    if key:
+        return hmac.new(key.encode(), payload, hashlib.sha256).hexdigest()
+    return hashlib.sha256(payload).hexdigest()
+
+def read_checkpoint(folder="dlt", key=None):
+    """
+    Read the validation checkpoint.
+    
+    Returns:
+        dict: The checkpoint, or None if it is missing or its signature does not match
+    """
+    try:
+        with open(f"{folder}/{CHECKPOINT_FILE}", 'r') as file:
+            checkpoint = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+    
+    if not hmac.compare_digest(checkpoint.get("signature", ""), sign_checkpoint(checkpoint, key)):
+        print("Warning: Ignoring checkpoint with an invalid signature")
+        return None
+    return checkpoint
+
+def write_checkpoint(height, block_hash, prefix_digest, fingerprint, folder="dlt", key=None):
+    """Atomically record the highest verified block and the digests covering the verified prefix"""
+    checkpoint = {
+        "height": height,
+        "hash": block_hash,
+        "prefix_digest": prefix_digest,
+        "fingerprint": fingerprint
+    }
+    checkpoint["signature"] = sign_checkpoint(checkpoint, key)
+    temp_file = f"{folder}/{CHECKPOINT_FILE}.tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(checkpoint, file, indent=4)
+    os.replace(temp_file, f"{folder}/{CHECKPOINT_FILE}")
+    return checkpoint
+
+def verified_prefix_fingerprint(index, height):
+    """Running fingerprint of blocks 0..height, or None if one of them is missing"""
+    fingerprint = hashlib.sha256()
+    for _, file in index.iter_files(0, height + 1):
+        if file is None or not os.path.exists(file):
+            return None
+        update_fingerprint(fingerprint, file)
+    return fingerprint
+
+def find_unindexed_block(index):
+    """
+    Compare the block files of the folder with the block index (one directory scan).
+    
+    Returns:
+        int: The lowest block index with a file the index doesn't point at (an extra
+        block past the end, or a second file for the same index), or None
+    """
+    unindexed = []
+    for file in block_files(index.folder):
         try:
-            # Format is block_INDEX_HASH.json
-            parts = os.path.basename(file).split('_')
-            if len(parts) >= 2:
-                indices.append(int(parts[1]))
-        except (ValueError, IndexError):
-            pass
-            
-    return max(indices) if indices else -1
+            block_index = int(os.path.basename(file).split('_')[1])
+        except (IndexError, ValueError):
+            continue
+        indexed = index.path(block_index)
+        # The same block stored in the other format (an interrupted conversion) is not an extra block
+        if indexed is None or os.path.splitext(indexed)[0] != os.path.splitext(file)[0]:
+            unindexed.append(block_index)
+    return min(unindexed) if unindexed else None
 
-def validate_blockchain(folder="dlt"):
+@metrics.timed("validate_blockchain_seconds", "Time to validate the linear DLT")
+def validate_blockchain(folder="dlt", full=False, checkpoint_key=None):
     """
     Validate all blocks in the blockchain stored in the DLT folder.
     Checks that hashes are valid and that the chain is properly linked.
     
+    Blocks up to the last signed checkpoint are not re-hashed as long as their files
+    still have the recorded names, sizes and modification times; only newer blocks
+    are verified, starting from the checkpoint hash. Set full to re-verify every
+    block. Each successful run writes a new checkpoint.
+    
+    Blocks are streamed one at a time in index order from the block index, so
+    memory use does not grow with the length of the chain.
+    
     Returns:
         tuple: (is_valid, first_invalid_block_index)
     """
-    # Get all block files sorted by index
-    block_files = glob.glob(f"{folder}/block_*.json")
-    if not block_files:
+    if not os.path.exists(folder):
+        return True, None  # Empty chain is valid
+    with open_block_index(folder) as index:
+        return validate_indexed_blocks(index, full, checkpoint_key)
+
+def validate_indexed_blocks(index, full=False, checkpoint_key=None):
+    """Run validate_blockchain over an open block index"""
+    folder = index.folder
+    block_count = len(index)
+    if block_count == 0:
         return True, None  # Empty chain is valid
     
-    # Sort blocks by index
-    blocks_data = []
-    for file in block_files:
-        try:
-            index = int(os.path.basename(file).split('_')[1])
-            with open(file, 'r') as f:
-                block_data = json.load(f)
-            blocks_data.append((index, block_data, file))
-        except (ValueError, IndexError, json.JSONDecodeError) as e:
-            print(f"Error reading block file {file}: {e}")
-            return False, None
-    
-    # Sort by index
-    blocks_data.sort(key=lambda x: x[0])
-    
-    # Check that indices are continuous starting from 0
-    expected_indices = list(range(len(blocks_data)))
-    actual_indices = [bd[0] for bd in blocks_data]
+    if full:
+        unindexed = find_unindexed_block(index)
+        if unindexed is not None:
+            print(f"Error: Block {unindexed} has a block file that is not in the block index")
+            return False, unindexed
     
-    if expected_indices != actual_indices:
-        print("Error: Blockchain has missing blocks or non-sequential indices")
-        for i, (expected, actual) in enumerate(zip(expected_indices, actual_indices)):
-            if expected != actual:
-                return False, expected
-        return False, min(set(expected_indices) - set(actual_indices))
+    # Resume after the checkpoint if the verified prefix is unchanged
+    start = 0
+    previous_hash = None
+    prefix_digest = ""
+    fingerprint = hashlib.sha256()
+    checkpoint = None if full else read_checkpoint(folder, checkpoint_key)
+    if checkpoint and checkpoint["height"] < block_count:
+        prefix = verified_prefix_fingerprint(index, checkpoint["height"])
+        if prefix is not None and prefix.hexdigest() == checkpoint["fingerprint"]:
+            start = checkpoint["height"] + 1
+            previous_hash = checkpoint["hash"]
+            prefix_digest = checkpoint["prefix_digest"]
+            fingerprint = prefix
     
     # Validate each block
-    for i, (_, block_data, file) in enumerate(blocks_data):
+    for block_index, file in index.iter_files(start):
+        try:
+            if file is None:
+                raise FileNotFoundError(f"No file recorded for block {block_index}")
+            with metrics.get_registry().timer("block_load_seconds", "Time to read and parse a block file"):
+                block_data = load_block_file(file)
+        except FileNotFoundError:
+            # No file recorded for this index, or the file was removed
+            print("Error: Blockchain has missing blocks or non-sequential indices")
+            return False, block_index
+        except ValueError as e:
+            print(f"Error reading block file {file}: {e}")
+            return False, None
+        
         # Recreate block to calculate hash
         temp_block = Block(
             index=block_data["index"],
             timestamp=block_data["timestamp"],
             data=block_data["data"],
             previous_hash=block_data["previous_hash"],
-            nonce=block_data["nonce"]
+            nonce=block_data["nonce"],
+            version=block_data.get("version", BLOCK_VERSION_JSON)
         )
         
         # Verify hash
@@ -123,106 +332,270 @@ def validate_blockchain(folder="dlt"):
             return False, block_data["index"]
         
         # Verify chain linkage (except for genesis block)
-        if i > 0:
-            previous_block = blocks_data[i-1][1]
-            if block_data["previous_hash"] != previous_block["hash"]:
+        if previous_hash is not None and block_data["previous_hash"] != previous_hash:
+            print(f"Error: Block {block_data['index']} has invalid previous_hash")
+            print(f"  Stored previous_hash: {block_data['previous_hash']}")
+            print(f"  Expected (previous block's hash): {previous_hash}")
+            return False, block_data["index"]
+        
+        previous_hash = block_data["hash"]
+        prefix_digest = extend_prefix_digest(prefix_digest, previous_hash)
+        update_fingerprint(fingerprint, file)
+        metrics.get_registry().counter("blocks_validated_total", "Blocks whose hash and linkage were verified").inc()
+    
+    if start < block_count:
+        write_checkpoint(block_count - 1, previous_hash, prefix_digest,
+                         fingerprint.hexdigest(), folder, checkpoint_key)
+    return True, None
+
+@metrics.timed("validate_blockchain_parallel_seconds", "Time to validate the linear DLT across processes")
+def validate_blockchain_parallel(folder="dlt", workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Fully validate the blockchain, recomputing block hashes across a process pool.
+    
+    Hashes are recomputed in worker processes in chunks of block files; the
+    previous_hash linkage is then checked in order in this process. The result
+    is the same as validate_blockchain(folder, full=True).
+    
+    Returns:
+        tuple: (is_valid, first_invalid_block_index)
+    """
+    if not os.path.exists(folder):
+        return True, None  # Empty chain is valid
+    with open_block_index(folder) as index:
+        indexed_files = list(index.iter_files())
+        if not indexed_files:
+            return True, None  # Empty chain is valid
+        unindexed = find_unindexed_block(index)
+    if unindexed is not None:
+        print(f"Error: Block {unindexed} has a block file that is not in the block index")
+        return False, unindexed
+    
+    # A missing file fails at its place in index order, as in validate_blockchain,
+    # so a bad block before it is still the one reported
+    files = [file if file is not None and os.path.exists(file) else None for _, file in indexed_files]
+    hashed_blocks = iter_hashed_blocks([file for file in files if file is not None], workers, chunk_size)
+    previous_hash = None
+    prefix_digest = ""
+    try:
+        for (block_index, _), file in zip(indexed_files, files):
+            block_data = next(hashed_blocks) if file is not None else None
+            if block_data is None or ("error" in block_data and not os.path.exists(block_data["file"])):
+                # No file recorded for this index, or the file was removed
+                print("Error: Blockchain has missing blocks or non-sequential indices")
+                return False, block_index
+            if "error" in block_data:
+                print(f"Error reading block file {block_data['file']}: {block_data['error']}")
+                return False, None
+            
+            # Verify hash
+            if block_data["calculated_hash"] != block_data["hash"]:
+                print(f"Error: Block {block_data['index']} has invalid hash")
+                print(f"  Stored: {block_data['hash']}")
+                print(f"  Calculated: {block_data['calculated_hash']}")
+                return False, block_data["index"]
+            
+            # Verify chain linkage (except for genesis block)
+            if previous_hash is not None and block_data["previous_hash"] != previous_hash:
                 print(f"Error: Block {block_data['index']} has invalid previous_hash")
                 print(f"  Stored previous_hash: {block_data['previous_hash']}")
-                print(f"  Expected (previous block's hash): {previous_block['hash']}")
+                print(f"  Expected (previous block's hash): {previous_hash}")
                 return False, block_data["index"]
+            
+            previous_hash = block_data["hash"]
+            prefix_digest = extend_prefix_digest(prefix_digest, previous_hash)
+    finally:
+        hashed_blocks.close()
     
+    write_checkpoint(len(indexed_files) - 1, previous_hash, prefix_digest,
+                     files_fingerprint(indexed_files), folder)
     return True, None
 
 def print_blockchain_linear(folder="dlt"):
     """Print the blockchain in a linear format showing block pointers"""
-    # Get all block files
-    block_files = glob.glob(f"{folder}/block_*.json")
-    if not block_files:
+    if find_highest_block_index(folder) == -1:
         print("No blocks found in blockchain")
         return
-        
-    # Load and sort all blocks by index
-    blocks = []
-    for file in block_files:
-        with open(file, 'r') as f:
-            block_data = json.load(f)
-            blocks.append(block_data)
     
-    blocks.sort(key=lambda x: x["index"])
-    
-    # Print the chain
+    # Print the chain, reading one block at a time
     print("\n=== BLOCKCHAIN LINEAR STRUCTURE ===")
-    print("Genesis Block (0) [" + blocks[0]["hash"][:8] + "...]")
-    
-    for i in range(1, len(blocks)):
-        prev_hash = blocks[i]["previous_hash"][:8]
-        curr_hash = blocks[i]["hash"][:8]
-        print(f"   ↑")
-        print(f"   └── Block ({blocks[i]['index']}) [{curr_hash}...] points to [{prev_hash}...]")
+    try:
+        for block_data in iter_blocks(folder):
+            curr_hash = block_data["hash"][:8]
+            if block_data["index"] == 0:
+                print("Genesis Block (0) [" + curr_hash + "...]")
+                continue
+            prev_hash = block_data["previous_hash"][:8]
+            print(f"   ↑")
+            print(f"   └── Block ({block_data['index']}) [{curr_hash}...] points to [{prev_hash}...]")
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
 
-def add_single_transaction(transaction_data):
-    """Add a single transaction to the blockchain"""
-    folder = "dlt"
-    os.makedirs(folder, exist_ok=True)
+def read_chain_tip(folder="dlt"):
+    """
+    Read the persisted chain tip record.
+    
+    Returns:
+        dict: {"height", "hash", "verified_height"}, or None if there is no usable tip
+    """
+    tip = load_chain_tip(folder)
+    if tip is None:
+        return None
     
-    # Validate existing blockchain before adding new block
-    is_valid, corrupted_block = validate_blockchain(folder)
+    # The tip must still point at an existing block file
+    storage = storage_format(folder)
+    if not os.path.exists(f"{folder}/{block_file_name(tip['height'], tip['hash'], storage)}"):
+        return None
+    # and be the last block: a writer may have stopped after saving the next block.
+    # Blocks are journaled before their file is written, so only their exact
+    # file names need checking
+    for block_data in read_journal(folder):
+        if block_data["index"] > tip["height"] and os.path.exists(journaled_file(folder, block_data, storage)):
+            return None
+    return tip
+
+def load_chain_tip(folder="dlt"):
+    """Read the tip record as stored, without checking it against the block files"""
+    try:
+        with open(f"{folder}/{TIP_FILE}", 'r') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def write_chain_tip(height, block_hash, verified_height, folder="dlt"):
+    """Atomically replace the chain tip record"""
+    tip = {
+        "height": height,
+        "hash": block_hash,
+        "verified_height": verified_height
+    }
+    temp_file = f"{folder}/{TIP_FILE}.tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(tip, file, indent=4)
+    os.replace(temp_file, f"{folder}/{TIP_FILE}")
+    return tip
+
+def verify_chain(folder="dlt", full=False):
+    """
+    Validate the chain and record the result in the tip.
     
+    Returns:
+        tuple: (is_valid, first_invalid_block_index, tip)
+    """
+    is_valid, corrupted_block = validate_blockchain(folder, full=full)
     if not is_valid:
-        print(f"\n⚠️ ERROR: Blockchain is corrupted at block {corrupted_block}")
-        print("⚠️ New block will not be added to preserve blockchain integrity")
-        print("⚠️ Please restore the blockchain from a valid backup or create a new one")
-        return
+        return False, corrupted_block, None
     
-    # Continue with existing code if blockchain is valid
     highest_index = find_highest_block_index(folder)
-    
+    if next_block_files(folder, highest_index):
+        # A block file the index doesn't know about, its index must not be reused
+        print(f"Error: Block {highest_index + 1} has a file that is not in the block index")
+        return False, highest_index + 1, None
     if highest_index == -1:
+        return True, None, None
+    
+    with open_block_index(folder) as index:
+        last_block_data = load_block_file(index.path(highest_index))
+    tip = write_chain_tip(highest_index, last_block_data["hash"], highest_index, folder)
+    return True, None, tip
+
+@holds_folder_lock
+def add_single_transaction(transaction_data, workers=1, folder="dlt", validate_every=None,
+                           full_validation=False, print_chain=False, difficulty_bits=None, retarget_policy=None,
+                           journal=None):
+    """Add a single transaction to the blockchain
+    
+    The previous block is taken from the persisted chain tip, so appending does not
+    depend on the length of the chain. The full chain is only validated when there
+    is no tip yet, when full_validation is set, or when more than validate_every
+    blocks were added since the last full validation.
+    
+    Set workers above 1 to mine the block across several processes. The target is
+    kept in the folder's difficulty.json: difficulty_bits replaces it, and
+    retarget_policy (a RetargetPolicy) adjusts it from the observed block times.
+    
+    Concurrent writers are serialized by the folder's write lock, held from reading
+    the tip to recording the new one. The block is written through the journal
+    and committed (fsynced) before returning, unless a journal is passed in: the
+    caller then commits it once for a whole group of blocks.
+    """
+    if journal is None:
+        with Journal(folder) as journal:
+            new_block = add_single_transaction(transaction_data, workers, folder, validate_every, full_validation,
+                                               print_chain, difficulty_bits, retarget_policy, journal)
+            journal.commit()
+            return new_block
+    recover_journal(journal, folder)
+    
+    tip = read_chain_tip(folder)
+    needs_validation = tip is None or full_validation or (
+        validate_every is not None and tip["height"] - tip["verified_height"] >= validate_every
+    )
+    
+    if needs_validation:
+        # Validate existing blockchain before adding new block
+        is_valid, corrupted_block, tip = verify_chain(folder, full=full_validation)
+        
+        if not is_valid:
+            print(f"\n⚠️ ERROR: Blockchain is corrupted at block {corrupted_block}")
+            print("⚠️ New block will not be added to preserve blockchain integrity")
+            print("⚠️ Please restore the blockchain from a valid backup or create a new one")
+            return
+    
+    if tip is None:
         # No blocks exist, create a new blockchain with genesis block
         print("\n=== CREATING NEW BLOCKCHAIN ===")
-        blockchain = Blockchain()
+        blockchain = Blockchain(next_proof_of_work(folder, 0, None, difficulty_bits, retarget_policy))
         print("Creating and saving genesis block...")
-        save_block_to_file(blockchain.chain[0], folder)
+        genesis_block = blockchain.chain[0]
+        save_block_to_file(genesis_block, folder, journal)
+        tip = write_chain_tip(0, genesis_block.hash, 0, folder)
         
         # Add the new transaction to the new blockchain
         print("\n=== ADDING NEW TRANSACTION ===")
         blockchain.append_block(transaction_data)
         new_block = blockchain.last_block
     else:
-        # Blockchain exists, we need to use the existing chain
+        # Blockchain exists, continue from the recorded tip
         print(f"\n=== BLOCKCHAIN ALREADY EXISTS ===")
-        print(f"Found existing blocks up to index {highest_index}")
-        print(f"✅ Blockchain integrity verified")
-        
-        # Load the last block to get its hash
-        last_block_files = glob.glob(f"{folder}/block_{highest_index}_*.json")
-        if not last_block_files:
-            print(f"Error: Could not find block with index {highest_index}")
-            return
-        
-        # Read the last block file
-        with open(last_block_files[0], 'r') as file:
-            last_block_data = json.load(file)
+        print(f"Found existing blocks up to index {tip['height']}")
+        if needs_validation:
+            print(f"✅ Blockchain integrity verified")
+        else:
+            print(f"Blockchain last fully verified at block {tip['verified_height']}")
         
         # Create a new block with the correct index and previous hash
         print("\n=== ADDING NEW TRANSACTION ===")
         new_block = Block(
-            index=highest_index + 1,
+            index=tip["height"] + 1,
             timestamp=get_current_timestamp(),
             data=transaction_data,
-            previous_hash=last_block_data["hash"],
-            nonce=0
+            previous_hash=tip["hash"],
+            nonce=0,
+            version=CURRENT_BLOCK_VERSION
         )
     
     # Mine the new block
-    proof_of_work = ProofOfWork(difficulty=3)
+    proof_of_work = next_proof_of_work(folder, new_block.index, lambda index: read_block_timestamp(index, folder),
+                                       difficulty_bits, retarget_policy)
     print(f"Mining block {new_block.index}...")
-    proof_of_work.mine(new_block)
+    if workers > 1:
+        proof_of_work.mine_parallel(new_block, workers=workers)
+    else:
+        proof_of_work.mine(new_block)
     print_block_info(new_block)
-    save_block_to_file(new_block, folder)
+    save_block_to_file(new_block, folder, journal)
+    write_chain_tip(new_block.index, new_block.hash, tip["verified_height"], folder)
     
-    print_blockchain_linear(folder)
+    if print_chain:
+        print_blockchain_linear(folder)
     print(f"\nTransaction has been added to the blockchain and saved to {folder}")
+    return new_block
+
+def read_block_timestamp(index, folder="dlt"):
+    """Return the stored timestamp of a block"""
+    with open_block_index(folder) as block_index:
+        return load_block_file(block_index.path(index))["timestamp"]
 
 def print_block_info(block):
     print(f"Block {block.index} has been added to the blockchain!")
@@ -234,9 +607,27 @@ def print_block_info(block):
     print(f"Data: {block.data}")
 
 if __name__ == "__main__":
-    # Get transaction data from user input
-    transaction_data = input("Enter transaction data: ")
+    parser = argparse.ArgumentParser(description="Add a transaction to the linear DLT")
+    parser.add_argument("transaction", nargs="?", default=None,
+                        help="Transaction data (asked for on stdin when not given)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to mine the block")
+    parser.add_argument("--full-validation", action="store_true", help="Validate every block before appending")
+    parser.add_argument("--validate-every", type=int, default=None,
+                        help="Run a full validation once this many blocks were added since the last one")
+    parser.add_argument("--difficulty-bits", type=int, default=None,
+                        help="Leading zero bits required in block hashes (replaces the stored target)")
+    parser.add_argument("--target-block-time", type=float, default=None,
+                        help="Retarget the difficulty to hold this many seconds per block")
+    parser.add_argument("--retarget-interval", type=int, default=10, help="Blocks between retargets")
+    args = parser.parse_args()
+    metrics.enable_from_environment()
+    
+    # Get transaction data from the command line or user input
+    transaction_data = args.transaction if args.transaction is not None else input("Enter transaction data: ")
     if not transaction_data:
         transaction_data = f"Transaction at {get_current_timestamp()}"
     
-    add_single_transaction(transaction_data)
\ No newline at end of file
+    retarget_policy = RetargetPolicy(args.target_block_time, args.retarget_interval) if args.target_block_time else None
+    add_single_transaction(transaction_data, workers=args.workers, validate_every=args.validate_every,
+                           full_validation=args.full_validation, print_chain=True,
+                           difficulty_bits=args.difficulty_bits, retarget_policy=retarget_policy)
\ No newline at end of file
@@ -1,141 +1,280 @@
 import sys
 import os
-import json
-import glob
+import argparse
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.blockchain import Blockchain
-from src.proof_of_work import ProofOfWork
+from src.proof_of_work import RetargetPolicy, mine_blocks, next_proof_of_work
 from src.block import Block
+from src.binary_codec import (BLOCK_VERSION_JSON, CURRENT_BLOCK_VERSION, block_file_name, block_files,
+                              dump_block_file, load_block_file, storage_format)
+from src.parallel_validation import iter_hashed_blocks, DEFAULT_CHUNK_SIZE
+from src.index_store import IndexStore
+from src.tree_index import TreeIndex, open_tree_index
+from src.fork_choice import open_fork_choice
+from src.secondary_index import open_secondary_index
+from src.file_lock import holds_folder_lock
+from src.journal import Journal, write_block_file
+from src.utils import metrics
 from src.utils.timestamp import get_current_timestamp
 
+def tree_block_data(block, parent_hash=None):
+    """Create a serializable representation of a tree block"""
+    return {
+        "index": block.index,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "data": block.data,
+        "nonce": block.nonce,
+        "merkle_root": block.merkle_root,
+        "version": block.version,
+        "parent_hash": parent_hash,  # Store parent hash for tree structure
+        "left_child": None,          # Child links are kept in the tree index
+        "right_child": None
+    }
+
 # Function to save block data to a file
-def save_block_to_file(block, parent_hash=None, folder="dlt_tree"):
+@metrics.timed("block_save_seconds", "Time to write a block file")
+def save_block_to_file(block, parent_hash=None, folder="dlt_tree", journal=None):
     # Ensure the DLT folder exists
     os.makedirs(folder, exist_ok=True)
     
     # Create a filename with the block index and hash
-    filename = f"{folder}/block_{block.index}_{block.hash[:8]}.json"
+    filename = f"{folder}/{block_file_name(block.index, block.hash, storage_format(folder))}"
     
     # Check if this block already exists
     if os.path.exists(filename):
         print(f"Block {block.index} already exists at {filename}")
         return
     
-    # Create a serializable representation of the block
-    block_data = {
-        "index": block.index,
-        "hash": block.hash,
-        "previous_hash": block.previous_hash,
-        "timestamp": block.timestamp,
-        "data": block.data,
-        "nonce": block.nonce,
-        "merkle_root": block.merkle_root,
-        "parent_hash": parent_hash,  # Store parent hash for tree structure
-        "left_child": None,          # Initialize left child as None
-        "right_child": None          # Initialize right child as None
-    }
-    
-    # Write the block data to the file
-    with open(filename, 'w') as file:
-        json.dump(block_data, file, indent=4)
+    # Open the indexes before writing, so a first-time rebuild doesn't pick up this block.
+    # The index store is opened once for the whole insert
+    with IndexStore(folder) as store, open_tree_index(folder, store) as index, \
+            open_fork_choice(folder, index) as fork_choice, open_secondary_index(folder, store) as lookup:
+        block_data = tree_block_data(block, parent_hash)
+        
+        # Record the block in the write-ahead journal before writing its file
+        if journal is not None:
+            journal.append(block_data)
+        
+        # Write the block data to the file
+        dump_block_file(filename, block_data)
+        index.add_block(block.index, block.hash, os.path.basename(filename))
+        lookup.add_block(block_data, os.path.basename(filename))
+        
+        print(f"Block {block.index} saved to {filename}")
+        
+        # If there's a parent, update the parent's child references
+        if parent_hash:
+            update_parent_children(parent_hash, block.hash, folder, index)
+        fork_choice.add_block(block.hash, parent_hash)
+
+def recover_journal(journal, folder="dlt_tree"):
+    """
+    Repair the folder from the write-ahead journal after a crash.
     
-    print(f"Block {block.index} saved to {filename}")
+    Journaled blocks whose file is missing or torn are rewritten; those the crash
+    kept out of the indexes are added to the tree index, the parent's child links,
+    the fork choice and the lookup indexes.
     
-    # If there's a parent, update the parent's child references
-    if parent_hash:
-        update_parent_children(parent_hash, block.hash, folder)
+    Returns:
+        int: Number of block files rewritten
+    """
+    if journal.recovered:
+        return 0
+    journal.recovered = True
+    damaged = journal.damaged_records()
+    if not damaged:
+        return 0
+    
+    with IndexStore(folder) as store, open_tree_index(folder, store) as index, \
+            open_fork_choice(folder, index) as fork_choice, open_secondary_index(folder, store) as lookup:
+        for block_data in damaged:
+            filename = write_block_file(folder, block_data)
+            if index.locate(block_data["hash"]) is None:
+                index.add_block(block_data["index"], block_data["hash"], filename)
+            lookup.add_block(block_data, filename)
+            parent_hash = block_data["parent_hash"]
+            if parent_hash and block_data["hash"] not in index.children(parent_hash):
+                update_parent_children(parent_hash, block_data["hash"], folder, index)
+            if parent_hash is None or parent_hash in fork_choice:
+                fork_choice.add_block(block_data["hash"], parent_hash)
+            print(f"Block {block_data['index']} recovered from the journal")
+    return len(damaged)
 
-def update_parent_children(parent_hash, child_hash, folder="dlt_tree"):
-    """Update a parent block's children references"""
-    # Find the parent block file
-    parent_files = glob.glob(f"{folder}/block_*_{parent_hash[:8]}.json")
-    if not parent_files:
+def update_parent_children(parent_hash, child_hash, folder="dlt_tree", index=None):
+    """
+    Update a parent block's children references.
+    
+    Links are recorded in the tree index, so the parent's block file is not rewritten.
+    """
+    if index is None:
+        with open_tree_index(folder) as index:
+            return update_parent_children(parent_hash, child_hash, folder, index)
+    
+    # Find the parent block by its exact hash
+    if index.locate(parent_hash) is None:
         print(f"Warning: Parent block with hash {parent_hash[:8]} not found")
         return
-        
-    # Read the parent block
-    with open(parent_files[0], 'r') as file:
-        parent_data = json.load(file)
-    
-    # Update the appropriate child reference
-    if parent_data["left_child"] is None:
-        parent_data["left_child"] = child_hash
-    elif parent_data["right_child"] is None:
-        parent_data["right_child"] = child_hash
-    else:
+    
+    # Take the first free child slot
+    if index.add_child(parent_hash, child_hash) is None:
         print(f"Warning: Parent block {parent_hash[:8]} already has two children")
-        return
-        
-    # Write the updated parent block back to the file
-    with open(parent_files[0], 'w') as file:
-        json.dump(parent_data, file, indent=4)
+
+def apply_child_links(blocks, index):
+    """Fill the left_child/right_child fields of loaded blocks from the tree index"""
+    for block_hash, block_data in blocks.items():
+        left, right = index.children(block_hash)
+        if left or right:
+            block_data["left_child"] = left
+            block_data["right_child"] = right
 
 def find_next_parent_block(folder="dlt_tree"):
     """Find the next block that can accept a child (breadth-first)"""
-    # Get all block files
-    block_files = glob.glob(f"{folder}/block_*.json")
-    if not block_files:
-        return None
-    
-    # Load all blocks
-    blocks = []
-    for file in block_files:
-        with open(file, 'r') as f:
-            block_data = json.load(f)
-            blocks.append(block_data)
-    
-    # Sort by index to ensure breadth-first processing
-    blocks.sort(key=lambda x: x["index"])
-    
-    # Find the first block that has fewer than two children
-    for block in blocks:
-        if block["left_child"] is None or block["right_child"] is None:
-            return block
-    
-    return None
+    with open_tree_index(folder) as index:
+        parent_hash = index.next_parent()
+        if parent_hash is None:
+            return None
+        
+        block_data = load_block_file(index.locate(parent_hash), bodies=False)
+        block_data["left_child"], block_data["right_child"] = index.children(parent_hash)
+    return block_data
 
-def validate_blockchain_tree(folder="dlt_tree"):
+def find_unindexed_block(index):
+    """
+    Compare the block files of the folder with the tree index (one directory scan).
+    
+    Returns:
+        int: The lowest block index with a file the index doesn't point at, or None
+    """
+    indexed = {os.path.splitext(os.path.basename(index.locate(index.frontier_hash(position)) or ""))[0]
+               for position in range(index.frontier_size())}
+    unindexed = []
+    for file in block_files(index.folder):
+        name = os.path.splitext(os.path.basename(file))[0]
+        # The same block stored in the other format (an interrupted conversion) is not an extra block
+        if name not in indexed:
+            try:
+                unindexed.append(int(name.split('_')[1]))
+            except (IndexError, ValueError):
+                continue
+    return min(unindexed) if unindexed else None
+
+@metrics.timed("validate_blockchain_tree_seconds", "Time to validate the tree DLT")
+def validate_blockchain_tree(folder="dlt_tree", full=False):
     """
     Validate all blocks in the blockchain tree.
     Checks that:
     1. Each block's hash is valid
     2. Each block's previous_hash matches its parent's hash
     
+    Blocks are streamed in index order and parents and child links are looked up
+    in the tree index, so only one block is held in memory at a time. The checks
+    and the block reported are the same as check_tree_blocks over the whole tree.
+    Set full to also scan the folder for block files missing from the tree index.
+    
     Returns:
         tuple: (is_valid, corrupted_block_index)
     """
-    # Get all block files
-    block_files = glob.glob(f"{folder}/block_*.json")
-    if not block_files:
+    if not os.path.exists(folder):
         print("No blocks found in blockchain")
         return True, None
     
-    # Load all blocks
-    blocks = {}
-    for file in block_files:
-        with open(file, 'r') as f:
+    with open_tree_index(folder) as index:
+        block_count = index.frontier_size()
+        if block_count == 0:
+            print("No blocks found in blockchain")
+            return True, None
+        
+        if full:
+            unindexed = find_unindexed_block(index)
+            if unindexed is not None:
+                print(f"Error: Block {unindexed} has a block file that is not in the tree index")
+                return False, unindexed
+        
+        # Links that point at an existing block, and links confirmed by the child's parent_hash
+        listed_links = 0
+        confirmed_links = 0
+        for position in range(block_count):
             try:
-                block_data = json.load(f)
-                blocks[block_data["hash"]] = block_data
-            except json.JSONDecodeError:
-                print(f"Error: Corrupted block file {file}")
+                block_data = index.read_block(index.frontier_hash(position))
+            except (OSError, ValueError):
+                print(f"Error: Corrupted block file for block {position}")
                 return False, None
+            block_hash = block_data["hash"]
+            
+            # 1. Verify hash integrity
+            calculated_hash = recalculate_hash(block_data)
+            if calculated_hash != block_hash:
+                print(f"Error: Block {block_data['index']} has invalid hash")
+                print(f"  Stored: {block_hash}")
+                print(f"  Calculated: {calculated_hash}")
+                return False, block_data["index"]
+            
+            # 2. Verify parent-child relationship (except for genesis)
+            parent_hash = block_data["parent_hash"]
+            if parent_hash:
+                if parent_hash != block_data["previous_hash"]:
+                    print(f"Error: Block {block_data['index']} has mismatched parent and previous hash")
+                    return False, block_data["index"]
+                
+                # Verify parent exists and has this block as a child
+                if index.locate(parent_hash) is None:
+                    print(f"Error: Block {block_data['index']} references non-existent parent")
+                    return False, block_data["index"]
+                
+                if block_hash not in index.children(parent_hash):
+                    parent_index = index.read_block(parent_hash)["index"]
+                    print(f"Error: Block {block_data['index']} claims {parent_index} as parent, but parent doesn't list it as a child")
+                    return False, block_data["index"]
+                confirmed_links += 1
+            
+            listed_links += sum(1 for child in (block_data["left_child"], block_data["right_child"])
+                                if child and index.locate(child))
+        
+        # Every confirmed link is also listed, so extra listed links point at a child
+        # with another parent_hash; find the first parent holding one
+        if listed_links != confirmed_links:
+            for block_data in index.iter_blocks():
+                for side in ("left", "right"):
+                    child_hash = block_data[f"{side}_child"]
+                    if child_hash and index.locate(child_hash) and \
+                            index.read_block(child_hash)["parent_hash"] != block_data["hash"]:
+                        print(f"Error: {side.capitalize()} child of block {block_data['index']} doesn't reference it as parent")
+                        return False, block_data["index"]
+    
+    metrics.get_registry().counter("blocks_validated_total", "Blocks whose hash and linkage were verified").inc(block_count)
+    return True, None
+
+def recalculate_hash(block_data):
+    """Recreate a stored block and calculate its hash"""
+    temp_block = Block(
+        index=block_data["index"],
+        timestamp=block_data["timestamp"],
+        data=block_data["data"],
+        previous_hash=block_data["previous_hash"],
+        nonce=block_data["nonce"],
+        version=block_data.get("version", BLOCK_VERSION_JSON)
+    )
+    return temp_block.calculate_hash()
+
+def check_tree_blocks(blocks, calculate_hash):
+    """
+    Check hashes and parent/child links of loaded tree blocks.
     
+    Args:
+        blocks: Dict of block hash to block data, in file order
+        calculate_hash: Function returning the recomputed hash of a block's data
+    
+    Returns:
+        tuple: (is_valid, corrupted_block_index)
+    """
     # Validate each block
     for block_hash, block_data in blocks.items():
-        # Recreate block to calculate hash
-        temp_block = Block(
-            index=block_data["index"],
-            timestamp=block_data["timestamp"],
-            data=block_data["data"],
-            previous_hash=block_data["previous_hash"],
-            nonce=block_data["nonce"]
-        )
-        
         # 1. Verify hash integrity
-        calculated_hash = temp_block.calculate_hash()
+        calculated_hash = calculate_hash(block_data)
         if calculated_hash != block_hash:
             print(f"Error: Block {block_data['index']} has invalid hash")
             print(f"  Stored: {block_hash}")
@@ -176,85 +315,104 @@ def validate_blockchain_tree(folder="dlt_tree"):
                 print(f"Error: Right child of block {block_data['index']} doesn't reference it as parent")
                 return False, block_data["index"]
     
+    metrics.get_registry().counter("blocks_validated_total", "Blocks whose hash and linkage were verified").inc(len(blocks))
     return True, None
 
-def print_blockchain_tree(folder="dlt_tree"):
-    """Print the blockchain as a tree structure"""
-    # Get all block files
-    block_files = glob.glob(f"{folder}/block_*.json")
-    if not block_files:
+@metrics.timed("validate_blockchain_tree_parallel_seconds", "Time to validate the tree DLT across processes")
+def validate_blockchain_tree_parallel(folder="dlt_tree", workers=None, chunk_size=DEFAULT_CHUNK_SIZE, full=False):
+    """
+    Validate the blockchain tree, recomputing block hashes across a process pool.
+    
+    Worker processes load the block files in chunks and recompute their hashes;
+    the parent/child checks then run in this process over the block headers, in
+    the same index order as validate_blockchain_tree, so both report the same block.
+    full adds the same check for block files missing from the tree index.
+    
+    Returns:
+        tuple: (is_valid, corrupted_block_index)
+    """
+    if not os.path.exists(folder):
         print("No blocks found in blockchain")
-        return
+        return True, None
+    
+    with open_tree_index(folder) as index:
+        files = [index.locate(index.frontier_hash(position)) for position in range(index.frontier_size())]
+        if not files:
+            print("No blocks found in blockchain")
+            return True, None
+        if full:
+            unindexed = find_unindexed_block(index)
+            if unindexed is not None:
+                print(f"Error: Block {unindexed} has a block file that is not in the tree index")
+                return False, unindexed
+        if None in files:
+            print(f"Error: Corrupted block file for block {files.index(None)}")
+            return False, None
         
-    # Load all blocks
-    blocks = {}
-    for file in block_files:
-        with open(file, 'r') as f:
-            block_data = json.load(f)
-            blocks[block_data["hash"]] = block_data
-    
-    # Find the root (genesis block)
-    genesis = None
-    for hash, block in blocks.items():
-        if block["index"] == 0:
-            genesis = block
-            break
+        # Load block headers with their recomputed hashes; a file that can't be read
+        # fails validation as in validate_blockchain_tree
+        blocks = {}
+        try:
+            for block_data in iter_hashed_blocks(files, workers, chunk_size):
+                if "error" in block_data:
+                    print(f"Error: Corrupted block file {block_data['file']}")
+                    return False, None
+                blocks[block_data["hash"]] = block_data
+        except OSError as e:
+            print(f"Error: Corrupted block file: {e}")
+            return False, None
+        
+        apply_child_links(blocks, index)
     
-    if not genesis:
-        print("Error: Genesis block not found")
+    return check_tree_blocks(blocks, lambda block_data: block_data["calculated_hash"])
+
+def print_blockchain_tree(folder="dlt_tree"):
+    """Print the blockchain as a tree structure"""
+    if find_highest_block_index(folder) == -1:
+        print("No blocks found in blockchain")
         return
     
-    # Print the tree recursively
-    print("\n=== BLOCKCHAIN TREE STRUCTURE ===")
-    print_subtree(blocks, genesis["hash"], "", True)
+    with open_tree_index(folder) as index:
+        # The root (genesis block) is the first block of the index
+        genesis_hash = index.frontier_hash(0)
+        if index.read_block(genesis_hash)["index"] != 0:
+            print("Error: Genesis block not found")
+            return
+        
+        # Print the tree depth-first, keeping only the prefixes of the current path
+        print("\n=== BLOCKCHAIN TREE STRUCTURE ===")
+        child_prefixes = []
+        for depth, block_hash, is_last in index.walk(genesis_hash):
+            block = index.read_block(block_hash)
+            del child_prefixes[depth:]
+            prefix = child_prefixes[-1] if child_prefixes else ""
+            connector = "└── " if is_last else "├── "
+            print(f"{prefix}{connector}Block ({block['index']}) [{block_hash[:8]}...]")
+            child_prefixes.append(prefix + ("    " if is_last else "│   "))
 
-def print_subtree(blocks, block_hash, prefix, is_last):
-    """Recursively print a subtree of the blockchain"""
-    if block_hash not in blocks:
+def print_canonical_branch(folder="dlt_tree"):
+    """Print the branch chosen by the heaviest-subtree rule, from genesis to the best tip"""
+    if find_highest_block_index(folder) == -1:
+        print("No blocks found in blockchain")
         return
-        
-    block = blocks[block_hash]
     
-    # Print the current block
-    connector = "└── " if is_last else "├── "
-    print(f"{prefix}{connector}Block ({block['index']}) [{block_hash[:8]}...]")
-    
-    # Prepare prefix for children
-    child_prefix = prefix + ("    " if is_last else "│   ")
-    
-    # Print left child if exists
-    if block["left_child"]:
-        has_right = block["right_child"] is not None
-        print_subtree(blocks, block["left_child"], child_prefix, not has_right)
-    
-    # Print right child if exists
-    if block["right_child"]:
-        print_subtree(blocks, block["right_child"], child_prefix, True)
+    with open_fork_choice(folder) as fork_choice:
+        print("\n=== CANONICAL BRANCH (HEAVIEST SUBTREE) ===")
+        for block_hash in fork_choice.canonical_chain():
+            print(f"Block [{block_hash[:8]}...] subtree weight {fork_choice.weight(block_hash)}")
 
 def find_highest_block_index(folder="dlt_tree"):
     """Find the highest block index in the dlt folder"""
-    # Original implementation is fine for this purpose
     if not os.path.exists(folder):
         return -1
-        
-    # Get all block files
-    block_files = glob.glob(f"{folder}/block_*.json")
     
-    if not block_files:
-        return -1
-        
-    # Extract indices from filenames
-    indices = []
-    for file in block_files:
-        try:
-            # Format is block_INDEX_HASH.json
-            parts = os.path.basename(file).split('_')
-            if len(parts) >= 2:
-                indices.append(int(parts[1]))
-        except (ValueError, IndexError):
-            pass
-            
-    return max(indices) if indices else -1
+    with open_tree_index(folder) as index:
+        return index.height
+
+def read_block_timestamp(index, folder="dlt_tree"):
+    """Return the stored timestamp of a block (blocks are kept in index order in the tree index)"""
+    with open_tree_index(folder) as tree_index:
+        return tree_index.read_block(tree_index.frontier_hash(index))["timestamp"]
 
 def print_block_info(block):
     print(f"Block {block.index} has been added to the blockchain!")
@@ -265,75 +423,216 @@ def print_block_info(block):
     print(f"Merkle Root: {block.merkle_root}")
     print(f"Data: {block.data}")
 
-def add_single_transaction(transaction_data):
-    """Add a single transaction to the blockchain tree"""
-    folder = "dlt_tree"
-    os.makedirs(folder, exist_ok=True)
+def prepare_tree(folder="dlt_tree", full_validation=False, difficulty_bits=None, retarget_policy=None, journal=None):
+    """
+    Get a folder ready for new blocks: recover the journal, validate the tree when
+    its index is first built (or full_validation is set) and create the genesis
+    block of a new tree.
     
-    # Validate existing blockchain tree before adding new block
-    is_valid, corrupted_block = validate_blockchain_tree(folder)
+    Returns:
+        bool: False if the tree is corrupted and no block must be added
+    """
+    recover_journal(journal, folder)
     
-    if not is_valid:
-        print(f"\n⚠️ ERROR: Blockchain tree is corrupted at block {corrupted_block}")
-        print("⚠️ New block will not be added to preserve blockchain integrity")
-        print("⚠️ Please restore the blockchain from a valid backup or create a new one")
-        return
+    with TreeIndex(folder) as index:
+        index_missing = index.is_empty()
     
-    # Check if blockchain exists
-    block_files = glob.glob(f"{folder}/block_*.json")
+    if full_validation or index_missing:
+        # Validate existing blockchain tree before adding new block
+        is_valid, corrupted_block = validate_blockchain_tree(folder, full=full_validation)
+        
+        if not is_valid:
+            print(f"\n⚠️ ERROR: Blockchain tree is corrupted at block {corrupted_block}")
+            print("⚠️ New block will not be added to preserve blockchain integrity")
+            print("⚠️ Please restore the blockchain from a valid backup or create a new one")
+            return False
     
-    if not block_files:
+    if find_highest_block_index(folder) == -1:
         # No blocks exist, create a new blockchain with genesis block
         print("\n=== CREATING NEW BLOCKCHAIN TREE ===")
-        blockchain = Blockchain()
+        blockchain = Blockchain(next_proof_of_work(folder, 0, None, difficulty_bits, retarget_policy))
         print("Creating and saving genesis block...")
-        genesis_block = blockchain.chain[0]
-        save_block_to_file(genesis_block, None, folder)
-        
-        # The genesis block becomes the parent for the first transaction
-        parent_block = {
-            "hash": genesis_block.hash,
-            "index": 0
-        }
-    else:
-        # Blockchain exists and is valid, find a block that can accept children
+        save_block_to_file(blockchain.chain[0], None, folder, journal)
+    elif full_validation or index_missing:
         print(f"\n✅ Blockchain tree integrity verified")
-        parent_block = find_next_parent_block(folder)
-        if not parent_block:
+    return True
+
+def commit_round(blocks, parent_hashes, folder="dlt_tree", journal=None):
+    """
+    Save blocks mined at the same time, all or none.
+    
+    Every block is journaled and the journal committed before any block file is
+    written, so after a crash recover_journal either finds none of the blocks or
+    writes the missing ones with their child links.
+    """
+    if journal is None:
+        with Journal(folder) as journal:
+            return commit_round(blocks, parent_hashes, folder, journal)
+    for block, parent_hash in zip(blocks, parent_hashes):
+        journal.append(tree_block_data(block, parent_hash))
+    journal.commit()
+    for block, parent_hash in zip(blocks, parent_hashes):
+        save_block_to_file(block, parent_hash, folder)
+
+@holds_folder_lock
+def add_transaction_batch(transactions, workers=None, folder="dlt_tree", full_validation=False,
+                          print_chain=False, difficulty_bits=None, retarget_policy=None, journal=None):
+    """Add a batch of transactions to the blockchain tree, mining sibling blocks in parallel
+    
+    Each round takes as many free child slots of the frontier as there are
+    transactions left, builds one block per slot and mines them all at once
+    across a pool of workers processes (the blocks don't depend on each other,
+    only on their parents). A round is committed atomically (see commit_round);
+    blocks mined in a round become parents for the next one. Slots are filled in
+    the breadth-first order add_single_transaction uses, so the tree is the same
+    as adding the transactions one by one.
+    
+    A round stops before a retarget height of retarget_policy: the new target
+    depends on the timestamps of the blocks before it.
+    
+    Returns:
+        list: The blocks added, in index order (shorter than transactions if the tree is corrupted)
+    """
+    if journal is None:
+        with Journal(folder) as journal:
+            return add_transaction_batch(transactions, workers, folder, full_validation, print_chain,
+                                         difficulty_bits, retarget_policy, journal)
+    if not transactions or not prepare_tree(folder, full_validation, difficulty_bits, retarget_policy, journal):
+        return []
+    
+    added = []
+    remaining = list(transactions)
+    while remaining:
+        highest_index = find_highest_block_index(folder)
+        with open_tree_index(folder) as index:
+            parent_hashes = index.free_slots(len(remaining))
+        if not parent_hashes:
             print("Error: No parent block available to accept children")
-            return
+            break
+        if retarget_policy is not None:
+            for offset in range(1, len(parent_hashes)):
+                if retarget_policy.is_retarget_height(highest_index + 1 + offset):
+                    del parent_hashes[offset:]
+                    break
+        
+        blocks = [
+            Block(
+                index=highest_index + 1 + offset,
+                timestamp=get_current_timestamp(),
+                data=transaction_data,
+                previous_hash=parent_hash,  # Link to parent
+                nonce=0,
+                version=CURRENT_BLOCK_VERSION
+            )
+            for offset, (transaction_data, parent_hash) in enumerate(zip(remaining, parent_hashes))
+        ]
+        proof_of_work = next_proof_of_work(folder, blocks[0].index, lambda index: read_block_timestamp(index, folder),
+                                           difficulty_bits, retarget_policy)
+        # An explicit difficulty is stored by the first round, later rounds may retarget it
+        difficulty_bits = None
+        
+        print(f"\n=== MINING BLOCKS {blocks[0].index}-{blocks[-1].index} ON {len(set(parent_hashes))} PARENT BLOCKS ===")
+        mine_blocks(proof_of_work, blocks, workers)
+        commit_round(blocks, parent_hashes, folder, journal)
+        added.extend(blocks)
+        del remaining[:len(blocks)]
+    
+    if print_chain:
+        print_blockchain_tree(folder)
+        print_canonical_branch(folder)
+    print(f"\n{len(added)} transactions have been added to the blockchain tree and saved to {folder}")
+    return added
+
+@holds_folder_lock
+def add_single_transaction(transaction_data, workers=1, folder="dlt_tree", full_validation=False,
+                           print_chain=False, difficulty_bits=None, retarget_policy=None, journal=None):
+    """Add a single transaction to the blockchain tree
+    
+    The parent slot, block index and child links come from the persisted tree
+    index, so inserting does not depend on the size of the tree. The whole tree is
+    validated only when the index is first built or when full_validation is set.
+    
+    Set workers above 1 to mine the block across several processes. The target is
+    kept in the folder's difficulty.json: difficulty_bits replaces it, and
+    retarget_policy (a RetargetPolicy) adjusts it from the observed block times.
+    
+    Concurrent writers are serialized by the folder's write lock, held from picking
+    the parent slot and block index to recording the child link. The block is
+    written through the journal and committed (fsynced) before returning, unless
+    a journal is passed in: the caller then commits it once for a whole group.
+    """
+    if journal is None:
+        with Journal(folder) as journal:
+            new_block = add_single_transaction(transaction_data, workers, folder, full_validation,
+                                               print_chain, difficulty_bits, retarget_policy, journal)
+            journal.commit()
+            return new_block
+    if not prepare_tree(folder, full_validation, difficulty_bits, retarget_policy, journal):
+        return
+    
+    # Find a block that can accept children
+    highest_index = find_highest_block_index(folder)
+    parent_block = find_next_parent_block(folder)
+    if not parent_block:
+        print("Error: No parent block available to accept children")
+        return
     
     # Create a new block with the parent's hash
     print(f"\n=== ADDING NEW TRANSACTION AS CHILD OF BLOCK {parent_block['index']} ===")
     
-    # Get highest index to ensure unique increasing indices
-    highest_index = find_highest_block_index(folder)
-    
     new_block = Block(
         index=highest_index + 1,
         timestamp=get_current_timestamp(),
         data=transaction_data,
         previous_hash=parent_block["hash"],  # Link to parent
-        nonce=0
+        nonce=0,
+        version=CURRENT_BLOCK_VERSION
     )
     
     # Mine the new block
-    proof_of_work = ProofOfWork(difficulty=3)
+    proof_of_work = next_proof_of_work(folder, new_block.index, lambda index: read_block_timestamp(index, folder),
+                                       difficulty_bits, retarget_policy)
     print(f"Mining block {new_block.index}...")
-    proof_of_work.mine(new_block)
+    if workers > 1:
+        proof_of_work.mine_parallel(new_block, workers=workers)
+    else:
+        proof_of_work.mine(new_block)
     print_block_info(new_block)
     
     # Save the block with parent reference
-    save_block_to_file(new_block, parent_block["hash"], folder)
+    save_block_to_file(new_block, parent_block["hash"], folder, journal)
     
     # Print the tree structure
-    print_blockchain_tree(folder)
+    if print_chain:
+        print_blockchain_tree(folder)
+        print_canonical_branch(folder)
     print(f"\nTransaction has been added to the blockchain tree and saved to {folder}")
+    return new_block
 
 if __name__ == "__main__":
-    # Get transaction data from user input
-    transaction_data = input("Enter transaction data: ")
-    if not transaction_data:
-        transaction_data = f"Transaction at {get_current_timestamp()}"
-    
-    add_single_transaction(transaction_data)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Add a transaction to the tree DLT")
+    parser.add_argument("--difficulty-bits", type=int, default=None,
+                        help="Leading zero bits required in block hashes (replaces the stored target)")
+    parser.add_argument("--target-block-time", type=float, default=None,
+                        help="Retarget the difficulty to hold this many seconds per block")
+    parser.add_argument("--retarget-interval", type=int, default=10, help="Blocks between retargets")
+    parser.add_argument("--batch", default=None,
+                        help="Add each line of this file as a block, mining sibling blocks in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to mine a batch")
+    args = parser.parse_args()
+    metrics.enable_from_environment()
+    retarget_policy = RetargetPolicy(args.target_block_time, args.retarget_interval) if args.target_block_time else None
+    
+    if args.batch:
+        with open(args.batch, 'r') as file:
+            transactions = [line.strip() for line in file if line.strip()]
+        add_transaction_batch(transactions, workers=args.workers, print_chain=True,
+                              difficulty_bits=args.difficulty_bits, retarget_policy=retarget_policy)
+    else:
+        # Get transaction data from user input
+        transaction_data = input("Enter transaction data: ")
+        if not transaction_data:
+            transaction_data = f"Transaction at {get_current_timestamp()}"
+        
+        add_single_transaction(transaction_data, print_chain=True, difficulty_bits=args.difficulty_bits,
+                               retarget_policy=retarget_policy)
@@ -0,0 +1,85 @@
+import sys
+import os
+import json
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.block_index import BlockIndex
+from src.fork_choice import ForkChoice
+from src.merkle_tree import MerkleTree
+from src.secondary_index import SecondaryIndex, open_secondary_index, block_transactions
+from src.tree_index import TreeIndex
+
+LAYOUT_FOLDERS = {
+    "linear": "dlt",
+    "tree": "dlt_tree",
+}
+
+def rebuild_indexes(folder, layout="linear"):
+    """Rebuild every index of an existing DLT folder from its block files"""
+    if layout == "linear":
+        with BlockIndex(folder) as index:
+            count = index.rebuild()
+    else:
+        with TreeIndex(folder) as index:
+            count = index.rebuild()
+            with ForkChoice(folder, store=index.store) as fork_choice:
+                fork_choice.rebuild((block["hash"], block.get("parent_hash")) for block in index.iter_blocks())
+    with SecondaryIndex(folder) as lookup:
+        lookup.rebuild()
+    print(f"Rebuilt the indexes of {count} blocks in {folder}")
+    return count
+
+def print_block(block_data):
+    print(json.dumps(block_data, indent=4))
+
+def print_transaction_locations(lookup, transaction):
+    """Print the blocks holding a transaction and its Merkle proof in each of them"""
+    locations = lookup.find_transaction(transaction)
+    if not locations:
+        print("Transaction not found")
+    for block_index, position in locations:
+        block_data = lookup.block_by_index(block_index)
+        proof = MerkleTree(block_transactions(block_data)).get_proof(position)
+        print(f"Block {block_index} [{block_data['hash'][:8]}...] position {position}")
+        print(f"  Merkle root: {block_data['merkle_root']}")
+        print(f"  Proof: {json.dumps(proof)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up blocks and transactions of a DLT folder")
+    parser.add_argument("command", choices=["rebuild", "hash", "index", "range", "tx"])
+    parser.add_argument("value", nargs="*", help="Hash, index, [start [end]] timestamps or transaction")
+    parser.add_argument("--layout", choices=sorted(LAYOUT_FOLDERS), default="linear")
+    parser.add_argument("--folder", default=None, help="DLT folder (dlt or dlt_tree by default)")
+    parser.add_argument("--json", action="store_true", help="Parse the transaction as JSON")
+    args = parser.parse_args()
+    folder = args.folder or LAYOUT_FOLDERS[args.layout]
+    
+    if args.command == "rebuild":
+        rebuild_indexes(folder, args.layout)
+        sys.exit(0)
+    if args.command != "range" and len(args.value) != 1:
+        parser.error(f"{args.command} takes exactly one value")
+    
+    with open_secondary_index(folder) as lookup:
+        if args.command in ("hash", "index"):
+            if args.command == "hash":
+                block_data = lookup.block_by_hash(args.value[0])
+            else:
+                block_data = lookup.block_by_index(int(args.value[0]))
+            if block_data:
+                print_block(block_data)
+            else:
+                print("Block not found")
+        elif args.command == "range":
+            start = args.value[0] if len(args.value) > 0 else None
+            end = args.value[1] if len(args.value) > 1 else None
+            try:
+                for block_data in lookup.blocks_in_range(start, end):
+                    print(f"Block {block_data['index']} [{block_data['hash'][:8]}...] {block_data['timestamp']}")
+            except ValueError as e:
+                print(f"Error: {e}")
+        else:
+            transaction = json.loads(args.value[0]) if args.json else args.value[0]
+            print_transaction_locations(lookup, transaction)
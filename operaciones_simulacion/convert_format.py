@@ -0,0 +1,86 @@
+import sys
+import os
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.binary_codec import FORMAT_EXTENSIONS, block_files, dump_block_file, load_block_file, write_storage_format
+from src.file_lock import folder_lock
+from src.journal import Journal
+from src.secondary_index import SecondaryIndex
+from src.tree_index import open_tree_index
+
+LAYOUT_FOLDERS = {
+    "linear": "dlt",
+    "tree": "dlt_tree",
+}
+
+def folder_size(folder):
+    """Total size in bytes of the block files of a folder"""
+    return sum(os.path.getsize(file) for file in block_files(folder))
+
+def convert_folder(folder="dlt", layout="linear", storage="binary"):
+    """
+    Rewrite the block files of a DLT folder in another storage format ("json" or "binary").
+
+    Blocks keep their version, so version 1 blocks still verify against their
+    JSON header hash after being stored in the binary format. New files are
+    written first and the old ones removed only once the folder's format and
+    indexes point at the new ones, so an interrupted conversion can be run again.
+
+    Returns:
+        int: Number of block files rewritten
+    """
+    if storage not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown storage format: {storage}")
+    extension = FORMAT_EXTENSIONS[storage]
+
+    with folder_lock(folder):
+        # Journal records name files in the current format, sync them and start afresh
+        with Journal(folder) as journal:
+            journal.checkpoint()
+
+        # Binary records don't keep the child links of legacy tree files: build the
+        # tree index from the old files first, so the links they store are recorded
+        # there and still checked against the parent hashes by validation. A later
+        # rebuild from the binary files can only derive them from the parent hashes
+        if layout == "tree":
+            with open_tree_index(folder):
+                pass
+
+        before = folder_size(folder)
+        old_files = [file for file in block_files(folder) if not file.endswith(extension)]
+        converted = []
+        for file in old_files:
+            name = os.path.splitext(os.path.basename(file))[0] + extension
+            if not os.path.exists(os.path.join(folder, name)):
+                # Write under a name block_files doesn't match, then move it in place
+                temp_file = os.path.join(folder, "tmp_" + name)
+                dump_block_file(temp_file, load_block_file(file, bodies=False))
+                os.replace(temp_file, os.path.join(folder, name))
+            converted.append((file, name))
+        write_storage_format(folder, storage)
+
+        # The linear block index derives file names from the folder's format
+        if layout == "tree":
+            with open_tree_index(folder) as index:
+                for _, name in converted:
+                    index.set_file(load_block_file(os.path.join(folder, name), bodies=False)["hash"], name)
+        for file, _ in converted:
+            os.remove(file)
+        with SecondaryIndex(folder) as lookup:
+            lookup.rebuild()
+
+    print(f"Converted {len(converted)} block files of {folder} to {storage}")
+    if converted:
+        print(f"Block files: {before} bytes -> {folder_size(folder)} bytes")
+    return len(converted)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite the block files of a DLT folder in the JSON or binary format")
+    parser.add_argument("storage", choices=sorted(FORMAT_EXTENSIONS))
+    parser.add_argument("--layout", choices=sorted(LAYOUT_FOLDERS), default="linear")
+    parser.add_argument("--folder", default=None, help="DLT folder (dlt or dlt_tree by default)")
+    args = parser.parse_args()
+
+    convert_folder(args.folder or LAYOUT_FOLDERS[args.layout], args.layout, args.storage)
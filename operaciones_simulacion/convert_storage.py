@@ -0,0 +1,66 @@
+import sys
+import os
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.binary_codec import block_file_name, dump_block_file, storage_format
+from src.block_index import open_block_index, iter_blocks
+from src.secondary_index import open_secondary_index
+from src.segment_store import SegmentStore, DEFAULT_SEGMENT_SIZE
+
+def import_folder(folder="dlt", store_folder="dlt_segments", segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Copy the block files of a linear DLT folder into a segment store.
+    
+    Returns:
+        int: Number of blocks imported
+    """
+    imported = 0
+    with SegmentStore(store_folder, segment_size=segment_size) as store:
+        # Blocks already in the store are skipped so an import can be resumed
+        for block_data in iter_blocks(folder, start=len(store)):
+            store.append(block_data)
+            imported += 1
+        store.flush(fsync=True)
+    
+    print(f"Imported {imported} blocks from {folder} into {store_folder}")
+    return imported
+
+def export_store(store_folder="dlt_segments", folder="dlt"):
+    """
+    Write every block of a segment store back as one JSON file per block.
+    
+    Returns:
+        int: Number of blocks exported
+    """
+    os.makedirs(folder, exist_ok=True)
+    
+    exported = 0
+    storage = storage_format(folder)
+    with SegmentStore(store_folder) as store, open_block_index(folder) as index, \
+            open_secondary_index(folder) as lookup:
+        for block_data in store:
+            filename = f"{folder}/{block_file_name(block_data['index'], block_data['hash'], storage)}"
+            if os.path.exists(filename):
+                continue
+            dump_block_file(filename, block_data)
+            index.add(block_data["index"], block_data["hash"])
+            lookup.add_block(block_data, os.path.basename(filename))
+            exported += 1
+    
+    print(f"Exported {exported} blocks from {store_folder} into {folder}")
+    return exported
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between DLT block folders and segment stores")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("--folder", default="dlt", help="Folder with one JSON file per block")
+    parser.add_argument("--store", default="dlt_segments", help="Segment store folder")
+    parser.add_argument("--segment-size", type=int, default=DEFAULT_SEGMENT_SIZE)
+    args = parser.parse_args()
+    
+    if args.command == "import":
+        import_folder(args.folder, args.store, args.segment_size)
+    else:
+        export_store(args.store, args.folder)
@@ -0,0 +1,40 @@
+import sys
+import os
+import json
+import time
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.header_store import HeaderStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the linkage of a linear DLT and print chain statistics")
+    parser.add_argument("--folder", default="dlt", help="Folder with the block files")
+    parser.add_argument("--headers", default=None, help="Read/write the columnar headers from/to this .npy file")
+    args = parser.parse_args()
+    
+    try:
+        if args.headers and os.path.exists(args.headers):
+            store = HeaderStore.load(args.headers)
+        else:
+            store = HeaderStore.from_folder(args.folder)
+            if args.headers:
+                store.save(args.headers)
+    except (ImportError, ValueError, KeyError, json.JSONDecodeError) as e:
+        print(f"Error: Could not load the block headers: {e}")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    is_valid, bad_index = store.verify_linkage()
+    elapsed = time.perf_counter() - start
+    
+    print(f"Blocks: {len(store)}")
+    if is_valid:
+        print(f"Linkage is valid (checked in {elapsed:.4f} seconds)")
+    else:
+        print(f"Linkage is broken at block {bad_index} (checked in {elapsed:.4f} seconds)")
+        for previous_index, next_index in store.gaps():
+            print(f"  Gap between block {previous_index} and block {next_index}")
+    print(json.dumps(store.statistics(), indent=4))
+    sys.exit(0 if is_valid else 1)
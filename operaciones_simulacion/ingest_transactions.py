@@ -0,0 +1,84 @@
+import sys
+import os
+import json
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.mempool import Mempool
+from src.proof_of_work import RetargetPolicy
+from src.utils import metrics
+from write_coordinator import LAYOUTS, WriteCoordinator
+
+def read_transactions(file, parse_json=False):
+    """Yield one transaction per non-empty line of a file object"""
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        yield json.loads(line) if parse_json else line
+
+def ingest(transactions, layout="linear", folder=None, max_count=100, max_bytes=None, max_wait=None,
+           workers=1, difficulty_bits=None, retarget_policy=None, group_size=1):
+    """
+    Pack a stream of transactions into blocks and add them to a DLT.
+    
+    Each batch from the mempool becomes one block: it is mined once and written
+    once, whatever the number of transactions in it. Blocks are committed in
+    groups of group_size under the folder's write lock, with one fsync per group,
+    so several ingest processes can safely write to the same folder.
+    
+    Returns:
+        list: The blocks that were added
+    """
+    coordinator = WriteCoordinator(layout, folder, group_size, workers, difficulty_bits, retarget_policy)
+    mempool = Mempool(max_count=max_count, max_bytes=max_bytes, max_wait=max_wait)
+    
+    blocks = []
+    batches = mempool.batches(transactions)
+    for batch in batches:
+        print(f"\n=== PACKING {len(batch)} TRANSACTIONS INTO ONE BLOCK ===")
+        if not coordinator.submit(batch):
+            continue
+        committed = coordinator.commit()
+        blocks.extend(block for block in committed if block is not None)
+        if None in committed:
+            break
+    else:
+        committed = coordinator.commit()
+        blocks.extend(block for block in committed if block is not None)
+    if None in committed:
+        print("Error: Ingestion stopped because the block could not be added")
+    
+    print(f"\nIngested {sum(len(block.transactions) for block in blocks)} transactions in {len(blocks)} blocks")
+    return blocks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a stream of transactions to a DLT in batches")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="linear")
+    parser.add_argument("--folder", default=None, help="DLT folder (dlt or dlt_tree by default)")
+    parser.add_argument("--file", default=None, help="Read transactions from this file instead of stdin")
+    parser.add_argument("--json", action="store_true", help="Parse each line as a JSON transaction")
+    parser.add_argument("--max-count", type=int, default=100, help="Transactions per block")
+    parser.add_argument("--max-bytes", type=int, default=None, help="Maximum JSON size of a block's transactions")
+    parser.add_argument("--max-wait", type=float, default=None, help="Seconds before a partial block is flushed")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to mine each block (tree: sibling blocks at once)")
+    parser.add_argument("--difficulty-bits", type=int, default=None,
+                        help="Leading zero bits required in block hashes (replaces the stored target)")
+    parser.add_argument("--target-block-time", type=float, default=None,
+                        help="Retarget the difficulty to hold this many seconds per block")
+    parser.add_argument("--retarget-interval", type=int, default=10, help="Blocks between retargets")
+    parser.add_argument("--group-size", type=int, default=1, help="Blocks committed with one fsync")
+    args = parser.parse_args()
+    metrics.enable_from_environment()
+    
+    source = open(args.file, 'r') if args.file else sys.stdin
+    try:
+        retarget_policy = RetargetPolicy(args.target_block_time, args.retarget_interval) if args.target_block_time else None
+        ingest(read_transactions(source, args.json), args.layout, args.folder, args.max_count,
+               args.max_bytes, args.max_wait, args.workers, args.difficulty_bits, retarget_policy, args.group_size)
+    finally:
+        if args.file:
+            source.close()
@@ -0,0 +1,98 @@
+import sys
+import os
+import json
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.block_index import iter_blocks
+from src.light_client import LightClient, export_headers, folder_source
+from src.merkle_tree import MerkleTree
+from src.proof_of_work import ProofOfWork
+from src.secondary_index import block_transactions, open_secondary_index
+from src.tree_index import iter_tree_blocks
+
+LAYOUT_FOLDERS = {
+    "linear": "dlt",
+    "tree": "dlt_tree",
+}
+
+def export_folder(folder="dlt", layout="linear", output="headers.bin"):
+    """
+    Write the headers of a full node's DLT folder as a headers-only stream.
+
+    Returns:
+        int: Number of headers exported
+    """
+    blocks = iter_blocks(folder) if layout == "linear" else iter_tree_blocks(folder)
+    with open(output, 'wb') as file:
+        count = export_headers(blocks, file)
+    print(f"Exported {count} headers from {folder} to {output} ({os.path.getsize(output)} bytes)")
+    return count
+
+def sync_headers(client, headers):
+    """Import a headers-only stream into a light client"""
+    with open(headers, 'rb') as file:
+        is_valid, invalid_block = client.import_headers(file)
+    tip = client.tip()
+    if tip:
+        print(f"Light client at block {tip['index']} [{tip['hash'][:8]}...]")
+    return is_valid, invalid_block
+
+def transaction_proof(folder, block_index, transaction):
+    """
+    Merkle proof of a transaction in a block, computed by the full node holding the body.
+
+    Returns:
+        list: The proof, or None if the block doesn't hold the transaction
+    """
+    with open_secondary_index(folder) as lookup:
+        for location_index, position in lookup.find_transaction(transaction):
+            if location_index == block_index:
+                block_data = lookup.block_by_index(block_index)
+                return MerkleTree(block_transactions(block_data)).get_proof(position)
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync and query a headers-only light client")
+    parser.add_argument("command", choices=["export", "sync", "verify", "block", "tx"])
+    parser.add_argument("value", nargs="*", help="block: INDEX, tx: INDEX TRANSACTION")
+    parser.add_argument("--layout", choices=sorted(LAYOUT_FOLDERS), default="linear")
+    parser.add_argument("--folder", default=None, help="Full node DLT folder (dlt or dlt_tree by default)")
+    parser.add_argument("--headers", default="headers.bin", help="Headers-only stream file")
+    parser.add_argument("--client", default="dlt_light", help="Light client folder")
+    parser.add_argument("--difficulty-bits", type=int, default=None,
+                        help="Fewest leading zero bits the client accepts in block hashes")
+    parser.add_argument("--json", action="store_true", help="Parse the transaction as JSON")
+    args = parser.parse_args()
+    folder = args.folder or LAYOUT_FOLDERS[args.layout]
+
+    if args.command == "export":
+        export_folder(folder, args.layout, args.headers)
+        sys.exit(0)
+
+    proof_of_work = ProofOfWork(bits=args.difficulty_bits) if args.difficulty_bits is not None else None
+    with LightClient(args.client, proof_of_work, args.layout, folder_source(folder)) as client:
+        if args.command == "sync":
+            is_valid, _ = sync_headers(client, args.headers)
+        elif args.command == "verify":
+            is_valid, _ = client.verify()
+            print(f"{len(client)} headers {'verified' if is_valid else 'rejected'}")
+        elif args.command == "block":
+            if len(args.value) != 1:
+                parser.error("block needs a block index")
+            try:
+                print(json.dumps(client.get_block(int(args.value[0])), indent=4))
+                is_valid = True
+            except (IndexError, LookupError, ValueError) as e:
+                print(f"Error: {e}")
+                is_valid = False
+        else:
+            if len(args.value) != 2:
+                parser.error("tx needs a block index and a transaction")
+            block_index = int(args.value[0])
+            transaction = json.loads(args.value[1]) if args.json else args.value[1]
+            proof = transaction_proof(folder, block_index, transaction)
+            is_valid = proof is not None and client.verify_transaction(block_index, transaction, proof)
+            print(f"Transaction {'is' if is_valid else 'is not'} in block {block_index}")
+    sys.exit(0 if is_valid else 1)
@@ -0,0 +1,78 @@
+import sys
+import os
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.archive import ARCHIVE_FIELD, COMPRESSORS, FRAME_BLOCKS, archive_files, write_archive
+from src.binary_codec import block_files, dump_block_file, load_block_file
+from src.file_lock import folder_lock
+from src.journal import Journal
+
+def disk_usage(folder):
+    """Total size in bytes of the block files and archives of a folder"""
+    return sum(os.path.getsize(file) for file in block_files(folder) + archive_files(folder))
+
+def prune_folder(folder="dlt", below=None, keep=None, compression="zlib", frame_blocks=FRAME_BLOCKS):
+    """
+    Move the data of old blocks into a compressed archive, keeping their headers in place.
+
+    Blocks with an index below `below` (or all but the newest `keep` blocks) that
+    still hold their data are archived. Their block files keep every header field,
+    hash and Merkle root, with "data" set to None and the name of the archive, so
+    headers stay as cheap to read as before. load_block_file reads the data back
+    from the archive, so validation, lookups and the explorer see the original
+    blocks. Works on both layouts: block file names and indexes don't change.
+
+    The archive is written and synced before any block file is rewritten, so an
+    interrupted run leaves every block readable and can be run again.
+
+    Returns:
+        int: Number of blocks pruned
+    """
+    if (below is None) == (keep is None):
+        raise ValueError("Give either below or keep")
+
+    with folder_lock(folder):
+        # Journal records hold the full blocks, sync them and start afresh
+        with Journal(folder) as journal:
+            journal.checkpoint()
+
+        headers = []
+        for file in block_files(folder):
+            block_data = load_block_file(file, bodies=False)
+            headers.append((block_data["index"], file, block_data))
+        if below is None:
+            below = max((block_index for block_index, _, _ in headers), default=-1) + 1 - keep
+        pruned = sorted((entry for entry in headers if entry[0] < below and ARCHIVE_FIELD not in entry[2]),
+                        key=lambda entry: entry[0])
+        if not pruned:
+            print(f"No blocks of {folder} to prune below block {below}")
+            return 0
+
+        before = disk_usage(folder)
+        name = write_archive(folder, [(block_index, block_data["data"]) for block_index, _, block_data in pruned],
+                             compression, frame_blocks)
+        for _, file, block_data in pruned:
+            block_data["data"] = None
+            block_data[ARCHIVE_FIELD] = name
+            # Write under a name block_files doesn't match, then move it in place
+            temp_file = os.path.join(folder, "tmp_" + os.path.basename(file))
+            dump_block_file(temp_file, block_data)
+            os.replace(temp_file, file)
+
+    print(f"Pruned {len(pruned)} blocks of {folder} into {name}")
+    print(f"Block files and archives: {before} bytes -> {disk_usage(folder)} bytes")
+    return len(pruned)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move the data of old blocks into compressed archives")
+    parser.add_argument("--folder", default="dlt", help="DLT folder (either layout)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--below", type=int, help="Prune the blocks with a lower index")
+    group.add_argument("--keep", type=int, help="Prune all but this many of the newest blocks")
+    parser.add_argument("--compression", choices=sorted(COMPRESSORS), default="zlib")
+    parser.add_argument("--frame-blocks", type=int, default=FRAME_BLOCKS, help="Blocks compressed together")
+    args = parser.parse_args()
+
+    prune_folder(args.folder, args.below, args.keep, args.compression, args.frame_blocks)
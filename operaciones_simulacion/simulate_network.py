@@ -0,0 +1,43 @@
+import sys
+import os
+import json
+import argparse
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network_simulator import simulate
+
+def print_results(results):
+    """Print the metrics of each simulation as a table"""
+    print("\n=== NETWORK SIMULATION RESULTS ===")
+    print(f"{'nodes':>5} {'diff':>4} {'mined':>6} {'chain':>6} {'orphan %':>9} {'blocks/s':>9} {'prop ms':>8} {'p90 ms':>7}")
+    for result in results:
+        propagation = result["propagation_mean"]
+        p90 = result["propagation_p90"]
+        print(f"{result['nodes']:>5} {result['difficulty']:>4} {result['blocks_mined']:>6} "
+              f"{result['main_chain_length']:>6} {100 * result['orphan_rate']:>8.1f}% "
+              f"{result['throughput_blocks_per_sec']:>9.2f} "
+              f"{1000 * propagation if propagation is not None else float('nan'):>8.1f} "
+              f"{1000 * p90 if p90 is not None else float('nan'):>7.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate block gossip between DLT nodes")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--difficulty", type=int, nargs="+", default=[3])
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of mining per simulation")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base link latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Maximum extra random latency in seconds")
+    parser.add_argument("--bandwidth", type=float, default=1_000_000, help="Link bandwidth in bytes per second")
+    parser.add_argument("--peers", type=int, default=None, help="Peers per node (all nodes by default)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    
+    results = simulate(args.nodes, args.difficulty, args.duration, latency=args.latency, jitter=args.jitter,
+                       bandwidth=args.bandwidth, peers=args.peers, seed=args.seed)
+    print_results(results)
+    
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f"\nResults saved to {args.output}")
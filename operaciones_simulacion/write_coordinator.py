@@ -0,0 +1,220 @@
+import sys
+import os
+import json
+import queue
+import argparse
+import threading
+from multiprocessing.connection import Listener, Client
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.file_lock import folder_lock
+from src.journal import Journal
+from src.proof_of_work import RetargetPolicy
+from src.utils import metrics
+import add_transaction
+import add_transaction_tree
+
+LAYOUTS = {
+    "linear": (add_transaction, "dlt"),
+    "tree": (add_transaction_tree, "dlt_tree"),
+}
+
+DEFAULT_GROUP_SIZE = 32
+DEFAULT_ADDRESS = ("localhost", 6100)
+AUTHKEY_ENV = "DLT_DAEMON_KEY"
+
+def parse_address(address):
+    """A "host:port" string becomes a TCP address, anything else is a socket path"""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+def daemon_authkey(authkey=None):
+    return (authkey or os.environ.get(AUTHKEY_ENV, "dlt")).encode()
+
+class WriteCoordinator:
+    """
+    Single writer for a DLT folder that commits queued blocks in groups.
+
+    Transactions are queued with submit(). commit() takes the folder's write lock
+    once, assigns indices and mines the queued blocks one after the other (the
+    tree layout mines sibling blocks in parallel rounds, see add_transaction_batch),
+    and makes the whole group durable with a single journal fsync (one per round
+    for the tree). Other processes
+    adding blocks to the same folder wait on the same lock, so indices are never
+    assigned twice.
+    """
+
+    def __init__(self, layout="linear", folder=None, group_size=DEFAULT_GROUP_SIZE, workers=1,
+                 difficulty_bits=None, retarget_policy=None):
+        self.layout = layout
+        self.module, default_folder = LAYOUTS[layout]
+        self.folder = folder or default_folder
+        self.group_size = group_size
+        self.workers = workers
+        self.difficulty_bits = difficulty_bits
+        self.retarget_policy = retarget_policy
+        self.queue = []
+
+    def submit(self, transaction_data):
+        """Queue a transaction (or a batch of them) to become one block, returning True when a group is full"""
+        self.queue.append(transaction_data)
+        return len(self.queue) >= self.group_size
+
+    def commit(self):
+        """
+        Add every queued transaction as a block and commit them as one group.
+
+        Returns:
+            list: One block per queued transaction, None for a transaction that
+            could not be added (the blocks after it are not attempted)
+        """
+        group, self.queue = self.queue, []
+        blocks = []
+        if not group:
+            return blocks
+        with folder_lock(self.folder), Journal(self.folder) as journal:
+            if self.layout == "tree":
+                # Sibling blocks don't depend on each other, so the group is mined in parallel rounds
+                blocks = self.module.add_transaction_batch(group, workers=self.workers, folder=self.folder,
+                                                           difficulty_bits=self.difficulty_bits,
+                                                           retarget_policy=self.retarget_policy, journal=journal)
+                if blocks:
+                    self.difficulty_bits = None
+            else:
+                for transaction_data in group:
+                    block = self.module.add_single_transaction(transaction_data, workers=self.workers,
+                                                               folder=self.folder,
+                                                               difficulty_bits=self.difficulty_bits,
+                                                               retarget_policy=self.retarget_policy, journal=journal)
+                    blocks.append(block)
+                    if block is None:
+                        break
+                    # An explicit difficulty is stored by the first block, later blocks may retarget it
+                    self.difficulty_bits = None
+            journal.commit()
+        metrics.get_registry().counter("group_commits_total", "Groups of blocks committed with one fsync").inc()
+        return blocks + [None] * (len(group) - len(blocks))
+
+class AppendDaemon:
+    """
+    Local append service in front of a WriteCoordinator.
+
+    Clients send transactions over a multiprocessing connection (TCP on localhost
+    or a Unix socket, authenticated with a shared key). The daemon queues them,
+    and commits a group once group_size transactions are waiting or max_wait
+    seconds passed since the first one. Each client gets its block's index and
+    hash only after the group holding it is durable.
+    """
+
+    def __init__(self, coordinator, address=DEFAULT_ADDRESS, authkey=None, max_wait=0.05):
+        self.coordinator = coordinator
+        self.address = address
+        self.authkey = daemon_authkey(authkey)
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.listener = None
+
+    def serve_forever(self):
+        self.listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._commit_loop, daemon=True).start()
+        print(f"Append daemon for {self.coordinator.folder} listening on {self.listener.address}")
+        try:
+            while True:
+                connection = self.listener.accept()
+                threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+        except OSError:
+            # The listener was closed by shutdown()
+            pass
+
+    def shutdown(self):
+        if self.listener is not None:
+            self.listener.close()
+
+    def _serve_client(self, connection):
+        with connection:
+            while True:
+                try:
+                    transaction_data = connection.recv()
+                except EOFError:
+                    return
+                reply = queue.Queue(maxsize=1)
+                self.requests.put((transaction_data, reply))
+                connection.send(reply.get())
+
+    def _next_group(self):
+        group = [self.requests.get()]
+        while len(group) < self.coordinator.group_size:
+            try:
+                group.append(self.requests.get(timeout=self.max_wait))
+            except queue.Empty:
+                break
+        return group
+
+    def _commit_loop(self):
+        while True:
+            group = self._next_group()
+            for transaction_data, _ in group:
+                self.coordinator.submit(transaction_data)
+            try:
+                blocks = self.coordinator.commit()
+            except Exception as e:
+                blocks = [e] * len(group)
+            for (_, reply), block in zip(group, blocks):
+                if isinstance(block, Exception):
+                    reply.put({"error": str(block)})
+                elif block is None:
+                    reply.put({"error": "The block could not be added"})
+                else:
+                    reply.put({"index": block.index, "hash": block.hash})
+
+def submit_transaction(transaction_data, address=DEFAULT_ADDRESS, authkey=None):
+    """
+    Send a transaction to an append daemon and wait until its block is committed.
+
+    Returns:
+        dict: {"index", "hash"} of the new block, or {"error"}
+    """
+    with Client(address, authkey=daemon_authkey(authkey)) as connection:
+        connection.send(transaction_data)
+        return connection.recv()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serialize writes to a DLT folder through a local append daemon")
+    parser.add_argument("command", choices=["serve", "submit"])
+    parser.add_argument("transaction", nargs="?", help="Transaction to submit")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="linear")
+    parser.add_argument("--folder", default=None, help="DLT folder (dlt or dlt_tree by default)")
+    parser.add_argument("--address", default="%s:%d" % DEFAULT_ADDRESS,
+                        help="host:port, or a Unix socket path, of the daemon")
+    parser.add_argument("--group-size", type=int, default=DEFAULT_GROUP_SIZE, help="Blocks committed per fsync")
+    parser.add_argument("--max-wait", type=float, default=0.05, help="Seconds to wait for a group to fill")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to mine each block (tree: sibling blocks at once)")
+    parser.add_argument("--json", action="store_true", help="Parse the transaction as JSON")
+    parser.add_argument("--difficulty-bits", type=int, default=None,
+                        help="Leading zero bits required in block hashes (replaces the stored target)")
+    parser.add_argument("--target-block-time", type=float, default=None,
+                        help="Retarget the difficulty to hold this many seconds per block")
+    parser.add_argument("--retarget-interval", type=int, default=10, help="Blocks between retargets")
+    args = parser.parse_args()
+    metrics.enable_from_environment()
+    address = parse_address(args.address)
+
+    if args.command == "serve":
+        retarget_policy = RetargetPolicy(args.target_block_time, args.retarget_interval) if args.target_block_time else None
+        coordinator = WriteCoordinator(args.layout, args.folder, args.group_size, args.workers,
+                                       args.difficulty_bits, retarget_policy)
+        AppendDaemon(coordinator, address, max_wait=args.max_wait).serve_forever()
+    else:
+        if args.transaction is None:
+            parser.error("submit needs a transaction")
+        transaction_data = json.loads(args.transaction) if args.json else args.transaction
+        result = submit_transaction(transaction_data, address)
+        if "error" in result:
+            print(f"Error: {result['error']}")
+        else:
+            print(f"Block {result['index']} committed [{result['hash'][:8]}...]")
@@ -0,0 +1,113 @@
+import bisect
+import copy
+import functools
+import json
+import lzma
+import os
+import struct
+import zlib
+
+ARCHIVE_FOLDER = "archive"
+# Field of a pruned block file naming the archive that holds its data
+ARCHIVE_FIELD = "archive"
+# Bodies compressed together; larger frames compress better, smaller ones decompress less per read
+FRAME_BLOCKS = 64
+COMPRESSORS = {
+    "zlib": (".zlib", lambda data: zlib.compress(data, 9), zlib.decompress),
+    "lzma": (".xz", lzma.compress, lzma.decompress),
+}
+INDEX_EXTENSION = ".idx"
+# block index, frame offset, frame length, position of the body in the frame
+INDEX_ENTRY = struct.Struct("<QQII")
+
+def archive_name(first_index, last_index, compression="zlib"):
+    return f"bodies_{first_index}_{last_index}{COMPRESSORS[compression][0]}"
+
+def _compression(name):
+    for compression, (extension, _, _) in COMPRESSORS.items():
+        if name.endswith(extension):
+            return compression
+    raise ValueError(f"Unknown archive compression: {name}")
+
+def write_archive(folder, bodies, compression="zlib", frame_blocks=FRAME_BLOCKS):
+    """
+    Compress block bodies into a new archive of a DLT folder.
+
+    Bodies are (block index, data) pairs in index order. They are stored as
+    compact JSON lists of frame_blocks bodies, each frame compressed on its own,
+    and a fixed-width index next to the archive maps every block index to its
+    frame, so one body is read by decompressing a single frame. Both files are
+    written under temporary names, fsynced and then moved in place.
+
+    Returns:
+        str: The archive file name
+    """
+    if compression not in COMPRESSORS:
+        raise ValueError(f"Unknown archive compression: {compression}")
+    compress = COMPRESSORS[compression][1]
+    name = archive_name(bodies[0][0], bodies[-1][0], compression)
+    path = os.path.join(folder, ARCHIVE_FOLDER, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    entries = []
+    with open(path + ".tmp", 'wb') as file:
+        for start in range(0, len(bodies), frame_blocks):
+            frame = bodies[start:start + frame_blocks]
+            record = compress(json.dumps([data for _, data in frame], separators=(",", ":")).encode())
+            offset = file.tell()
+            file.write(record)
+            entries.extend(INDEX_ENTRY.pack(block_index, offset, len(record), position)
+                           for position, (block_index, _) in enumerate(frame))
+        file.flush()
+        os.fsync(file.fileno())
+    with open(path + INDEX_EXTENSION + ".tmp", 'wb') as file:
+        file.write(b"".join(entries))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + ".tmp", path)
+    os.replace(path + INDEX_EXTENSION + ".tmp", path + INDEX_EXTENSION)
+    return name
+
+@functools.lru_cache(maxsize=64)
+def _archive_index(path, mtime):
+    """Block indices and index entries of an archive, cached until the archive is replaced"""
+    with open(path + INDEX_EXTENSION, 'rb') as file:
+        entries = list(INDEX_ENTRY.iter_unpack(file.read()))
+    return [entry[0] for entry in entries], entries
+
+@functools.lru_cache(maxsize=4)
+def _read_frame(path, mtime, offset, length):
+    """Decompress one frame; the last frames read are kept for sequential reads"""
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        record = file.read(length)
+    return json.loads(COMPRESSORS[_compression(path)][2](record))
+
+def read_body(folder, name, block_index):
+    """Return the data of a block from an archive; raises ValueError if it can't be read"""
+    path = os.path.join(folder, ARCHIVE_FOLDER, name)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        indices, entries = _archive_index(path, mtime)
+        position = bisect.bisect_left(indices, block_index)
+        if position == len(indices) or indices[position] != block_index:
+            raise ValueError(f"block {block_index} is not in the archive")
+        _, offset, length, item = entries[position]
+        # Copy, the frame is shared with later reads
+        return copy.deepcopy(_read_frame(path, mtime, offset, length)[item])
+    except (OSError, struct.error, zlib.error, lzma.LZMAError, IndexError, ValueError) as e:
+        raise ValueError(f"Invalid archive {name}: {e}") from e
+
+def restore_body(folder, block_data):
+    """Fill in the data of a pruned block from its archive, giving back the block as it was written"""
+    name = block_data.pop(ARCHIVE_FIELD)
+    block_data["data"] = read_body(folder, name, block_data["index"])
+    return block_data
+
+def archive_files(folder):
+    """Paths of the archives of a folder"""
+    archive_folder = os.path.join(folder, ARCHIVE_FOLDER)
+    if not os.path.isdir(archive_folder):
+        return []
+    return [os.path.join(archive_folder, name) for name in sorted(os.listdir(archive_folder))
+            if any(name.endswith(extension) for extension, _, _ in COMPRESSORS.values())]
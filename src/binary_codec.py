@@ -0,0 +1,222 @@
+import glob
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from .archive import ARCHIVE_FIELD, restore_body
+
+# Version 1 blocks are hashed over their JSON serialization (sort_keys=True);
+# version 2 blocks over the fixed-width binary header below.
+BLOCK_VERSION_JSON = 1
+BLOCK_VERSION_BINARY = 2
+BLOCK_VERSIONS = (BLOCK_VERSION_JSON, BLOCK_VERSION_BINARY)
+# Version given to newly created blocks
+CURRENT_BLOCK_VERSION = BLOCK_VERSION_BINARY
+
+# version, index, timestamp (microseconds since the epoch), previous_hash, merkle_root, nonce.
+# The nonce comes last so everything before it can be hashed once while mining.
+HEADER = struct.Struct("<BQq32s32sQ")
+HASH_BYTES = 32
+MAGIC = b"DLTB"
+
+# Flags of a binary block record
+FLAG_TREE = 1            # Has parent_hash/left_child/right_child fields (tree DLT)
+FLAG_PARENT = 2          # parent_hash is set and follows the block hash
+FLAG_RAW_TIMESTAMP = 4   # The timestamp string isn't canonical and is kept in the body
+FLAG_RAW_PREVIOUS = 8    # previous_hash isn't 64 hex digits (genesis) and is kept in the body
+FLAG_ARCHIVED = 16       # The data was moved to the archive named in the body (see src/archive.py)
+RECORD = struct.Struct("<4s89s32sB")
+LENGTH = struct.Struct("<I")
+SHORT_LENGTH = struct.Struct("<H")
+
+# Storage format of the block files of a folder, recorded in STORAGE_FILE
+STORAGE_FILE = "storage.json"
+FORMAT_EXTENSIONS = {"json": ".json", "binary": ".blk"}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _parse_utc(timestamp):
+    """Naive UTC datetime of an ISO 8601 timestamp (naive ones are UTC, as in parse_timestamp)"""
+    try:
+        moment = datetime.fromisoformat(timestamp[:-1] if timestamp.endswith('Z') else timestamp)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"Invalid timestamp for a binary block header: {timestamp}") from None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def timestamp_micros(timestamp):
+    """Microseconds since the epoch of an ISO 8601 timestamp, as stored in a binary header"""
+    return (_parse_utc(timestamp) - _EPOCH) // _MICROSECOND
+
+def format_timestamp(micros):
+    """The timestamp string get_current_timestamp would give for this instant"""
+    return (_EPOCH + timedelta(0, 0, micros)).isoformat() + 'Z'
+
+def _hash_bytes(block_hash):
+    # The genesis previous_hash has 63 zeros, pad it to a full 32 bytes
+    return bytes.fromhex(block_hash.zfill(2 * HASH_BYTES))
+
+def _pack_header(block_data, micros):
+    return HEADER.pack(block_data.get("version", BLOCK_VERSION_JSON), block_data["index"], micros,
+                       _hash_bytes(block_data["previous_hash"]), _hash_bytes(block_data["merkle_root"]),
+                       block_data["nonce"])
+
+def encode_header(block_data):
+    """The binary header of a block, the input of its version 2 hash"""
+    return _pack_header(block_data, timestamp_micros(block_data["timestamp"]))
+
+class BinaryHeaderHasher:
+    """
+    Hash a version 2 block header for many nonces.
+
+    Same interface as block.HeaderHasher: the fixed-width header without the
+    nonce is fed into SHA-256 once and only the 8 nonce bytes are hashed per attempt.
+    """
+
+    def __init__(self, block):
+        header = encode_header({
+            "version": block.version,
+            "index": block.index,
+            "timestamp": block.timestamp,
+            "previous_hash": block.previous_hash,
+            "merkle_root": block.merkle_root,
+            "nonce": 0
+        })
+        self.midstate = hashlib.sha256(header[:-8])
+
+    def hash(self, nonce):
+        sha = self.midstate.copy()
+        sha.update(nonce.to_bytes(8, "little"))
+        return sha.hexdigest()
+
+def encode_block(block_data):
+    """
+    Encode stored block data (linear or tree) as a binary record.
+
+    The record is the magic bytes, the binary header, the raw block hash, a flags
+    byte, the optional fields the flags announce, and the data as length-prefixed
+    compact JSON. decode_block gives back the same dict, so blocks of both
+    versions still verify after a round trip.
+    """
+    flags = 0
+    extra = b""
+    if "parent_hash" in block_data:
+        flags |= FLAG_TREE
+        if block_data["parent_hash"]:
+            flags |= FLAG_PARENT
+            extra += _hash_bytes(block_data["parent_hash"])
+    moment = _parse_utc(block_data["timestamp"])
+    if moment.isoformat() + 'Z' != block_data["timestamp"]:
+        flags |= FLAG_RAW_TIMESTAMP
+        raw = block_data["timestamp"].encode()
+        extra += SHORT_LENGTH.pack(len(raw)) + raw
+    if len(block_data["previous_hash"]) != 2 * HASH_BYTES:
+        flags |= FLAG_RAW_PREVIOUS
+        raw = block_data["previous_hash"].encode()
+        extra += SHORT_LENGTH.pack(len(raw)) + raw
+    if block_data.get(ARCHIVE_FIELD):
+        flags |= FLAG_ARCHIVED
+        raw = block_data[ARCHIVE_FIELD].encode()
+        extra += SHORT_LENGTH.pack(len(raw)) + raw
+
+    data = json.dumps(block_data["data"], separators=(",", ":")).encode()
+    header = _pack_header(block_data, (moment - _EPOCH) // _MICROSECOND)
+    return (RECORD.pack(MAGIC, header, bytes.fromhex(block_data["hash"]), flags)
+            + extra + LENGTH.pack(len(data)) + data)
+
+def decode_block(record):
+    """Decode a binary block record into the dict the JSON block files hold"""
+    try:
+        magic, header, block_hash, flags = RECORD.unpack_from(record)
+        if magic != MAGIC:
+            raise ValueError("not a binary block record")
+        version, index, micros, previous_hash, merkle_root, nonce = HEADER.unpack(header)
+        block_data = {
+            "index": index,
+            "hash": block_hash.hex(),
+            "previous_hash": previous_hash.hex(),
+            "timestamp": format_timestamp(micros),
+            "data": None,
+            "nonce": nonce,
+            "merkle_root": merkle_root.hex(),
+            "version": version
+        }
+
+        offset = RECORD.size
+        if flags & FLAG_TREE:
+            block_data["parent_hash"] = None
+            if flags & FLAG_PARENT:
+                block_data["parent_hash"] = record[offset:offset + HASH_BYTES].hex()
+                offset += HASH_BYTES
+            # Child links live in the tree index, which rebuilds them from parent_hash
+            block_data["left_child"] = block_data["right_child"] = None
+        for flag, field in ((FLAG_RAW_TIMESTAMP, "timestamp"), (FLAG_RAW_PREVIOUS, "previous_hash"),
+                            (FLAG_ARCHIVED, ARCHIVE_FIELD)):
+            if flags & flag:
+                (length,) = SHORT_LENGTH.unpack_from(record, offset)
+                offset += SHORT_LENGTH.size
+                block_data[field] = record[offset:offset + length].decode()
+                offset += length
+
+        (length,) = LENGTH.unpack_from(record, offset)
+        offset += LENGTH.size
+        if offset + length != len(record):
+            raise ValueError("truncated data")
+        block_data["data"] = json.loads(record[offset:])
+    except (struct.error, ValueError) as e:
+        # UnicodeDecodeError and JSONDecodeError are ValueErrors too
+        raise ValueError(f"Invalid binary block record: {e}") from e
+    return block_data
+
+def storage_format(folder):
+    """Format of the block files of a folder: "json" (the default) or "binary" """
+    try:
+        with open(os.path.join(folder, STORAGE_FILE), 'r') as file:
+            return json.load(file)["format"]
+    except (OSError, ValueError, KeyError):
+        return "json"
+
+def write_storage_format(folder, storage):
+    if storage not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown storage format: {storage}")
+    temp_file = os.path.join(folder, STORAGE_FILE + ".tmp")
+    with open(temp_file, 'w') as file:
+        json.dump({"format": storage}, file)
+    os.replace(temp_file, os.path.join(folder, STORAGE_FILE))
+
+def block_file_name(block_index, block_hash, storage="json"):
+    return f"block_{block_index}_{block_hash[:8]}{FORMAT_EXTENSIONS[storage]}"
+
+def block_files(folder):
+    """Paths of the block files of a folder, in either format"""
+    return [file for extension in FORMAT_EXTENSIONS.values()
+            for file in glob.glob(os.path.join(folder, "block_*" + extension))]
+
+def load_block_file(path, bodies=True):
+    """
+    Read a block file of either format; raises ValueError if it can't be parsed.
+
+    The data of a pruned block is read back from its archive, unless bodies is
+    False: the block then keeps its header fields, "data" None and the archive name.
+    """
+    if path.endswith(FORMAT_EXTENSIONS["binary"]):
+        with open(path, 'rb') as file:
+            block_data = decode_block(file.read())
+    else:
+        with open(path, 'r') as file:
+            block_data = json.load(file)
+    if bodies and ARCHIVE_FIELD in block_data:
+        return restore_body(os.path.dirname(path), block_data)
+    return block_data
+
+def dump_block_file(path, block_data):
+    """Write a block file in the format its extension names"""
+    if path.endswith(FORMAT_EXTENSIONS["binary"]):
+        with open(path, 'wb') as file:
+            file.write(encode_block(block_data))
+    else:
+        with open(path, 'w') as file:
+            json.dump(block_data, file, indent=4)
@@ -1,30 +1,145 @@
 import hashlib
 import json
+from .binary_codec import BLOCK_VERSION_JSON, BLOCK_VERSION_BINARY, BLOCK_VERSIONS, BinaryHeaderHasher
 from .merkle_tree import MerkleTree
+from .utils import metrics
 from .utils.timestamp import get_current_timestamp
 
 class Block:
-    def __init__(self, index, timestamp, data, previous_hash, nonce=0):
+    """
+    A block of the DLT.
+
+    Blocks use __slots__ and keep only the Merkle root: the full tree is built on
+    first access of merkle_tree. The header serialization (everything except the
+    nonce) is cached as a HeaderHasher once the block is re-hashed or mined, and
+    dropped whenever a header field is assigned, so hashing again only serializes
+    the nonce. Code that mutates data in place must go through add_transaction.
+
+    The version selects the hash: version 1 hashes the JSON serialization of the
+    header (the original format, and the default so that stored blocks without a
+    version verify as before), version 2 the fixed-width binary header of
+    binary_codec, which needs an ISO 8601 timestamp.
+    """
+
+    __slots__ = ("index", "timestamp", "_data", "previous_hash", "nonce", "merkle_root", "hash",
+                 "version", "_merkle_tree", "_header")
+
+    def __init__(self, index, timestamp, data, previous_hash, nonce=0, version=BLOCK_VERSION_JSON):
+        if version not in BLOCK_VERSIONS:
+            raise ValueError(f"Unknown block version: {version}")
+        self._header = None
+        self._merkle_tree = None
+        self.version = version
         self.index = index
         self.timestamp = timestamp
         self.data = data
         self.previous_hash = previous_hash
         self.nonce = nonce
-        self.merkle_tree = MerkleTree([data]) if data else MerkleTree(["Genesis"])
         self.merkle_root = self.merkle_tree.get_root()
         self.hash = self.calculate_hash()
+        # Both were only needed to compute the root and hash, don't keep them around
+        self._merkle_tree = None
+        self._header = None
         
-    def calculate_hash(self):
-        block_string = json.dumps({
-            "index": self.index,
-            "timestamp": self.timestamp,
-            "data": self.data,
-            "previous_hash": self.previous_hash,
-            "nonce": self.nonce,
-            "merkle_root": self.merkle_root
-        }, sort_keys=True).encode()
+    def __setattr__(self, name, value):
+        if name in _HEADER_FIELDS:
+            object.__setattr__(self, "_header", None)
+        object.__setattr__(self, name, value)
+        
+    def __getstate__(self):
+        # The caches are rebuilt on demand (hash objects can't be pickled)
+        return {name: getattr(self, name) for name in _STATE_FIELDS}
+        
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_merkle_tree", None)
+        object.__setattr__(self, "_header", None)
+        
+    @property
+    def data(self):
+        return self._data
+        
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._merkle_tree = None
+        
+    @property
+    def merkle_tree(self):
+        """The Merkle tree of the transactions, built the first time it is requested"""
+        if self._merkle_tree is None:
+            self._merkle_tree = MerkleTree(self.transactions) if self._data else MerkleTree(["Genesis"])
+        return self._merkle_tree
+        
+    @property
+    def transactions(self):
+        """A list or tuple of data is a batch of transactions, anything else is a single one"""
+        if isinstance(self.data, (list, tuple)):
+            return list(self.data)
+        return [self.data]
         
-        return hashlib.sha256(block_string).hexdigest()
+    def add_transaction(self, transaction):
+        """Append a transaction to the block, updating the Merkle root incrementally"""
+        if not self.data:
+            self.data = [transaction]
+            self._merkle_tree = MerkleTree(self.data)
+        else:
+            merkle_tree = self.merkle_tree
+            if isinstance(self.data, list):
+                self.data.append(transaction)
+            else:
+                self._data = self.transactions + [transaction]
+            merkle_tree.append(transaction)
+        self.merkle_root = self.merkle_tree.get_root()
+        self.update_hash()
+        
+    def calculate_hash(self):
+        metrics.get_registry().counter("block_hash_calculations_total", "Full block header serializations hashed").inc()
+        return self.header_hasher().hash(self.nonce)
         
     def update_hash(self):
-        self.hash = self.calculate_hash()
\ No newline at end of file
+        self.hash = self.calculate_hash()
+
+    def header_hasher(self):
+        """Return the cached HeaderHasher of the block, building it if a header field changed"""
+        if self._header is None:
+            hasher = BinaryHeaderHasher if self.version == BLOCK_VERSION_BINARY else HeaderHasher
+            object.__setattr__(self, "_header", hasher(self))
+        return self._header
+
+# Assigning any of these invalidates the cached header serialization
+_HEADER_FIELDS = frozenset(["index", "timestamp", "_data", "previous_hash", "merkle_root", "version"])
+_STATE_FIELDS = ("index", "timestamp", "_data", "previous_hash", "nonce", "merkle_root", "hash", "version")
+
+class HeaderHasher:
+    """
+    Hash a version 1 block header for many nonces without re-serializing the block.
+
+    With sort_keys=True the nonce sits between "merkle_root" and "previous_hash",
+    so everything before it (including the data payload) is fed into a SHA-256
+    object once and that midstate is copied for every attempt. The resulting
+    hashes are byte-identical to hashing the whole header serialized with
+    json.dumps(..., sort_keys=True).
+    """
+
+    def __init__(self, block):
+        prefix = json.dumps({
+            "index": block.index,
+            "data": block.data,
+            "merkle_root": block.merkle_root
+        }, sort_keys=True)
+        suffix = json.dumps({
+            "timestamp": block.timestamp,
+            "previous_hash": block.previous_hash
+        }, sort_keys=True)
+
+        # '{..., "merkle_root": "..."' + ', "nonce": ' + <nonce> + ', "previous_hash": ..., "timestamp": ...}'
+        self.midstate = hashlib.sha256((prefix[:-1] + ', "nonce": ').encode())
+        self.suffix = (', ' + suffix[1:]).encode()
+
+    def hash(self, nonce):
+        sha = self.midstate.copy()
+        sha.update(str(nonce).encode())
+        sha.update(self.suffix)
+        return sha.hexdigest()
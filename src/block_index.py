@@ -0,0 +1,106 @@
+import os
+from .binary_codec import FORMAT_EXTENSIONS, block_files, load_block_file, storage_format
+
+INDEX_FILE = "block_index.bin"
+# Each record is the 8-character hash prefix that names the block file
+RECORD_SIZE = 8
+EMPTY_RECORD = b"\0" * RECORD_SIZE
+# Records read from the index file at a time while iterating
+READ_RECORDS = 4096
+
+class BlockIndex:
+    """
+    Fixed-width index of a linear DLT folder.
+
+    Record i of block_index.bin holds the hash prefix of block i, which together
+    with the index gives its file name (block_<index>_<prefix>.json, or .blk in a
+    folder stored in the binary format). Locating a
+    block is a single seek and listing the chain in order never globs or sorts
+    the folder. Indices without a block are left as zero records.
+    """
+
+    def __init__(self, folder="dlt"):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.extension = FORMAT_EXTENSIONS[storage_format(folder)]
+        path = os.path.join(folder, INDEX_FILE)
+        self.file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def __len__(self):
+        """Number of records, i.e. the highest indexed block + 1"""
+        self.file.seek(0, os.SEEK_END)
+        return self.file.tell() // RECORD_SIZE
+
+    def _path(self, index, record):
+        if record == EMPTY_RECORD or len(record) < RECORD_SIZE:
+            return None
+        return os.path.join(self.folder, f"block_{index}_{record.decode()}{self.extension}")
+
+    def path(self, index):
+        """Return the path of the block file with this index, or None"""
+        if index < 0 or index >= len(self):
+            return None
+        self.file.seek(index * RECORD_SIZE)
+        return self._path(index, self.file.read(RECORD_SIZE))
+
+    def add(self, index, block_hash):
+        """Record the file of block index (writing past the end leaves zero records in between)"""
+        self.file.seek(index * RECORD_SIZE)
+        self.file.write(block_hash[:RECORD_SIZE].encode())
+        self.file.flush()
+
+    def iter_files(self, start=0, stop=None):
+        """Yield (index, path or None) for indices start..stop-1, reading the index in small chunks"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        index = max(start, 0)
+        while index < stop:
+            count = min(READ_RECORDS, stop - index)
+            self.file.seek(index * RECORD_SIZE)
+            chunk = self.file.read(count * RECORD_SIZE)
+            for offset in range(0, len(chunk), RECORD_SIZE):
+                yield index, self._path(index, chunk[offset:offset + RECORD_SIZE])
+                index += 1
+            if len(chunk) < count * RECORD_SIZE:
+                break
+
+    def rebuild(self):
+        """Rebuild the index from the block file names of the folder (one directory scan)"""
+        self.file.truncate(0)
+        count = 0
+        for file in block_files(self.folder):
+            try:
+                _, index, prefix = os.path.splitext(os.path.basename(file))[0].split('_')
+                self.add(int(index), prefix)
+                count += 1
+            except ValueError:
+                print(f"Skipping unexpected file {file}")
+        return count
+
+def open_block_index(folder="dlt"):
+    """Open the index of a linear folder, building it from the block files the first time"""
+    index = BlockIndex(folder)
+    if len(index) == 0 and block_files(folder):
+        index.rebuild()
+    return index
+
+def iter_blocks(folder="dlt", start=0, stop=None):
+    """
+    Yield the blocks of a linear DLT folder in index order, one file at a time.
+
+    Only the block being yielded is held in memory. Raises FileNotFoundError when a
+    block in the range is missing.
+    """
+    with open_block_index(folder) as index:
+        for block_index, path in index.iter_files(start, stop):
+            if path is None:
+                raise FileNotFoundError(f"Block {block_index} is missing from {folder}")
+            yield load_block_file(path)
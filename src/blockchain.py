@@ -1,16 +1,17 @@
+from .binary_codec import CURRENT_BLOCK_VERSION
 from .block import Block
 from .merkle_tree import MerkleTree
 from .utils.timestamp import get_current_timestamp
 from .proof_of_work import ProofOfWork
 
 class Blockchain:
-    def __init__(self):
+    def __init__(self, proof_of_work=None):
         self.chain = []
+        self.proof_of_work = proof_of_work or ProofOfWork()
         genesis_block = self.create_block(previous_hash='000000000000000000000000000000000000000000000000000000000000000', nonce=0)
         
         # Mine the genesis block
-        pow = ProofOfWork(difficulty=3)
-        pow.mine(genesis_block)
+        self.proof_of_work.mine(genesis_block)
         
     def create_block(self, previous_hash, nonce, data=None):
         block = Block(
@@ -18,7 +19,8 @@ class Blockchain:
             timestamp=get_current_timestamp(),
             data=data if data else "Genesis Block",
             previous_hash=previous_hash,
-            nonce=nonce
+            nonce=nonce,
+            version=CURRENT_BLOCK_VERSION
         )
         self.chain.append(block)
         return block
@@ -34,7 +36,8 @@ class Blockchain:
             timestamp=get_current_timestamp(),
             data=data,
             previous_hash=previous_block.hash,
-            nonce=0
+            nonce=0,
+            version=CURRENT_BLOCK_VERSION
         )
         self.chain.append(new_block)
         return new_block
\ No newline at end of file
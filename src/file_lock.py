@@ -0,0 +1,103 @@
+import functools
+import inspect
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Lock file guarding all writes to a DLT folder
+WRITE_LOCK_FILE = "write.lock"
+# Seconds between attempts while waiting for a lock with a timeout
+POLL_INTERVAL = 0.01
+
+# Locks held by this process: path -> [file, depth, pid], so a holder can re-enter its own lock.
+# The pid tells entries inherited through fork apart, the child doesn't hold the lock.
+_held = {}
+_held_guard = threading.Lock()
+
+def _try_lock(file):
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a file (fcntl.flock, or msvcrt on Windows).
+
+    The lock is re-entrant within a process: code that already holds it can call
+    functions that take it again. It is not meant to coordinate threads of one
+    process. With a timeout, acquiring raises TimeoutError once it expires.
+    """
+
+    def __init__(self, path, timeout=None):
+        self.path = path
+        self.timeout = timeout
+
+    def acquire(self):
+        with _held_guard:
+            held = _held.get(self.path)
+            if held is not None and held[2] == os.getpid():
+                held[1] += 1
+                return
+
+        file = open(self.path, 'a+b')
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        while not _try_lock(file):
+            if deadline is not None and time.monotonic() >= deadline:
+                file.close()
+                raise TimeoutError(f"Timed out waiting for the lock on {self.path}")
+            time.sleep(POLL_INTERVAL)
+        with _held_guard:
+            _held[self.path] = [file, 1, os.getpid()]
+
+    def release(self):
+        with _held_guard:
+            held = _held[self.path]
+            held[1] -= 1
+            if held[1]:
+                return
+            del _held[self.path]
+        _unlock(held[0])
+        held[0].close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
+
+def folder_lock(folder, timeout=None):
+    """The write lock of a DLT folder"""
+    os.makedirs(folder, exist_ok=True)
+    return FileLock(os.path.join(os.path.abspath(folder), WRITE_LOCK_FILE), timeout)
+
+def holds_folder_lock(func):
+    """Decorator running func while holding the write lock of its `folder` argument"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        with folder_lock(arguments.arguments["folder"]):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,170 @@
+import json
+from contextlib import nullcontext
+from .index_store import IndexStore
+from .tree_index import open_tree_index
+
+FORK_CHOICE_TABLE = "fork_choice"
+HASH_BITS = 256
+
+def hash_work(block_hash):
+    """Work proven by a hash: 2 ** (its leading zero bits), the expected attempts to find it"""
+    return 1 << (HASH_BITS - int(block_hash, 16).bit_length())
+
+class ForkChoice:
+    """
+    Heaviest-subtree (GHOST) fork choice over a block tree.
+
+    Every block stores the total weight of its subtree. Adding a block adds its
+    weight to each ancestor, so an insert costs O(depth). The best tip is found by
+    descending from the root into the heaviest child at each level (ties go to
+    the child added first), and a block is canonical when every block on its
+    path to the root is the heaviest child of its parent; both are O(depth).
+
+    Weights are block counts (mode "count") or the work proven by each block's
+    hash (mode "work"). With a folder the weights live in a table of its
+    IndexStore and survive restarts; without one they are kept in memory. Each
+    weight update costs the same however many blocks the tree holds, so an
+    insert stays O(depth) on disk too. Pass the store of an insert to share it
+    with the other indexes; it is then left open by close().
+    """
+
+    def __init__(self, folder=None, mode="count", store=None):
+        if mode not in ("count", "work"):
+            raise ValueError(f"Unknown fork choice mode: {mode}")
+        self.folder = folder
+        self.owns_store = folder is not None and store is None
+        self.store = IndexStore(folder) if self.owns_store else store
+        self.db = {} if self.store is None else self.store.table(FORK_CHOICE_TABLE)
+        if "mode" in self.db:
+            mode = self.db.get("mode")
+        else:
+            self.db["mode"] = mode
+        self.mode = mode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        if self.owns_store:
+            self.store.close()
+
+    def __contains__(self, block_hash):
+        return "w:" + block_hash in self.db
+
+    def is_empty(self):
+        return "root" not in self.db
+
+    @property
+    def root(self):
+        return self.db.get("root")
+
+    def parent(self, block_hash):
+        return self.db.get("p:" + block_hash) or None
+
+    def children(self, block_hash):
+        links = self.db.get("c:" + block_hash)
+        return json.loads(links) if links else []
+
+    def weight(self, block_hash):
+        """Total weight of the subtree rooted at block_hash (0 for an unknown block)"""
+        value = self.db.get("w:" + block_hash)
+        return int(value) if value else 0
+
+    def add_block(self, block_hash, parent_hash=None):
+        """
+        Add a block and propagate its weight up to the root.
+
+        Blocks already known are ignored. A block whose parent is unknown is
+        rejected with ValueError, except for the first block, which becomes the root.
+        """
+        if block_hash in self:
+            return False
+        if parent_hash is None or parent_hash not in self:
+            if not self.is_empty():
+                raise ValueError(f"Parent {str(parent_hash)[:8]} of block {block_hash[:8]} is not in the fork choice")
+            self.db["root"] = block_hash
+            parent_hash = None
+
+        weight = 1 if self.mode == "count" else hash_work(block_hash)
+        self.db["w:" + block_hash] = str(weight)
+        self.db["p:" + block_hash] = parent_hash or ""
+        if parent_hash is not None:
+            self.db["c:" + parent_hash] = json.dumps(self.children(parent_hash) + [block_hash])
+
+        # Walk the parent path, adding the new block's weight to every ancestor
+        ancestor = parent_hash
+        while ancestor is not None:
+            self.db["w:" + ancestor] = str(self.weight(ancestor) + weight)
+            ancestor = self.parent(ancestor)
+        return True
+
+    def heaviest_child(self, block_hash):
+        """Return the child with the heaviest subtree (the first added on a tie), or None"""
+        best, best_weight = None, -1
+        for child in self.children(block_hash):
+            child_weight = self.weight(child)
+            if child_weight > best_weight:
+                best, best_weight = child, child_weight
+        return best
+
+    def best_tip(self):
+        """Return the hash of the tip of the canonical branch, or None if there are no blocks"""
+        block_hash = self.root
+        if block_hash is None:
+            return None
+        child = self.heaviest_child(block_hash)
+        while child is not None:
+            block_hash = child
+            child = self.heaviest_child(block_hash)
+        return block_hash
+
+    def is_canonical(self, block_hash):
+        """Tell whether a block lies on the canonical branch (root to best tip)"""
+        if block_hash not in self:
+            return False
+        parent = self.parent(block_hash)
+        while parent is not None:
+            if self.heaviest_child(parent) != block_hash:
+                return False
+            block_hash, parent = parent, self.parent(parent)
+        return True
+
+    def canonical_chain(self):
+        """Yield the hashes of the canonical branch from the root to the best tip"""
+        block_hash = self.root
+        while block_hash is not None:
+            yield block_hash
+            block_hash = self.heaviest_child(block_hash)
+
+    def rebuild(self, blocks):
+        """Reset the weights from an iterable of (block_hash, parent_hash) in insertion order"""
+        count = 0
+        with self.store.batch() if self.store is not None else nullcontext():
+            self.db.clear()
+            self.db["mode"] = self.mode
+            for block_hash, parent_hash in blocks:
+                self.add_block(block_hash, parent_hash)
+                count += 1
+        return count
+
+def open_fork_choice(folder="dlt_tree", index=None, mode="count"):
+    """
+    Open the persisted fork choice of a tree folder.
+
+    The first time, the weights are built from the tree index (index, or the
+    folder's own one) in insertion order, so parents come before their children.
+    """
+    fork_choice = ForkChoice(folder, mode, index.store if index is not None else None)
+    if fork_choice.is_empty():
+        tree_index = index if index is not None else open_tree_index(folder, fork_choice.store)
+        try:
+            if tree_index.frontier_size():
+                fork_choice.rebuild((block["hash"], block.get("parent_hash"))
+                                    for block in tree_index.iter_blocks())
+        finally:
+            if index is None:
+                tree_index.close()
+    return fork_choice
@@ -0,0 +1,159 @@
+from .binary_codec import block_files, load_block_file
+from .utils.timestamp import parse_timestamp
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HASH_BYTES = 32
+
+def _header_dtype():
+    return np.dtype([
+        ("index", np.int64),
+        ("timestamp", np.float64),
+        ("nonce", np.int64),
+        ("hash", np.uint8, (HASH_BYTES,)),
+        ("previous_hash", np.uint8, (HASH_BYTES,)),
+        ("merkle_root", np.uint8, (HASH_BYTES,)),
+    ])
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("HeaderStore needs NumPy, install it with: pip install numpy")
+
+def _parse_timestamp(timestamp):
+    seconds = parse_timestamp(timestamp)
+    return float("nan") if seconds is None else seconds
+
+def _hash_column(hashes):
+    """Pack hex hashes into an (n, 32) uint8 array in one conversion"""
+    # The genesis previous_hash has 63 zeros, pad it to a full 32 bytes
+    try:
+        packed = bytes.fromhex("".join(h.zfill(2 * HASH_BYTES) for h in hashes))
+    except ValueError as e:
+        raise ValueError(f"Invalid block hash in headers: {e}") from e
+    if len(packed) != len(hashes) * HASH_BYTES:
+        raise ValueError("Invalid block hash in headers: every hash must be 32 bytes")
+    return np.frombuffer(packed, dtype=np.uint8).reshape(len(hashes), HASH_BYTES)
+
+class HeaderStore:
+    """
+    Columnar copy of the block headers in a NumPy structured array.
+
+    Rows are sorted by block index. Hashes are stored as fixed 32-byte fields and
+    timestamps as seconds since the epoch, so linkage checks, gap detection and
+    chain statistics run as vectorized operations instead of Python loops.
+    NumPy is optional for the rest of the project; it is only needed here.
+    """
+
+    def __init__(self, headers):
+        _require_numpy()
+        self.headers = headers
+
+    @classmethod
+    def from_records(cls, records):
+        """Build the store from header dicts or Block objects, in any order"""
+        _require_numpy()
+        records = [record if isinstance(record, dict) else {
+            "index": record.index,
+            "timestamp": record.timestamp,
+            "nonce": record.nonce,
+            "hash": record.hash,
+            "previous_hash": record.previous_hash,
+            "merkle_root": record.merkle_root
+        } for record in records]
+        records.sort(key=lambda record: record["index"])
+
+        headers = np.zeros(len(records), dtype=_header_dtype())
+        if records:
+            headers["index"] = [record["index"] for record in records]
+            headers["timestamp"] = [_parse_timestamp(record["timestamp"]) for record in records]
+            headers["nonce"] = [record["nonce"] for record in records]
+            for field in ("hash", "previous_hash", "merkle_root"):
+                headers[field] = _hash_column([record[field] for record in records])
+        return cls(headers)
+
+    @classmethod
+    def from_blockchain(cls, blockchain):
+        return cls.from_records(blockchain.chain)
+
+    @classmethod
+    def from_folder(cls, folder="dlt"):
+        """Build the store from the block files of a linear DLT folder"""
+        records = []
+        for file in block_files(folder):
+            block_data = load_block_file(file, bodies=False)
+            # Drop the payload right away, only the header is kept
+            block_data.pop("data", None)
+            records.append(block_data)
+        return cls.from_records(records)
+
+    @classmethod
+    def load(cls, path):
+        _require_numpy()
+        return cls(np.load(path, allow_pickle=False))
+
+    def save(self, path):
+        """Write the headers as a .npy file, which load reads back without parsing JSON"""
+        np.save(path, self.headers, allow_pickle=False)
+
+    def __len__(self):
+        return len(self.headers)
+
+    def hash_hex(self, position, field="hash"):
+        return bytes(self.headers[field][position]).hex()
+
+    def broken_links(self):
+        """Return the indices of blocks whose previous_hash isn't the hash of the row before"""
+        if len(self.headers) < 2:
+            return []
+        mismatched = np.any(self.headers["previous_hash"][1:] != self.headers["hash"][:-1], axis=1)
+        return self.headers["index"][1:][mismatched].tolist()
+
+    def gaps(self):
+        """Return (index, next_index) pairs where the indices aren't consecutive (missing or repeated blocks)"""
+        indices = self.headers["index"]
+        positions = np.nonzero(np.diff(indices) != 1)[0]
+        return [(int(indices[i]), int(indices[i + 1])) for i in positions]
+
+    def verify_linkage(self):
+        """
+        Check that the indices are consecutive from 0 and every block links to the previous one.
+
+        Returns:
+            tuple: (is_valid, index of the first bad block or None)
+        """
+        if len(self.headers) == 0:
+            return True, None
+        problems = self.broken_links() + [next_index for _, next_index in self.gaps()]
+        if self.headers["index"][0] != 0:
+            problems.append(int(self.headers["index"][0]))
+        if problems:
+            return False, min(problems)
+        return True, None
+
+    def statistics(self):
+        """Block interval (seconds) and nonce distribution of the chain"""
+        intervals = np.diff(self.headers["timestamp"])
+        intervals = intervals[~np.isnan(intervals)]
+        nonces = self.headers["nonce"]
+        stats = {"blocks": len(self.headers), "block_interval": None, "nonce": None}
+        if len(intervals):
+            stats["block_interval"] = {
+                "mean": float(intervals.mean()),
+                "median": float(np.median(intervals)),
+                "std": float(intervals.std()),
+                "min": float(intervals.min()),
+                "max": float(intervals.max())
+            }
+        if len(nonces):
+            p50, p90, p99 = np.percentile(nonces, [50, 90, 99])
+            stats["nonce"] = {
+                "mean": float(nonces.mean()),
+                "median": float(p50),
+                "p90": float(p90),
+                "p99": float(p99),
+                "max": int(nonces.max())
+            }
+        return stats
@@ -0,0 +1,102 @@
+import contextlib
+import os
+import sqlite3
+
+INDEX_STORE_FILE = "indexes.sqlite"
+# Seconds a connection waits for another process's write transaction to finish
+BUSY_TIMEOUT = 30
+
+class IndexStore:
+    """
+    Key-value indexes of a DLT folder, one table per index in an SQLite file.
+
+    Unlike dbm.dumb, the only dbm backend on some installs (and on Windows), an
+    SQLite file isn't read and rewritten as a whole on every open and close:
+    opening it and updating a key cost the same however many blocks are indexed.
+    Writers open the store once and share it between the tree index, the fork
+    choice and the lookup indexes, grouping a block's updates with batch().
+
+    The file is kept in WAL mode with synchronous=NORMAL: commits are not synced
+    one by one, like the dbm files before it. Every index can be rebuilt from the
+    block files of the folder.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        # Autocommit unless inside batch(), so a write is seen at once by other connections
+        self.connection = sqlite3.connect(os.path.join(folder, INDEX_STORE_FILE), timeout=BUSY_TIMEOUT,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def table(self, name):
+        """Return the table of one index, creating it the first time"""
+        if name not in self.tables:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {name} "
+                                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+            self.tables[name] = IndexTable(self.connection, name)
+        return self.tables[name]
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Run the updates of the block in one transaction (batches nest into the outermost one)"""
+        if self.connection.in_transaction:
+            yield self
+            return
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+class IndexTable:
+    """Dictionary of string keys and values, with the dbm methods the indexes use"""
+
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+
+    def get(self, key, default=None):
+        row = self.connection.execute(f"SELECT value FROM {self.name} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.connection.execute(f"INSERT OR REPLACE INTO {self.name} (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def __delitem__(self, key):
+        self.connection.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+
+    def __contains__(self, key):
+        return self.connection.execute(f"SELECT 1 FROM {self.name} WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def is_empty(self):
+        """Tell whether the table has no keys, without counting them"""
+        return self.connection.execute(f"SELECT 1 FROM {self.name} LIMIT 1").fetchone() is None
+
+    def keys(self):
+        return [row[0] for row in self.connection.execute(f"SELECT key FROM {self.name}")]
+
+    def clear(self):
+        self.connection.execute(f"DELETE FROM {self.name}")
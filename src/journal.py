@@ -0,0 +1,148 @@
+import json
+import os
+from .binary_codec import block_file_name, dump_block_file, load_block_file, storage_format
+
+JOURNAL_FILE = "journal.log"
+# Committed records kept before the block files are synced and the journal is emptied
+CHECKPOINT_RECORDS = 64
+
+def journaled_file(folder, block_data, storage):
+    """Path of the block file of a journal record in a storage format"""
+    return os.path.join(folder, block_file_name(block_data["index"], block_data["hash"], storage))
+
+def write_block_file(folder, block_data):
+    """Write a block file as the add_transaction scripts do, returning the file name"""
+    path = journaled_file(folder, block_data, storage_format(folder))
+    dump_block_file(path, block_data)
+    return os.path.basename(path)
+
+def read_journal(folder):
+    """
+    Return the whole records of a folder's journal, oldest first, without the write lock.
+
+    A torn last record is skipped rather than cut off, so readers can call this
+    while a writer holds the journal.
+    """
+    try:
+        with open(os.path.join(folder, JOURNAL_FILE), 'rb') as file:
+            lines = file.readlines()
+    except OSError:
+        return []
+    records = []
+    for line in lines:
+        if not line.endswith(b"\n"):
+            break
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+    return records
+
+def _sync_files(paths):
+    if hasattr(os, "sync"):
+        os.sync()
+        return
+    for path in paths:
+        with open(path, 'rb') as file:
+            os.fsync(file.fileno())
+
+class Journal:
+    """
+    Write-ahead journal of the blocks written to a DLT folder, for group commit.
+
+    Writers append each block to the journal before writing its file, then call
+    commit() once for a whole group of blocks: a single fsync makes every block of
+    the group durable, instead of one fsync per block file. After a crash the
+    committed records are used to rewrite block files that were lost or torn
+    (see damaged_records). Once more than checkpoint_records are committed, the
+    block files are synced and the journal is emptied.
+
+    The journal must only be used while holding the folder's write lock.
+    """
+
+    def __init__(self, folder, checkpoint_records=CHECKPOINT_RECORDS):
+        self.folder = folder
+        self.checkpoint_records = checkpoint_records
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, JOURNAL_FILE)
+        self.file = open(self.path, 'a+b')
+        self.pending = 0
+        self.recovered = False
+        self.count = self._drop_torn_tail()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def _drop_torn_tail(self):
+        """Cut a partly written last record left by a crash, returning the number of whole records"""
+        self.file.seek(0)
+        count, good_size = 0, 0
+        for line in self.file:
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            count += 1
+            good_size += len(line)
+        if good_size < self.file.seek(0, os.SEEK_END):
+            self.file.truncate(good_size)
+        return count
+
+    def records(self):
+        """Return the journaled block data, oldest first"""
+        self.file.flush()
+        self.file.seek(0)
+        return [json.loads(line) for line in self.file]
+
+    def append(self, block_data):
+        """Record a block before its file is written; it becomes durable at the next commit()"""
+        self.file.write(json.dumps(block_data).encode() + b"\n")
+        # Hand the record to the OS before the block file is written, so a crashed
+        # writer never leaves a block file without its journal record
+        self.file.flush()
+        self.pending += 1
+        self.count += 1
+
+    def commit(self):
+        """Make every appended block durable with one fsync, returning how many were committed"""
+        committed = self.pending
+        if committed:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+            if self.count > self.checkpoint_records:
+                self.checkpoint()
+        return committed
+
+    def checkpoint(self):
+        """Sync the journaled block files, then empty the journal"""
+        storage = storage_format(self.folder)
+        _sync_files([journaled_file(self.folder, block_data, storage) for block_data in self.records()])
+        self.file.truncate(0)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.count = 0
+
+    def damaged_records(self):
+        """
+        Return the journaled blocks whose file is missing or torn (not valid JSON).
+
+        Files that parse are left alone: whether their content is right is up to
+        validation, not recovery.
+        """
+        damaged = []
+        storage = storage_format(self.folder)
+        for block_data in self.records():
+            try:
+                load_block_file(journaled_file(self.folder, block_data, storage))
+            except (OSError, ValueError):
+                damaged.append(block_data)
+        return damaged
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import struct
+from .binary_codec import (BLOCK_VERSION_BINARY, BLOCK_VERSION_JSON, HASH_BYTES, HEADER, block_file_name,
+                           dump_block_file, encode_header, format_timestamp, load_block_file)
+from .block import Block
+from .merkle_tree import MerkleTree, verify_proof
+from .proof_of_work import ProofOfWork
+from .secondary_index import block_transactions, open_secondary_index
+
+HEADERS_FILE = "headers.bin"
+BODIES_FOLDER = "bodies"
+# A header record is the binary block header followed by the raw block hash
+HEADER_RECORD_SIZE = HEADER.size + HASH_BYTES
+# Raw previous_hash inside a header record (after version, index and timestamp)
+PREVIOUS_HASH = slice(struct.calcsize("<BQq"), struct.calcsize("<BQq") + HASH_BYTES)
+
+def header_record(block_data):
+    """The headers-only record of a block: index, timestamp, previous_hash, merkle_root, nonce, version and hash"""
+    return encode_header(block_data) + bytes.fromhex(block_data["hash"])
+
+def decode_header(record):
+    version, index, micros, previous_hash, merkle_root, nonce = HEADER.unpack_from(record)
+    return {
+        "index": index,
+        "hash": record[HEADER.size:HEADER_RECORD_SIZE].hex(),
+        "previous_hash": previous_hash.hex(),
+        "timestamp": format_timestamp(micros),
+        "nonce": nonce,
+        "merkle_root": merkle_root.hex(),
+        "version": version
+    }
+
+def export_headers(blocks, file):
+    """
+    Write the headers of blocks (dicts in index order) to a binary file object.
+
+    Returns:
+        int: Number of headers written
+    """
+    count = 0
+    for block_data in blocks:
+        file.write(header_record(block_data))
+        count += 1
+    return count
+
+def iter_header_records(file):
+    """Yield the fixed-width header records of a headers-only stream"""
+    while True:
+        record = file.read(HEADER_RECORD_SIZE)
+        if len(record) < HEADER_RECORD_SIZE:
+            return
+        yield record
+
+def folder_source(folder):
+    """Body source reading blocks by index from a full node's DLT folder (either layout)"""
+    def fetch(block_index):
+        with open_secondary_index(folder) as lookup:
+            return lookup.block_by_index(block_index)
+    return fetch
+
+class LightClient:
+    """
+    Headers-only view of a DLT, for clients that can't download or hash block bodies.
+
+    Headers are kept in headers.bin as fixed-width records (121 bytes per block),
+    so header i is one seek away. Importing a header checks its proof of work
+    against proof_of_work (the easiest target the client accepts), its linkage
+    (linear: the previous header; tree: any known header) and, for version 2
+    blocks, that its hash is the hash of the header itself. A version 1 hash
+    covers the data, so it is only checked once that block's body is fetched.
+
+    Bodies are fetched lazily through source (a function from block index to
+    block data), checked against the stored header and cached under bodies/.
+    """
+
+    def __init__(self, folder, proof_of_work=None, layout="linear", source=None):
+        if layout not in ("linear", "tree"):
+            raise ValueError(f"Unknown layout: {layout}")
+        self.folder = folder
+        self.proof_of_work = proof_of_work or ProofOfWork()
+        self.layout = layout
+        self.source = source
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, HEADERS_FILE)
+        self.file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        # Drop a partially written trailing record
+        size = self.file.seek(0, os.SEEK_END)
+        if size % HEADER_RECORD_SIZE:
+            self.file.truncate(size - size % HEADER_RECORD_SIZE)
+        # A tree links to any earlier block, so the tree layout keeps the known hashes in memory
+        self.known = None
+        if layout == "tree":
+            self.file.seek(0)
+            self.known = {record[HEADER.size:]: index
+                          for index, record in enumerate(iter_header_records(self.file))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def __len__(self):
+        self.file.seek(0, os.SEEK_END)
+        return self.file.tell() // HEADER_RECORD_SIZE
+
+    def _record(self, block_index):
+        if not 0 <= block_index < len(self):
+            raise IndexError(f"No header for block {block_index}")
+        self.file.seek(block_index * HEADER_RECORD_SIZE)
+        return self.file.read(HEADER_RECORD_SIZE)
+
+    def header(self, block_index):
+        return decode_header(self._record(block_index))
+
+    def tip(self):
+        """The header of the highest block, or None"""
+        return self.header(len(self) - 1) if len(self) else None
+
+    def check_header(self, record, expected_index, previous_record=None):
+        """
+        Check one header record against the headers before it.
+
+        Returns:
+            str: Why the header is invalid, or None if it is valid
+        """
+        version, index = HEADER.unpack_from(record)[:2]
+        block_hash = record[HEADER.size:].hex()
+        if index != expected_index:
+            return f"expected block {expected_index}, got block {index}"
+        if version == BLOCK_VERSION_BINARY and hashlib.sha256(record[:HEADER.size]).hexdigest() != block_hash:
+            return "hash doesn't match the header"
+        if not self.proof_of_work.is_valid_hash(block_hash):
+            return "hash doesn't meet the proof of work target"
+        if expected_index == 0:
+            return None
+        previous_hash = record[PREVIOUS_HASH]
+        if self.known is not None:
+            if previous_hash not in self.known:
+                return "previous_hash is not a known block"
+        elif previous_hash != previous_record[HEADER.size:]:
+            return "previous_hash doesn't match the previous block"
+        return None
+
+    def import_headers(self, file):
+        """
+        Verify and append the headers of a headers-only stream (see export_headers).
+
+        Headers the client already has are skipped, so a stream can be imported again
+        to catch up. Importing stops at the first invalid header.
+
+        Returns:
+            tuple: (is_valid, first_invalid_block_index)
+        """
+        height = len(self)
+        previous_record = self._record(height - 1) if height else None
+        self.file.seek(0, os.SEEK_END)
+        try:
+            for position, record in enumerate(iter_header_records(file)):
+                if position < height:
+                    continue
+                error = self.check_header(record, position, previous_record)
+                if error:
+                    print(f"Error: Header of block {position} is invalid: {error}")
+                    return False, position
+                self.file.write(record)
+                if self.known is not None:
+                    self.known[record[HEADER.size:]] = position
+                previous_record = record
+        finally:
+            self.file.flush()
+        return True, None
+
+    def verify(self):
+        """Re-verify every stored header, reading them one at a time"""
+        known = self.known
+        self.known = None if known is None else {}
+        try:
+            self.file.seek(0)
+            previous_record = None
+            for position, record in enumerate(iter_header_records(self.file)):
+                error = self.check_header(record, position, previous_record)
+                if error:
+                    print(f"Error: Header of block {position} is invalid: {error}")
+                    return False, position
+                if self.known is not None:
+                    self.known[record[HEADER.size:]] = position
+                previous_record = record
+        finally:
+            self.known = known
+        return True, None
+
+    def verify_body(self, block_data):
+        """Check that a block body belongs to its stored header; raises ValueError if it doesn't"""
+        header = self.header(block_data["index"])
+        if header_record(block_data) != self._record(block_data["index"]):
+            raise ValueError(f"Block {header['index']} doesn't match its header")
+        if MerkleTree(block_transactions(block_data)).get_root() != header["merkle_root"]:
+            raise ValueError(f"Block {header['index']} data doesn't match its Merkle root")
+        if block_data.get("version", BLOCK_VERSION_JSON) == BLOCK_VERSION_JSON:
+            block = Block(block_data["index"], block_data["timestamp"], block_data["data"],
+                          block_data["previous_hash"], block_data["nonce"], BLOCK_VERSION_JSON)
+            if block.hash != header["hash"]:
+                raise ValueError(f"Block {header['index']} hash doesn't match its data")
+
+    def get_block(self, block_index):
+        """Return the full block, fetching and verifying its body the first time it is asked for"""
+        header = self.header(block_index)
+        path = os.path.join(self.folder, BODIES_FOLDER, block_file_name(block_index, header["hash"], "binary"))
+        if os.path.exists(path):
+            return load_block_file(path)
+        if self.source is None:
+            raise LookupError(f"Block {block_index} body is not cached and there is no source to fetch it from")
+
+        block_data = self.source(block_index)
+        if block_data is None:
+            raise LookupError(f"Block {block_index} body is not available from the source")
+        self.verify_body(block_data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        dump_block_file(path, block_data)
+        return block_data
+
+    def verify_transaction(self, block_index, transaction, proof):
+        """Check a Merkle proof that a transaction is in a block, using only its header"""
+        return verify_proof(transaction, proof, self.header(block_index)["merkle_root"])
@@ -0,0 +1,106 @@
+import json
+import queue
+import threading
+import time
+
+# Marks the end of the transaction source in Mempool.batches
+_END = object()
+
+class Mempool:
+    """
+    Pending transactions waiting to be packed into a block.
+
+    A batch is ready when it reaches max_count transactions, when adding the next
+    transaction would take it over max_bytes (JSON-encoded size), or when its oldest
+    transaction has waited max_wait seconds. Limits set to None are not applied.
+    """
+
+    def __init__(self, max_count=100, max_bytes=None, max_wait=None):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+        self.pending = []
+        self.pending_bytes = 0
+        self.first_arrival = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, transaction):
+        """
+        Add a transaction to the pool.
+
+        Returns:
+            list: A batch that had to be flushed to make room for the transaction, or None
+        """
+        size = len(json.dumps(transaction).encode())
+        flushed = None
+        if self.pending and self.max_bytes is not None and self.pending_bytes + size > self.max_bytes:
+            flushed = self.drain()
+
+        if not self.pending:
+            self.first_arrival = time.monotonic()
+        self.pending.append(transaction)
+        self.pending_bytes += size
+        return flushed
+
+    def time_left(self):
+        """Seconds until the time window closes, or None if there is no window to wait for"""
+        if self.max_wait is None or not self.pending:
+            return None
+        return max(0.0, self.first_arrival + self.max_wait - time.monotonic())
+
+    def is_ready(self):
+        if not self.pending:
+            return False
+        if self.max_count is not None and len(self.pending) >= self.max_count:
+            return True
+        if self.max_bytes is not None and self.pending_bytes >= self.max_bytes:
+            return True
+        return self.time_left() == 0.0
+
+    def drain(self):
+        """Remove and return all pending transactions"""
+        batch = self.pending
+        self.pending = []
+        self.pending_bytes = 0
+        self.first_arrival = None
+        return batch
+
+    def batches(self, transactions):
+        """
+        Pack a stream of transactions into batches.
+
+        The source is read on a background thread, so a time window can close while
+        the source is blocked (e.g. waiting on stdin). The last partial batch is
+        yielded when the source is exhausted.
+        """
+        incoming = queue.Queue(maxsize=10000)
+
+        def read_source():
+            try:
+                for transaction in transactions:
+                    incoming.put(transaction)
+            finally:
+                incoming.put(_END)
+
+        threading.Thread(target=read_source, daemon=True).start()
+
+        while True:
+            try:
+                transaction = incoming.get(timeout=self.time_left())
+            except queue.Empty:
+                # Time window closed with no new transactions
+                yield self.drain()
+                continue
+
+            if transaction is _END:
+                break
+            flushed = self.add(transaction)
+            if flushed:
+                yield flushed
+            if self.is_ready():
+                yield self.drain()
+
+        if self.pending:
+            yield self.drain()
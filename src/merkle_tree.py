@@ -1,14 +1,43 @@
 import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
+from .utils import metrics
+
+# Smallest number of hashes worth handing to a worker thread
+PARALLEL_BATCH_SIZE = 4096
 
 class MerkleTree:
-    def __init__(self, transactions):
-        self.transactions = transactions
+    """
+    Merkle tree over a list of transactions.
+    
+    mode="hex" (the default) stores hex digests and hashes the concatenated hex
+    strings of each pair, which is what every existing block uses. mode="bytes"
+    stores raw 32-byte digests and hashes the concatenated bytes instead; it is
+    cheaper but produces different roots, so it is opt-in. In both modes roots
+    and proofs are returned as hex strings.
+    
+    With workers > 1 leaves and tree levels are hashed in batches on a thread pool.
+    """
+    
+    def __init__(self, transactions, mode="hex", workers=None):
+        if mode not in ("hex", "bytes"):
+            raise ValueError(f"Unknown Merkle tree mode: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.transactions = list(transactions)
         self.tree = self.build_tree()
         
+    @metrics.timed("merkle_build_seconds", "Time to build a Merkle tree from its transactions")
     def build_tree(self):
-        # Convert transactions to hash strings
-        leaves = [self.hash_transaction(tx) for tx in self.transactions]
+        metrics.get_registry().counter("merkle_leaves_hashed_total", "Transactions hashed into Merkle leaves").inc(len(self.transactions))
+        if self.workers and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return self._build_levels(lambda func, items: self._map_batches(executor, func, items))
+        return self._build_levels(lambda func, items: func(items))
+        
+    def _build_levels(self, run):
+        # Convert transactions to hashes
+        leaves = run(self._hash_leaves, self.transactions)
         
         # Ensure even number of leaves by duplicating the last one if needed
         if len(leaves) % 2 == 1:
@@ -17,26 +46,152 @@ class MerkleTree:
         # Build the tree
         tree = [leaves]
         while len(tree[-1]) > 1:
-            level = []
-            for i in range(0, len(tree[-1]), 2):
-                if i + 1 < len(tree[-1]):
-                    level.append(self.hash_pair(tree[-1][i], tree[-1][i+1]))
-                else:
-                    level.append(tree[-1][i])
-            tree.append(level)
+            tree.append(run(self._hash_level, tree[-1]))
             
         return tree
         
+    def _map_batches(self, executor, func, items):
+        """Apply func to even-sized slices of items on the thread pool and join the results"""
+        if len(items) < 2 * PARALLEL_BATCH_SIZE:
+            return func(items)
+        batch_size = max(PARALLEL_BATCH_SIZE, -(-len(items) // self.workers))
+        batch_size += batch_size % 2
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        result = []
+        for hashed in executor.map(func, batches):
+            result.extend(hashed)
+        return result
+        
+    def _hash_leaves(self, transactions):
+        hash_leaf = hash_transaction_bytes if self.mode == "bytes" else hash_transaction
+        return [hash_leaf(tx) for tx in transactions]
+        
+    def _hash_level(self, nodes):
+        hash_node = hash_pair_bytes if self.mode == "bytes" else hash_pair
+        level = [hash_node(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+        if len(nodes) % 2 == 1:
+            # Odd node is carried up unchanged
+            level.append(nodes[-1])
+        return level
+        
     def hash_transaction(self, transaction):
-        # Convert transaction to a hash
-        return hashlib.sha256(json.dumps(transaction, sort_keys=True).encode()).hexdigest()
+        if self.mode == "bytes":
+            return hash_transaction_bytes(transaction)
+        return hash_transaction(transaction)
         
     def hash_pair(self, left, right):
-        # Concatenate and hash the pair
-        concat = left + right
-        return hashlib.sha256(concat.encode()).hexdigest()
+        if self.mode == "bytes":
+            return hash_pair_bytes(left, right)
+        return hash_pair(left, right)
+        
+    def append(self, transaction):
+        """Add a transaction as a new leaf, rehashing only the path up to the root"""
+        self.transactions.append(transaction)
+        leaf = self.hash_transaction(transaction)
+        leaves = self.tree[0]
+        index = len(self.transactions) - 1
+        
+        if index < len(leaves):
+            # Replace the duplicate that padded an odd number of leaves
+            leaves[index] = leaf
+        else:
+            # Add the leaf together with its duplicate to keep the level even
+            leaves.extend([leaf, leaf])
+        self.update_path(index)
+        
+    def update(self, index, transaction):
+        """Replace the transaction at index, rehashing only the path up to the root"""
+        self.transactions[index] = transaction
+        leaf = self.hash_transaction(transaction)
+        leaves = self.tree[0]
+        leaves[index] = leaf
+        
+        # Keep the padding duplicate in sync with the last transaction
+        if index == len(self.transactions) - 1 and len(leaves) > len(self.transactions):
+            leaves[index + 1] = leaf
+        self.update_path(index)
+        
+    def update_path(self, index):
+        """Recompute the ancestors of the leaf at index, growing the tree if needed"""
+        level = 0
+        while len(self.tree[level]) > 1:
+            index //= 2
+            nodes = self.tree[level]
+            left = 2 * index
+            if left + 1 < len(nodes):
+                parent = self.hash_pair(nodes[left], nodes[left + 1])
+            else:
+                # Odd node at an upper level is carried up unchanged
+                parent = nodes[left]
+                
+            if level + 1 == len(self.tree):
+                self.tree.append([])
+            upper = self.tree[level + 1]
+            if index < len(upper):
+                upper[index] = parent
+            else:
+                upper.append(parent)
+            level += 1
+            
+    def get_proof(self, index):
+        """
+        Return the sibling path proving that the transaction at index is in the tree.
+        
+        Each step is a (sibling_hash, side) pair, where side says whether the sibling
+        is on the "left" or the "right". Levels where the node is carried up without
+        a sibling add no step.
+        """
+        if index < 0 or index >= len(self.transactions):
+            raise IndexError("transaction index out of range")
+            
+        proof = []
+        for nodes in self.tree[:-1]:
+            sibling = index ^ 1
+            if sibling < len(nodes):
+                side = "left" if sibling < index else "right"
+                proof.append((self._to_hex(nodes[sibling]), side))
+            index //= 2
+        return proof
         
     def get_root(self):
         if not self.tree or not self.tree[-1]:
             return None
-        return self.tree[-1][0]
\ No newline at end of file
+        return self._to_hex(self.tree[-1][0])
+        
+    def _to_hex(self, node):
+        return node.hex() if self.mode == "bytes" else node
+
+def hash_transaction(transaction):
+    # Convert transaction to a hash
+    return hashlib.sha256(json.dumps(transaction, sort_keys=True).encode()).hexdigest()
+
+def hash_pair(left, right):
+    # Concatenate and hash the pair
+    concat = left + right
+    return hashlib.sha256(concat.encode()).hexdigest()
+
+def hash_transaction_bytes(transaction):
+    return hashlib.sha256(json.dumps(transaction, sort_keys=True).encode()).digest()
+
+def hash_pair_bytes(left, right):
+    return hashlib.sha256(left + right).digest()
+
+def verify_proof(transaction, proof, root, mode="hex"):
+    """Check a MerkleTree.get_proof path against a root without building the tree"""
+    if mode == "bytes":
+        current = hash_transaction_bytes(transaction)
+        for sibling, side in proof:
+            sibling = bytes.fromhex(sibling)
+            if side == "left":
+                current = hash_pair_bytes(sibling, current)
+            else:
+                current = hash_pair_bytes(current, sibling)
+        return current.hex() == root
+        
+    current = hash_transaction(transaction)
+    for sibling, side in proof:
+        if side == "left":
+            current = hash_pair(sibling, current)
+        else:
+            current = hash_pair(current, sibling)
+    return current == root
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from .binary_codec import CURRENT_BLOCK_VERSION
+from .block import Block
+from .blockchain import Blockchain
+from .proof_of_work import ProofOfWork
+from .utils.timestamp import get_current_timestamp
+
+# Nonces a node tries before yielding to the event loop
+HASH_BATCH = 500
+
+class SimulatedNode:
+    """
+    A node of the simulated network.
+
+    Each node keeps its own block tree, mines on top of its best tip and gossips
+    every new block to its peers. Forks are resolved by chain length; on a tie the
+    block that arrived first is kept.
+    """
+
+    def __init__(self, node_id, network, genesis_block):
+        self.node_id = node_id
+        self.network = network
+        self.peers = []
+        self.blocks = {genesis_block.hash: genesis_block}
+        self.heights = {genesis_block.hash: 0}
+        self.orphans = {}
+        self.best_tip = genesis_block.hash
+        self.mined = 0
+
+    @property
+    def best_height(self):
+        return self.heights[self.best_tip]
+
+    def main_chain(self):
+        """Return the hashes of the best chain, from the tip back to genesis"""
+        chain = []
+        block_hash = self.best_tip
+        while block_hash in self.blocks:
+            chain.append(block_hash)
+            block_hash = self.blocks[block_hash].previous_hash
+        return chain
+
+    async def mine(self):
+        """Mine blocks on the current best tip until the network stops"""
+        proof_of_work = self.network.proof_of_work
+        while self.network.running:
+            parent_hash = self.best_tip
+            block = Block(
+                index=self.heights[parent_hash] + 1,
+                timestamp=get_current_timestamp(),
+                data=f"Node {self.node_id} block {self.mined}",
+                previous_hash=parent_hash,
+                nonce=0,
+                version=CURRENT_BLOCK_VERSION
+            )
+            hasher = block.header_hasher()
+            nonce = random.getrandbits(32)
+
+            # Search in small batches so other nodes and deliveries get to run
+            while self.network.running and self.best_tip == parent_hash:
+                for nonce in range(nonce, nonce + HASH_BATCH):
+                    block_hash = hasher.hash(nonce)
+                    if proof_of_work.is_valid_hash(block_hash):
+                        block.nonce = nonce
+                        block.hash = block_hash
+                        break
+                else:
+                    nonce += 1
+                    await asyncio.sleep(0)
+                    continue
+
+                self.mined += 1
+                self.network.record_mined(block, self.node_id)
+                self.receive(block, sender=None)
+                break
+
+    def receive(self, block, sender):
+        """Accept a block from a peer (or from our own miner) and gossip it on"""
+        if block.hash in self.blocks:
+            return
+        if not self.network.proof_of_work.is_valid_hash(block.hash) or block.calculate_hash() != block.hash:
+            return
+
+        if block.previous_hash not in self.blocks:
+            # Parent hasn't arrived yet, keep the block until it does
+            self.orphans.setdefault(block.previous_hash, []).append(block)
+            return
+
+        self.network.record_arrival(block.hash, self.node_id)
+        self.blocks[block.hash] = block
+        self.heights[block.hash] = self.heights[block.previous_hash] + 1
+        if self.heights[block.hash] > self.best_height:
+            self.best_tip = block.hash
+
+        for peer in self.peers:
+            if peer is not sender:
+                self.network.send(block, self, peer)
+
+        for orphan in self.orphans.pop(block.hash, []):
+            self.receive(orphan, sender=None)
+
+class NetworkSimulator:
+    """
+    Run N nodes in one asyncio event loop and measure block propagation.
+
+    Every link delays a block by latency (plus up to jitter seconds of random
+    delay) and by its size divided by bandwidth (bytes per second). Nodes are
+    connected to `peers` random other nodes, or to all of them when peers is None.
+    """
+
+    def __init__(self, node_count, difficulty=3, latency=0.05, jitter=0.02, bandwidth=1_000_000,
+                 peers=None, seed=None):
+        self.random = random.Random(seed)
+        self.proof_of_work = ProofOfWork(difficulty=difficulty)
+        self.difficulty = difficulty
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.running = False
+        self.mined_at = {}
+        self.arrivals = {}
+
+        genesis_block = Blockchain().chain[0]
+        self.nodes = [SimulatedNode(i, self, genesis_block) for i in range(node_count)]
+        for node in self.nodes:
+            others = [peer for peer in self.nodes if peer is not node]
+            if peers is not None and peers < len(others):
+                others = self.random.sample(others, peers)
+            for peer in others:
+                if peer not in node.peers:
+                    node.peers.append(peer)
+                if node not in peer.peers:
+                    peer.peers.append(node)
+
+    def record_mined(self, block, node_id):
+        self.mined_at[block.hash] = (time.monotonic(), node_id)
+
+    def record_arrival(self, block_hash, node_id):
+        self.arrivals.setdefault(block_hash, {})[node_id] = time.monotonic()
+
+    def send(self, block, sender, receiver):
+        size = len(json.dumps({
+            "index": block.index,
+            "hash": block.hash,
+            "previous_hash": block.previous_hash,
+            "timestamp": block.timestamp,
+            "data": block.data,
+            "nonce": block.nonce,
+            "merkle_root": block.merkle_root
+        }).encode())
+        delay = self.latency + self.random.uniform(0, self.jitter) + size / self.bandwidth
+        asyncio.get_running_loop().call_later(delay, receiver.receive, block, sender)
+
+    async def run(self, duration):
+        """Mine and gossip for duration seconds, then return the metrics"""
+        self.running = True
+        start = time.monotonic()
+        tasks = [asyncio.create_task(node.mine()) for node in self.nodes]
+        await asyncio.sleep(duration)
+        self.running = False
+        await asyncio.gather(*tasks)
+        # Let blocks that are still in flight arrive
+        await asyncio.sleep(self.latency + self.jitter)
+        return self.metrics(time.monotonic() - start)
+
+    def metrics(self, elapsed):
+        """Propagation latency, orphan rate and throughput of the last run"""
+        delays = []
+        full_propagation = []
+        for block_hash, (mined_time, miner) in self.mined_at.items():
+            arrivals = self.arrivals.get(block_hash, {})
+            block_delays = [at - mined_time for node_id, at in arrivals.items() if node_id != miner]
+            delays.extend(block_delays)
+            if len(arrivals) == len(self.nodes) and block_delays:
+                full_propagation.append(max(block_delays))
+
+        # The chain most nodes agree on is taken as the canonical one
+        tips = [node.best_tip for node in self.nodes]
+        reference = max(self.nodes, key=lambda node: (tips.count(node.best_tip), node.best_height))
+        main_chain = set(reference.main_chain())
+        mined = len(self.mined_at)
+        stale = sum(1 for block_hash in self.mined_at if block_hash not in main_chain)
+
+        return {
+            "nodes": len(self.nodes),
+            "difficulty": self.difficulty,
+            "duration": elapsed,
+            "blocks_mined": mined,
+            "main_chain_length": reference.best_height,
+            "orphan_rate": stale / mined if mined else 0.0,
+            "throughput_blocks_per_sec": reference.best_height / elapsed if elapsed else 0.0,
+            "propagation_mean": statistics.mean(delays) if delays else None,
+            "propagation_p90": _percentile(delays, 0.9),
+            "full_propagation_mean": statistics.mean(full_propagation) if full_propagation else None,
+            "tip_agreement": tips.count(reference.best_tip) / len(self.nodes)
+        }
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def simulate(node_counts, difficulties, duration=10, **network_options):
+    """Run one simulation per (node count, difficulty) pair and return their metrics"""
+    results = []
+    for difficulty in difficulties:
+        for node_count in node_counts:
+            simulator = NetworkSimulator(node_count, difficulty=difficulty, **network_options)
+            results.append(asyncio.run(simulator.run(duration)))
+    return results
@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .binary_codec import BLOCK_VERSION_JSON, load_block_file
+from .block import Block
+
+# Number of block files handed to a worker process at a time
+DEFAULT_CHUNK_SIZE = 500
+
+def hash_block_files(files):
+    """
+    Load block files and recompute their hashes (runs in a worker process).
+
+    Returns one entry per file: the stored header fields (without the data payload)
+    plus "calculated_hash", or {"file", "error"} if the file could not be read or
+    parsed (e.g. it was removed after the list of files was taken).
+    """
+    results = []
+    for file in files:
+        try:
+            block_data = load_block_file(file)
+        except (OSError, ValueError) as e:
+            results.append({"file": file, "error": str(e)})
+            continue
+
+        temp_block = Block(
+            index=block_data["index"],
+            timestamp=block_data["timestamp"],
+            data=block_data["data"],
+            previous_hash=block_data["previous_hash"],
+            nonce=block_data["nonce"],
+            version=block_data.get("version", BLOCK_VERSION_JSON)
+        )
+        header = {key: value for key, value in block_data.items() if key != "data"}
+        header["file"] = file
+        header["calculated_hash"] = temp_block.calculate_hash()
+        results.append(header)
+    return results
+
+def iter_hashed_blocks(files, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recompute block hashes across a process pool, yielding results in the order of files.
+
+    Stopping the iteration early cancels the chunks that have not started yet.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for results in executor.map(hash_block_files, chunks):
+            yield from results
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,15 +1,271 @@
-import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .utils import metrics
+from .utils.timestamp import parse_timestamp
+
+# Number of nonces a worker tests before checking whether it should stop
+NONCE_CHUNK_SIZE = 10000
+
+HASH_BITS = 256
+# Same work as the original fixed difficulty of 3 leading hex zeros
+DEFAULT_DIFFICULTY_BITS = 12
+
+# Current target of a DLT folder, kept next to the block files
+DIFFICULTY_FILE = "difficulty.json"
 
 class ProofOfWork:
-    def __init__(self, difficulty=3):
+    """
+    A hash is valid when its integer value is below the target.
+
+    The target can be given as leading hex zeros (difficulty, the original
+    setting: each step is 16x the work), as leading zero bits (bits, 2x per step)
+    or directly as an integer (target_value), which is what retargeting adjusts.
+
+    For compatibility with the original class, difficulty is an int when the
+    target is a whole number of hex zeros and target is still the prefix of
+    '0' * (bits // 4). Targets between hex digits (bits not a multiple of 4, or
+    after a retarget) give a fractional difficulty of bits / 4, and the prefix
+    alone is then easier than the real check on target_value. A fractional
+    difficulty can be passed back in: it is rounded to whole bits.
+    """
+
+    def __init__(self, difficulty=None, bits=None, target_value=None):
+        if target_value is None:
+            if bits is None:
+                bits = round(4 * difficulty) if difficulty is not None else DEFAULT_DIFFICULTY_BITS
+            target_value = 1 << (HASH_BITS - bits)
+        self.target_value = max(1, min(target_value, 1 << HASH_BITS))
+        self.bits = HASH_BITS - (self.target_value.bit_length() - 1)
+        if not isinstance(difficulty, int):
+            difficulty = self.bits // 4 if self.bits % 4 == 0 else self.bits / 4
         self.difficulty = difficulty
-        self.target = '0' * difficulty
-        
+        self.target = '0' * (self.bits // 4)
+
+    @property
+    def work(self):
+        """Expected number of hashes needed to find a valid one"""
+        return (1 << HASH_BITS) // self.target_value
+
+    @metrics.timed("pow_mine_seconds", "Time to mine a block")
     def mine(self, block):
-        while not self.is_valid(block):
-            block.nonce += 1
-            block.update_hash()
+        # Only the nonce changes between attempts, so hash from a precomputed header midstate
+        hasher = block.header_hasher()
+        nonce = block.nonce
+        block_hash = hasher.hash(nonce)
+        while not self.is_valid_hash(block_hash):
+            nonce += 1
+            block_hash = hasher.hash(nonce)
+        self._record_mined(nonce - block.nonce + 1)
+        block.nonce = nonce
+        block.hash = block_hash
+        return block
+
+    @metrics.timed("pow_mine_parallel_seconds", "Time to mine a block across worker processes")
+    def mine_parallel(self, block, workers=None, timeout=None, cancel_event=None):
+        """
+        Search the nonce space across a pool of worker processes.
+
+        Worker i tests the nonce ranges starting at block.nonce + i * NONCE_CHUNK_SIZE
+        and then every `workers` chunks after that. As soon as one worker finds a
+        valid nonce all the others are stopped.
+
+        Args:
+            block: Block to mine, updated in place with the winning nonce and hash
+            workers: Number of worker processes (defaults to the CPU count)
+            timeout: Maximum number of seconds to search before giving up
+            cancel_event: Optional event (threading or multiprocessing) that stops the search when set
+
+        Returns:
+            Block: The mined block, or None if the search timed out or was cancelled
+        """
+        workers = workers or os.cpu_count() or 1
+        if self.is_valid(block):
+            return block
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        context = multiprocessing.get_context()
+        stop_event = context.Event()
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_search_nonces,
+                args=(self, block, block.nonce + i * NONCE_CHUNK_SIZE, workers, stop_event, results),
+                daemon=True
+            )
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        winner = None
+        try:
+            while winner is None:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                try:
+                    winner = results.get(timeout=0.05)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        break
+        finally:
+            stop_event.set()
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            results.close()
+
+        if winner is None:
+            return None
+
+        # Workers search interleaved ranges, so this is an estimate of the nonces tried
+        self._record_mined(winner[0] - block.nonce + 1)
+        block.nonce, block.hash = winner
         return block
-        
+
+    def _record_mined(self, nonces_tried):
+        registry = metrics.get_registry()
+        registry.counter("pow_nonces_tried_total", "Nonces tested while mining").inc(nonces_tried)
+        registry.counter("pow_blocks_mined_total", "Blocks mined").inc()
+
     def is_valid(self, block):
-        return block.hash.startswith(self.target)
\ No newline at end of file
+        return self.is_valid_hash(block.hash)
+
+    def is_valid_hash(self, block_hash):
+        return int(block_hash, 16) < self.target_value
+
+class RetargetPolicy:
+    """
+    Adjust the target every `interval` blocks to hold target_block_time seconds per block.
+
+    The target is scaled by the ratio between the observed and the expected time
+    of the last interval, limited to max_factor in either direction, so the work
+    changes smoothly instead of in powers of 16.
+    """
+
+    def __init__(self, target_block_time, interval=10, max_factor=4.0):
+        if interval < 2:
+            raise ValueError("The retarget interval must be at least 2 blocks")
+        self.target_block_time = target_block_time
+        self.interval = interval
+        self.max_factor = max_factor
+
+    def is_retarget_height(self, height):
+        return height >= self.interval and height % self.interval == 0
+
+    def retarget(self, proof_of_work, first_timestamp, last_timestamp):
+        """
+        Return the ProofOfWork for the next interval.
+
+        Args:
+            first_timestamp, last_timestamp: Timestamps of the first and last block of
+                the interval that just ended
+        """
+        first, last = parse_timestamp(first_timestamp), parse_timestamp(last_timestamp)
+        if first is None or last is None:
+            return proof_of_work
+        expected = (self.interval - 1) * self.target_block_time
+        # Clock skew can make the span zero or negative, clamp it like any other outlier
+        factor = max(1 / self.max_factor, min(self.max_factor, (last - first) / expected))
+        return ProofOfWork(target_value=int(proof_of_work.target_value * factor))
+
+def read_difficulty(folder):
+    """
+    Read the target stored for a DLT folder.
+
+    Returns:
+        tuple: (ProofOfWork, height it applies from), or (None, None) if there is none
+    """
+    try:
+        with open(os.path.join(folder, DIFFICULTY_FILE), 'r') as file:
+            state = json.load(file)
+        return ProofOfWork(target_value=int(state["target"], 16)), state["height"]
+    except (OSError, json.JSONDecodeError, KeyError, ValueError):
+        return None, None
+
+def write_difficulty(folder, proof_of_work, height):
+    """Atomically record the target in force from block height onwards"""
+    difficulty_file = os.path.join(folder, DIFFICULTY_FILE)
+    with open(difficulty_file + ".tmp", 'w') as file:
+        json.dump({"height": height, "target": format(proof_of_work.target_value, "x"), "bits": proof_of_work.bits},
+                  file, indent=4)
+    os.replace(difficulty_file + ".tmp", difficulty_file)
+
+def next_proof_of_work(folder, height, block_timestamp, bits=None, policy=None):
+    """
+    Return the ProofOfWork to mine block `height` of a DLT folder with.
+
+    The target starts from the one stored in the folder (bits, when given,
+    replaces it) and, at retarget heights of policy, is adjusted from the
+    timestamps of the previous interval. block_timestamp(index) must return the
+    stored timestamp of a block. Any change is written back to the folder.
+    """
+    proof_of_work, since = read_difficulty(folder) if bits is None else (None, None)
+    changed = proof_of_work is None
+    if proof_of_work is None:
+        proof_of_work = ProofOfWork(bits=bits if bits is not None else DEFAULT_DIFFICULTY_BITS)
+
+    # A retarget recorded for this height was already applied (e.g. mining was interrupted)
+    if policy is not None and policy.is_retarget_height(height) and (changed or since != height):
+        proof_of_work = policy.retarget(proof_of_work, block_timestamp(height - policy.interval),
+                                        block_timestamp(height - 1))
+        changed = True
+
+    if changed:
+        write_difficulty(folder, proof_of_work, height)
+    return proof_of_work
+
+def mine_blocks(proof_of_work, blocks, workers=None):
+    """
+    Mine independent blocks at the same time, one block per worker process.
+
+    Unlike mine_parallel, which splits the nonces of one block across processes,
+    each process mines a whole block, so this fits blocks that don't depend on
+    each other's hashes (siblings in the tree DLT). A single block is mined with
+    mine_parallel instead. Blocks are updated in place with their nonce and hash.
+
+    Returns:
+        list: The mined blocks, in the order given
+    """
+    workers = workers or os.cpu_count() or 1
+    if len(blocks) == 1 and workers > 1:
+        proof_of_work.mine_parallel(blocks[0], workers=workers)
+        return blocks
+    if workers == 1 or len(blocks) <= 1:
+        for block in blocks:
+            proof_of_work.mine(block)
+        return blocks
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(blocks))) as executor:
+        futures = [executor.submit(_mine_block, proof_of_work, block) for block in blocks]
+        for block, future in zip(blocks, futures):
+            nonce, block_hash = future.result()
+            proof_of_work._record_mined(nonce - block.nonce + 1)
+            block.nonce, block.hash = nonce, block_hash
+    return blocks
+
+def _mine_block(proof_of_work, block):
+    """Worker task for mine_blocks, returning the winning (nonce, hash)"""
+    proof_of_work.mine(block)
+    return block.nonce, block.hash
+
+def _search_nonces(proof_of_work, block, start, workers, stop_event, results):
+    """Worker loop for ProofOfWork.mine_parallel"""
+    hasher = block.header_hasher()
+    stride = NONCE_CHUNK_SIZE * workers
+    chunk_start = start
+    while not stop_event.is_set():
+        for nonce in range(chunk_start, chunk_start + NONCE_CHUNK_SIZE):
+            block_hash = hasher.hash(nonce)
+            if proof_of_work.is_valid_hash(block_hash):
+                results.put((nonce, block_hash))
+                stop_event.set()
+                return
+        chunk_start += stride
@@ -0,0 +1,175 @@
+import bisect
+import json
+import os
+import struct
+from .binary_codec import block_files, load_block_file
+from .index_store import IndexStore
+from .merkle_tree import hash_transaction
+from .utils.timestamp import parse_timestamp
+
+LOOKUP_TABLE = "lookup_index"
+TIMESTAMP_FILE = "timestamps.idx"
+# (seconds since the epoch, block index), sorted by timestamp then index
+TIMESTAMP_ENTRY = struct.Struct("<dQ")
+
+def block_transactions(block_data):
+    """The transactions of stored block data, as Block.transactions builds them"""
+    data = block_data["data"]
+    if not data:
+        return ["Genesis"]
+    return list(data) if isinstance(data, (list, tuple)) else [data]
+
+def _range_bound(timestamp):
+    seconds = parse_timestamp(timestamp)
+    if seconds is None:
+        raise ValueError(f"Invalid timestamp: {timestamp}")
+    return seconds
+
+class _TimestampColumn:
+    """Read-only sequence view of the timestamps in the timestamp file, for bisect"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def __len__(self):
+        self.file.seek(0, os.SEEK_END)
+        return self.file.tell() // TIMESTAMP_ENTRY.size
+
+    def __getitem__(self, position):
+        return self.entry(position)[0]
+
+    def entry(self, position):
+        self.file.seek(position * TIMESTAMP_ENTRY.size)
+        return TIMESTAMP_ENTRY.unpack(self.file.read(TIMESTAMP_ENTRY.size))
+
+class SecondaryIndex:
+    """
+    Lookup indexes shared by the linear and the tree DLT folders.
+
+    - lookup_index table of the folder's IndexStore: exact block hash -> file
+      name, block index -> file name, and transaction hash (the Merkle leaf hash)
+      -> [block index, position] of every block holding that transaction. Adding
+      a block costs the same however many blocks are indexed.
+    - timestamps.idx: fixed-width (timestamp, index) records kept sorted, so a
+      timestamp range is found with two binary searches.
+
+    Blocks are added as they are written; rebuild() recreates everything from the
+    block files of the folder. Pass the store of an insert to share it with the
+    other indexes; it is then left open by close().
+    """
+
+    def __init__(self, folder, store=None):
+        self.folder = folder
+        self.owns_store = store is None
+        self.store = IndexStore(folder) if store is None else store
+        self.db = self.store.table(LOOKUP_TABLE)
+        path = os.path.join(folder, TIMESTAMP_FILE)
+        self.timestamp_file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        self.timestamps = _TimestampColumn(self.timestamp_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.timestamp_file.close()
+        if self.owns_store:
+            self.store.close()
+
+    def is_empty(self):
+        return self.db.is_empty()
+
+    def add_block(self, block_data, filename):
+        """Index a block that was written to filename (a name inside the folder)"""
+        if "h:" + block_data["hash"] in self.db:
+            return False
+        self._add_lookups(block_data, filename)
+        seconds = parse_timestamp(block_data["timestamp"])
+        if seconds is not None:
+            self._insert_timestamp(seconds, block_data["index"])
+        return True
+
+    def _add_lookups(self, block_data, filename):
+        self.db["h:" + block_data["hash"]] = filename
+        self.db["i:" + str(block_data["index"])] = filename
+
+        for position, transaction in enumerate(block_transactions(block_data)):
+            key = "x:" + hash_transaction(transaction)
+            locations = json.loads(self.db[key]) if key in self.db else []
+            locations.append([block_data["index"], position])
+            self.db[key] = json.dumps(locations)
+
+    def _insert_timestamp(self, seconds, block_index):
+        entry = (seconds, block_index)
+        # Blocks almost always arrive in timestamp order, so this is usually an append
+        position = bisect.bisect_right(self.timestamps, seconds)
+        while position > 0 and self.timestamps.entry(position - 1) > entry:
+            position -= 1
+        self.timestamp_file.seek(position * TIMESTAMP_ENTRY.size)
+        tail = self.timestamp_file.read()
+        self.timestamp_file.seek(position * TIMESTAMP_ENTRY.size)
+        self.timestamp_file.write(TIMESTAMP_ENTRY.pack(*entry) + tail)
+        self.timestamp_file.flush()
+
+    def _read(self, filename):
+        if filename is None:
+            return None
+        return load_block_file(os.path.join(self.folder, filename))
+
+    def block_by_hash(self, block_hash):
+        """Return the block with exactly this hash, or None"""
+        return self._read(self.db.get("h:" + block_hash))
+
+    def block_by_index(self, block_index):
+        return self._read(self.db.get("i:" + str(block_index)))
+
+    def indices_in_range(self, start=None, end=None):
+        """Return the block indices with start <= timestamp < end, in timestamp order"""
+        low = 0 if start is None else bisect.bisect_left(self.timestamps, _range_bound(start))
+        high = len(self.timestamps) if end is None else bisect.bisect_left(self.timestamps, _range_bound(end))
+        return [self.timestamps.entry(position)[1] for position in range(low, high)]
+
+    def blocks_in_range(self, start=None, end=None):
+        """Yield the blocks with start <= timestamp < end (ISO 8601 strings), in timestamp order"""
+        for block_index in self.indices_in_range(start, end):
+            yield self.block_by_index(block_index)
+
+    def transaction_locations(self, transaction_hash):
+        """Return the (block index, position in the block) pairs holding a transaction hash"""
+        key = "x:" + transaction_hash
+        return [tuple(location) for location in json.loads(self.db[key])] if key in self.db else []
+
+    def find_transaction(self, transaction):
+        """Return the (block index, position) pairs holding a transaction"""
+        return self.transaction_locations(hash_transaction(transaction))
+
+    def rebuild(self):
+        """Rebuild the indexes from the block files of the folder (one full scan)"""
+        self.timestamp_file.truncate(0)
+
+        # Timestamps are sorted once at the end instead of inserted one by one
+        entries = []
+        count = 0
+        with self.store.batch():
+            self.db.clear()
+            for file in block_files(self.folder):
+                block_data = load_block_file(file)
+                self._add_lookups(block_data, os.path.basename(file))
+                seconds = parse_timestamp(block_data["timestamp"])
+                if seconds is not None:
+                    entries.append((seconds, block_data["index"]))
+                count += 1
+        entries.sort()
+        self.timestamp_file.seek(0)
+        self.timestamp_file.write(b"".join(TIMESTAMP_ENTRY.pack(*entry) for entry in entries))
+        self.timestamp_file.flush()
+        return count
+
+def open_secondary_index(folder, store=None):
+    """Open the lookup indexes of a DLT folder, building them from the block files the first time"""
+    index = SecondaryIndex(folder, store)
+    if index.is_empty() and block_files(folder):
+        index.rebuild()
+    return index
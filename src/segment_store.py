@@ -0,0 +1,146 @@
+import json
+import mmap
+import os
+import struct
+
+# Index entry: segment number, offset in the segment, record length, raw block hash
+INDEX_ENTRY = struct.Struct("<IQI32s")
+INDEX_FILE = "index.bin"
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+class SegmentStore:
+    """
+    Append-only block storage for the linear DLT.
+
+    Blocks are appended as compact JSON records to size-capped segment files
+    (segment_000000.log, segment_000001.log, ...). index.bin holds one fixed-width
+    entry per block, so entry i sits at offset i * INDEX_ENTRY.size and a block is
+    read by index or hash with a single seek into its segment.
+    """
+
+    def __init__(self, folder, segment_size=DEFAULT_SEGMENT_SIZE, use_mmap=False):
+        self.folder = folder
+        self.segment_size = segment_size
+        self.use_mmap = use_mmap
+        os.makedirs(folder, exist_ok=True)
+
+        self._maps = {}
+        self._by_hash = None
+        self._index_file = open(os.path.join(folder, INDEX_FILE), "a+b")
+        self._index = self._load_index()
+
+        self._segment = self._entry(len(self) - 1)[0] if len(self) else 0
+        self._segment_file = open(self._segment_path(self._segment), "ab")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.folder, f"segment_{segment:06d}.log")
+
+    def _load_index(self):
+        self._index_file.seek(0)
+        index = bytearray(self._index_file.read())
+        # Drop a partially written trailing entry
+        usable = len(index) - len(index) % INDEX_ENTRY.size
+        if usable != len(index):
+            self._index_file.truncate(usable)
+            del index[usable:]
+        return index
+
+    def _entry(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("block index out of range")
+        return INDEX_ENTRY.unpack_from(self._index, index * INDEX_ENTRY.size)
+
+    def _hash_lookup(self):
+        # Built on first use so opening a store only costs reading index.bin
+        if self._by_hash is None:
+            self._by_hash = {
+                entry[3]: position
+                for position, entry in enumerate(INDEX_ENTRY.iter_unpack(self._index))
+            }
+        return self._by_hash
+
+    def __len__(self):
+        return len(self._index) // INDEX_ENTRY.size
+
+    def __contains__(self, block_hash):
+        return bytes.fromhex(block_hash) in self._hash_lookup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def append(self, block_data):
+        """Append a block dict; its index must be the next height in the store"""
+        if block_data["index"] != len(self):
+            raise ValueError(f"Expected block {len(self)}, got block {block_data['index']}")
+
+        record = json.dumps(block_data, separators=(",", ":")).encode() + b"\n"
+        offset = self._segment_file.tell()
+        if offset and offset + len(record) > self.segment_size:
+            # Current segment is full, roll over to a new one
+            self._segment_file.close()
+            self._segment += 1
+            self._segment_file = open(self._segment_path(self._segment), "ab")
+            offset = 0
+
+        self._segment_file.write(record)
+        block_hash = bytes.fromhex(block_data["hash"])
+        entry = INDEX_ENTRY.pack(self._segment, offset, len(record), block_hash)
+        self._index_file.write(entry)
+        self._index += entry
+        if self._by_hash is not None:
+            self._by_hash[block_hash] = block_data["index"]
+        self.flush()
+
+    def flush(self, fsync=False):
+        """Flush buffered writes, optionally forcing them to disk"""
+        for handle in (self._segment_file, self._index_file):
+            handle.flush()
+            if fsync:
+                os.fsync(handle.fileno())
+
+    def read(self, index):
+        """Read the block dict stored at index"""
+        segment, offset, length, _ = self._entry(index)
+        if self.use_mmap:
+            record = self._mapped(segment, offset + length)[offset:offset + length]
+        else:
+            with open(self._segment_path(segment), "rb") as file:
+                file.seek(offset)
+                record = file.read(length)
+        return json.loads(record)
+
+    def read_by_hash(self, block_hash):
+        """Read the block dict with the given hex hash, or None if it is not stored"""
+        index = self._hash_lookup().get(bytes.fromhex(block_hash))
+        return None if index is None else self.read(index)
+
+    def _mapped(self, segment, end):
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            # The active segment may have grown since it was mapped
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(segment), "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.read(index)
+
+    @property
+    def last_block(self):
+        return self.read(len(self) - 1) if len(self) else None
+
+    def close(self):
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+        self._segment_file.close()
+        self._index_file.close()
@@ -0,0 +1,248 @@
+import json
+import os
+from .binary_codec import block_files, load_block_file
+from .index_store import IndexStore
+from .utils import metrics
+
+INDEX_TABLE = "tree_index"
+FRONTIER_FILE = "frontier.log"
+FRONTIER_HEAD_FILE = "frontier_head.json"
+# Each frontier record is a block hash followed by a newline
+FRONTIER_RECORD_SIZE = 65
+
+class TreeIndex:
+    """
+    Persistent lookup structures for the tree DLT.
+
+    - tree_index table of the folder's IndexStore: exact block hash -> block file
+      name, block hash -> child links, and the highest block index. Child links
+      live here so adding a child never rewrites the parent's JSON file.
+      Updating it costs the same however many blocks the tree holds.
+    - frontier.log: the hash of every block in insertion order, as fixed-width
+      records. Blocks are filled breadth-first, so the blocks that can still take
+      children are exactly the records from the head onwards.
+    - frontier_head.json: position of the first block with a free child slot.
+
+    Pass the store of an insert to share it with the other indexes of the folder;
+    it is then left open by close().
+    """
+
+    def __init__(self, folder="dlt_tree", store=None):
+        self.folder = folder
+        self.owns_store = store is None
+        self.store = IndexStore(folder) if store is None else store
+        self.db = self.store.table(INDEX_TABLE)
+        self.frontier = open(os.path.join(folder, FRONTIER_FILE), 'a+b')
+        self.head = self._read_head()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.frontier.close()
+        if self.owns_store:
+            self.store.close()
+
+    def _read_head(self):
+        try:
+            with open(os.path.join(self.folder, FRONTIER_HEAD_FILE), 'r') as file:
+                return json.load(file)["head"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return 0
+
+    def _write_head(self):
+        head_file = os.path.join(self.folder, FRONTIER_HEAD_FILE)
+        with open(head_file + ".tmp", 'w') as file:
+            json.dump({"head": self.head}, file)
+        os.replace(head_file + ".tmp", head_file)
+
+    def is_empty(self):
+        return "height" not in self.db
+
+    @property
+    def height(self):
+        """Highest block index in the tree, or -1 if there are no blocks"""
+        return int(self.db["height"]) if "height" in self.db else -1
+
+    def locate(self, block_hash):
+        """Return the path of the block file with this exact hash, or None"""
+        filename = self.db.get("h:" + block_hash)
+        return os.path.join(self.folder, filename) if filename else None
+
+    def children(self, block_hash):
+        """Return the (left_child, right_child) hashes of a block"""
+        links = self.db.get("c:" + block_hash)
+        return tuple(json.loads(links)) if links else (None, None)
+
+    def frontier_size(self):
+        return os.path.getsize(os.path.join(self.folder, FRONTIER_FILE)) // FRONTIER_RECORD_SIZE
+
+    def frontier_hash(self, position):
+        """Return the block hash stored at a position of the frontier log"""
+        self.frontier.seek(position * FRONTIER_RECORD_SIZE)
+        return self.frontier.read(FRONTIER_RECORD_SIZE).decode().strip()
+
+    def next_parent(self):
+        """Return the hash of the first block (breadth-first) that can accept a child, or None"""
+        while self.head < self.frontier_size():
+            block_hash = self.frontier_hash(self.head)
+            if None in self.children(block_hash):
+                return block_hash
+            # Head is full (e.g. after a rebuild), move on
+            self.head += 1
+            self._write_head()
+        return None
+
+    def free_slots(self, count):
+        """
+        Return the parent hashes of the next `count` free child slots, breadth-first.
+
+        A block with both slots free appears twice. These are the slots that many
+        add_child calls would fill one after the other, so blocks mined for them
+        at once give the same tree as adding them one by one.
+        """
+        # Move the head past full blocks first
+        self.next_parent()
+        slots = []
+        position = self.head
+        while len(slots) < count and position < self.frontier_size():
+            block_hash = self.frontier_hash(position)
+            free = self.children(block_hash).count(None)
+            slots.extend([block_hash] * min(free, count - len(slots)))
+            position += 1
+        return slots
+
+    def add_block(self, block_index, block_hash, filename):
+        """Register a new block file and append it to the frontier"""
+        self.db["h:" + block_hash] = filename
+        self.db["height"] = str(max(self.height, block_index))
+        self.frontier.write(block_hash.encode().ljust(FRONTIER_RECORD_SIZE - 1) + b"\n")
+        self.frontier.flush()
+
+    def set_file(self, block_hash, filename):
+        """Point a block at another file of the folder (after its file was rewritten)"""
+        self.db["h:" + block_hash] = filename
+
+    def add_child(self, parent_hash, child_hash):
+        """Record child_hash in the first free slot of parent_hash, returning the slot or None if full"""
+        left, right = self.children(parent_hash)
+        if left is None:
+            side, left = "left", child_hash
+        elif right is None:
+            side, right = "right", child_hash
+        else:
+            return None
+        self.db["c:" + parent_hash] = json.dumps([left, right])
+
+        # The head stays on a block until both of its slots are taken
+        if right is not None and self.head < self.frontier_size() and self.frontier_hash(self.head) == parent_hash:
+            self.head += 1
+            self._write_head()
+        return side
+
+    def read_block(self, block_hash):
+        """Load a block file by hash, with its child links filled in from the index"""
+        path = self.locate(block_hash)
+        if path is None:
+            raise FileNotFoundError(f"Block {block_hash[:8]} is not in the tree index")
+        with metrics.get_registry().timer("block_load_seconds", "Time to read and parse a block file"):
+            block_data = load_block_file(path)
+        block_data["left_child"], block_data["right_child"] = self.children(block_hash)
+        return block_data
+
+    def iter_blocks(self, start=0, stop=None):
+        """Yield the blocks in insertion (index) order, reading one file at a time"""
+        size = self.frontier_size()
+        stop = size if stop is None else min(stop, size)
+        for position in range(max(start, 0), stop):
+            yield self.read_block(self.frontier_hash(position))
+
+    def walk(self, root_hash=None):
+        """
+        Depth-first, pre-order traversal (left child first) from root_hash, genesis by default.
+
+        Yields (depth, block_hash, is_last) where is_last tells whether the block is
+        the last child of its parent. Only the pending right siblings along the
+        current path are kept, so memory grows with the depth of the tree.
+        """
+        if root_hash is None:
+            if self.frontier_size() == 0:
+                return
+            root_hash = self.frontier_hash(0)
+        stack = [(0, root_hash, True)]
+        while stack:
+            depth, block_hash, is_last = stack.pop()
+            yield depth, block_hash, is_last
+            left, right = self.children(block_hash)
+            # Links to blocks without a file are skipped
+            if right and self.locate(right):
+                stack.append((depth + 1, right, True))
+            if left and self.locate(left):
+                stack.append((depth + 1, left, right is None))
+
+    def rebuild(self):
+        """Rebuild the index from the block files of the folder (one full scan)"""
+        blocks = []
+        for file in block_files(self.folder):
+            block_data = load_block_file(file, bodies=False)
+            blocks.append((block_data["index"], block_data, os.path.basename(file)))
+        blocks.sort(key=lambda x: x[0])
+
+        # Child links live in this index. Files written before it keep theirs in
+        # left_child/right_child: those are kept as stored, so validation still checks
+        # them against each child's parent_hash. Other links come from the children's
+        # parent_hash: in index order, a child takes the first free slot of its parent
+        parents = {block_data["hash"]: block_data.get("parent_hash") for _, block_data, _ in blocks}
+        children = {}
+        for _, block_data, _ in blocks:
+            links = [block_data.get("left_child"), block_data.get("right_child")]
+            if any(links):
+                children[block_data["hash"]] = links
+            for child_hash in filter(None, links):
+                if parents.get(child_hash) != block_data["hash"]:
+                    print(f"Warning: Block {block_data['index']} lists child {child_hash[:8]}, "
+                          "which doesn't reference it as parent")
+        for _, block_data, _ in blocks:
+            parent_hash = block_data.get("parent_hash")
+            if parent_hash:
+                links = children.setdefault(parent_hash, [None, None])
+                if block_data["hash"] not in links and None in links:
+                    links[links.index(None)] = block_data["hash"]
+
+        with self.store.batch():
+            self.db.clear()
+            self.frontier.truncate(0)
+            self.head = 0
+            for index, block_data, filename in blocks:
+                self.db["h:" + block_data["hash"]] = filename
+                self.db["height"] = str(index)
+                self.frontier.write(block_data["hash"].encode().ljust(FRONTIER_RECORD_SIZE - 1) + b"\n")
+            for parent_hash, links in children.items():
+                self.db["c:" + parent_hash] = json.dumps(links)
+        self.frontier.flush()
+
+        # Skip past blocks whose slots are already filled
+        self._write_head()
+        self.next_parent()
+        return len(blocks)
+
+def open_tree_index(folder="dlt_tree", store=None):
+    """Open the index of a tree folder, building it from the block files the first time"""
+    index = TreeIndex(folder, store)
+    if index.is_empty() and block_files(folder):
+        index.rebuild()
+    return index
+
+def iter_tree_blocks(folder="dlt_tree", start=0, stop=None):
+    """Yield the blocks of a tree folder in index order, with their child links"""
+    with open_tree_index(folder) as index:
+        yield from index.iter_blocks(start, stop)
+
+def walk_tree(folder="dlt_tree", root_hash=None):
+    """Yield (depth, block_data, is_last) for the blocks of a tree folder, depth-first from genesis"""
+    with open_tree_index(folder) as index:
+        for depth, block_hash, is_last in index.walk(root_hash):
+            yield depth, index.read_block(block_hash), is_last
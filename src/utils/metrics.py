@@ -0,0 +1,216 @@
+import atexit
+import bisect
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+
+# Upper bounds (seconds) of the default histogram buckets
+DEFAULT_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, 60.0)
+
+class Counter:
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class Histogram:
+    def __init__(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+class Timer:
+    """Context manager recording the elapsed time into a histogram, optionally under cProfile"""
+
+    def __init__(self, histogram, profiler=None):
+        self.histogram = histogram
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiling = False
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+                self.profiling = True
+            except ValueError:
+                # Another profiled operation is already running, it covers this one
+                pass
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.start)
+        if self.profiling:
+            self.profiler.disable()
+        return False
+
+class MetricsRegistry:
+    """
+    Collects counters and histograms and exports them as Prometheus text or JSON.
+
+    Operations named in profile_operations are also run under cProfile whenever
+    they are timed; dump_profiles writes one .prof file per operation.
+    """
+
+    def __init__(self, profile_operations=()):
+        self.counters = {}
+        self.histograms = {}
+        self.profilers = {name: cProfile.Profile() for name in profile_operations}
+
+    def counter(self, name, help_text=""):
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = Counter(name, help_text)
+        return counter
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(name, help_text, buckets)
+        return histogram
+
+    def timer(self, name, help_text=""):
+        return Timer(self.histogram(name, help_text), self.profilers.get(name))
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict"""
+        return {
+            "counters": {name: counter.value for name, counter in sorted(self.counters.items())},
+            "histograms": {
+                name: {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": dict(zip([str(b) for b in histogram.buckets] + ["+Inf"],
+                                        _cumulative(histogram.counts)))
+                }
+                for name, histogram in sorted(self.histograms.items())
+            }
+        }
+
+    def export_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, counter in sorted(self.counters.items()):
+            if counter.help:
+                lines.append(f"# HELP {name} {counter.help}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {counter.value}")
+        for name, histogram in sorted(self.histograms.items()):
+            if histogram.help:
+                lines.append(f"# HELP {name} {histogram.help}")
+            lines.append(f"# TYPE {name} histogram")
+            bounds = [repr(b) for b in histogram.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, _cumulative(histogram.counts)):
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{name}_sum {histogram.sum}")
+            lines.append(f"{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write a JSON snapshot (.json) or a Prometheus text file (any other extension)"""
+        with open(path, 'w') as file:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), file, indent=4)
+            else:
+                file.write(self.export_prometheus())
+
+    def dump_profiles(self, folder="."):
+        os.makedirs(folder, exist_ok=True)
+        for name, profiler in self.profilers.items():
+            try:
+                stats = pstats.Stats(profiler)
+            except TypeError:
+                # The operation never ran, so there is nothing to dump
+                continue
+            stats.dump_stats(os.path.join(folder, f"{name}.prof"))
+
+class _NullMetric:
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NULL_METRIC = _NullMetric()
+
+class NullRegistry:
+    """Default registry: every metric is a shared no-op object"""
+
+    def counter(self, name, help_text=""):
+        return _NULL_METRIC
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return _NULL_METRIC
+
+    def timer(self, name, help_text=""):
+        return _NULL_METRIC
+
+def _cumulative(counts):
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+_registry = NullRegistry()
+
+def get_registry():
+    return _registry
+
+def enable_metrics(registry=None):
+    """Start collecting metrics into registry (a new MetricsRegistry by default)"""
+    global _registry
+    _registry = registry if registry is not None else MetricsRegistry()
+    return _registry
+
+def disable_metrics():
+    global _registry
+    _registry = NullRegistry()
+
+def timed(name, help_text=""):
+    """Decorator timing every call of a function into the histogram name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _registry.timer(name, help_text):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enable_from_environment():
+    """
+    Enable metrics when DLT_METRICS_FILE is set, writing them there on exit.
+
+    DLT_PROFILE lists operations (comma separated, e.g. pow_mine_seconds) to run
+    under cProfile; their .prof files go to DLT_PROFILE_DIR (default: profiles).
+    """
+    path = os.environ.get("DLT_METRICS_FILE")
+    if not path:
+        return None
+    operations = [name for name in os.environ.get("DLT_PROFILE", "").split(",") if name]
+    registry = enable_metrics(MetricsRegistry(profile_operations=operations))
+    atexit.register(registry.write, path)
+    if operations:
+        atexit.register(registry.dump_profiles, os.environ.get("DLT_PROFILE_DIR", "profiles"))
+    return registry
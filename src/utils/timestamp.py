@@ -1,3 +1,14 @@
 def get_current_timestamp():
     from datetime import datetime
-    return datetime.utcnow().isoformat() + 'Z'
\ No newline at end of file
+    return datetime.utcnow().isoformat() + 'Z'
+
+def parse_timestamp(timestamp):
+    """Seconds since the epoch of an ISO 8601 timestamp (naive ones are UTC), or None if unparsable"""
+    from datetime import datetime, timezone
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
\ No newline at end of file
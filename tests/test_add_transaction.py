@@ -0,0 +1,168 @@
+import unittest
+import sys
+import os
+import io
+import json
+import glob
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+from src.proof_of_work import ProofOfWork, RetargetPolicy, read_difficulty
+
+class TestAddTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = os.path.join(tempfile.mkdtemp(), "dlt")
+
+    def add(self, data, **kwargs):
+        # Silence the progress output of the script
+        with contextlib.redirect_stdout(io.StringIO()):
+            return add_transaction.add_single_transaction(data, folder=self.folder, **kwargs)
+
+    def test_tip_follows_appends(self):
+        for i in range(3):
+            block = self.add(f"Transaction {i}")
+        tip = add_transaction.read_chain_tip(self.folder)
+        self.assertEqual(tip["height"], 3)
+        self.assertEqual(tip["hash"], block.hash)
+        self.assertEqual(tip["verified_height"], 0)
+        self.assertEqual(add_transaction.validate_blockchain(self.folder), (True, None))
+
+    def test_periodic_validation(self):
+        for i in range(3):
+            self.add(f"Transaction {i}", validate_every=2)
+        tip = add_transaction.read_chain_tip(self.folder)
+        self.assertEqual(tip["verified_height"], 2)
+
+    def test_missing_tip_is_rebuilt(self):
+        for i in range(2):
+            self.add(f"Transaction {i}")
+        os.remove(os.path.join(self.folder, add_transaction.TIP_FILE))
+        block = self.add("Transaction 2")
+        self.assertEqual(block.index, 3)
+        self.assertEqual(add_transaction.read_chain_tip(self.folder)["verified_height"], 2)
+
+    def test_full_validation_detects_tampering(self):
+        for i in range(2):
+            self.add(f"Transaction {i}")
+        block_file = glob.glob(f"{self.folder}/block_1_*.json")[0]
+        with open(block_file, 'r') as file:
+            block_data = json.load(file)
+        block_data["data"] = "Tampered"
+        with open(block_file, 'w') as file:
+            json.dump(block_data, file)
+        self.assertIsNone(self.add("Transaction 2", full_validation=True))
+
+    def tamper_keeping_stat(self, index):
+        # Change a block without changing its file size or modification time
+        block_file = glob.glob(f"{self.folder}/block_{index}_*.json")[0]
+        stat = os.stat(block_file)
+        with open(block_file, 'r') as file:
+            content = file.read()
+        with open(block_file, 'w') as file:
+            file.write(content.replace("Transaction", "Tramsaction"))
+        os.utime(block_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def test_checkpoint_skips_verified_prefix(self):
+        for i in range(3):
+            self.add(f"Transaction {i}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.validate_blockchain(self.folder), (True, None))
+            checkpoint = add_transaction.read_checkpoint(self.folder)
+            self.assertEqual(checkpoint["height"], 3)
+            
+            # The verified prefix is trusted while its files look unchanged
+            self.tamper_keeping_stat(1)
+            self.assertEqual(add_transaction.validate_blockchain(self.folder), (True, None))
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (False, 1))
+
+    def test_changed_prefix_is_revalidated(self):
+        for i in range(3):
+            self.add(f"Transaction {i}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            add_transaction.validate_blockchain(self.folder)
+            block_file = glob.glob(f"{self.folder}/block_2_*.json")[0]
+            with open(block_file, 'r') as file:
+                block_data = json.load(file)
+            block_data["data"] = "Tampered"
+            with open(block_file, 'w') as file:
+                json.dump(block_data, file)
+            self.assertEqual(add_transaction.validate_blockchain(self.folder), (False, 2))
+
+    def test_checkpoint_signature(self):
+        for i in range(2):
+            self.add(f"Transaction {i}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            add_transaction.validate_blockchain(self.folder, checkpoint_key="secret")
+            self.assertIsNotNone(add_transaction.read_checkpoint(self.folder, key="secret"))
+            self.assertIsNone(add_transaction.read_checkpoint(self.folder, key="other"))
+
+    def test_full_validation_finds_unindexed_files(self):
+        for i in range(3):
+            self.add(f"Transaction {i}")
+        block_file = glob.glob(f"{self.folder}/block_2_*.json")[0]
+        # A second file for block 2, as left by two writers reusing an index
+        with open(block_file, 'r') as file:
+            content = file.read()
+        with open(f"{self.folder}/block_2_00000000.json", 'w') as file:
+            file.write(content)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (False, 2))
+            self.assertEqual(add_transaction.validate_blockchain_parallel(self.folder, workers=1), (False, 2))
+        os.remove(f"{self.folder}/block_2_00000000.json")
+        with open(f"{self.folder}/block_5_00000000.json", 'w') as file:
+            file.write(content)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (False, 5))
+
+    def test_stale_tip_is_detected(self):
+        for i in range(3):
+            self.add(f"Transaction {i}")
+        tip = add_transaction.read_chain_tip(self.folder)
+        block_file = glob.glob(f"{self.folder}/block_2_*.json")[0]
+        with open(block_file, 'r') as file:
+            block_data = json.load(file)
+        # A tip left one block behind, as by a writer stopped before recording the tip
+        add_transaction.write_chain_tip(2, block_data["hash"], 2, self.folder)
+        self.assertIsNone(add_transaction.read_chain_tip(self.folder))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.verify_chain(self.folder)[2]["hash"], tip["hash"])
+
+        # Only journaled blocks are looked for, by their exact file name: a stray file
+        # is left for full validation to report
+        with open(f"{self.folder}/block_4_00000000.json", 'w') as file:
+            file.write("{")
+        self.assertEqual(add_transaction.read_chain_tip(self.folder)["hash"], tip["hash"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (False, 4))
+
+    def test_append_does_not_scan_the_folder(self):
+        for i in range(3):
+            self.add(f"Transaction {i}")
+        scans = []
+        real_glob = glob.glob
+        glob.glob = lambda *args, **kwargs: scans.append(args) or real_glob(*args, **kwargs)
+        try:
+            block = self.add("Transaction 3")
+        finally:
+            glob.glob = real_glob
+        self.assertEqual(block.index, 4)
+        self.assertEqual(scans, [])
+
+    def test_difficulty_is_stored_and_retargeted(self):
+        policy = RetargetPolicy(target_block_time=3600, interval=3)
+        blocks = [self.add(f"Transaction {i}", difficulty_bits=6 if i == 0 else None, retarget_policy=policy)
+                  for i in range(3)]
+        self.assertTrue(all(ProofOfWork(bits=6).is_valid(block) for block in blocks[:2]))
+        # Block 3 follows blocks mined far faster than an hour apart, so the work goes up 4x
+        proof_of_work, since = read_difficulty(self.folder)
+        self.assertEqual((proof_of_work.bits, since), (8, 3))
+        self.assertTrue(proof_of_work.is_valid(blocks[2]))
+
+if __name__ == '__main__':
+    unittest.main()
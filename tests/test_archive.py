@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import io
+import glob
+import json
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+import convert_format
+import prune_bodies
+from src.archive import ARCHIVE_FIELD, archive_files, read_body, write_archive
+from src.binary_codec import decode_block, encode_block, load_block_file
+from src.secondary_index import open_secondary_index
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def run_quietly(self, function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def test_random_access(self):
+        bodies = [(i, [f"Transaction {i}", {"amount": i}]) for i in range(10)]
+        for compression in ("zlib", "lzma"):
+            name = write_archive(self.root, bodies, compression, frame_blocks=4)
+            for block_index, data in reversed(bodies):
+                self.assertEqual(read_body(self.root, name, block_index), data)
+            # Bodies handed out are copies of the cached frame
+            read_body(self.root, name, 5).append("changed")
+            self.assertEqual(read_body(self.root, name, 5), bodies[5][1])
+            with self.assertRaises(ValueError):
+                read_body(self.root, name, 10)
+
+    def test_pruned_binary_record(self):
+        block_data = {"index": 1, "hash": "ab" * 32, "previous_hash": "cd" * 32,
+                      "timestamp": "2024-01-01T00:00:00Z", "data": None, "nonce": 7,
+                      "merkle_root": "ef" * 32, "version": 2, ARCHIVE_FIELD: "bodies_0_9.zlib"}
+        self.assertEqual(decode_block(encode_block(block_data)), block_data)
+
+    def test_prune_linear_folder(self):
+        folder = os.path.join(self.root, "dlt")
+        blocks = [self.run_quietly(add_transaction.add_single_transaction, f"Transaction {i}", folder=folder)
+                  for i in range(6)]
+        self.assertEqual(self.run_quietly(prune_bodies.prune_folder, folder, keep=2), 5)
+        # Pruning again finds nothing new to archive
+        self.assertEqual(self.run_quietly(prune_bodies.prune_folder, folder, keep=2), 0)
+
+        block_file = glob.glob(os.path.join(folder, "block_2_*.json"))[0]
+        with open(block_file, 'r') as file:
+            stored = json.load(file)
+        self.assertIsNone(stored["data"])
+        self.assertEqual(stored["merkle_root"], blocks[1].merkle_root)
+        self.assertEqual(load_block_file(block_file)["data"], "Transaction 1")
+        self.assertEqual(load_block_file(block_file, bodies=False)[ARCHIVE_FIELD], stored[ARCHIVE_FIELD])
+
+        self.assertEqual(self.run_quietly(add_transaction.validate_blockchain, folder, full=True), (True, None))
+        with open_secondary_index(folder) as lookup:
+            lookup.rebuild()
+            self.assertEqual(lookup.find_transaction("Transaction 1"), [(2, 0)])
+            self.assertEqual(lookup.block_by_index(2)["data"], "Transaction 1")
+        block = self.run_quietly(add_transaction.add_single_transaction, "Transaction 6", folder=folder)
+        self.assertEqual(block.index, 7)
+
+        # Converting the folder keeps the blocks pruned
+        self.run_quietly(convert_format.convert_folder, folder, "linear", "binary")
+        self.assertEqual(load_block_file(glob.glob(os.path.join(folder, "block_2_*.blk"))[0], bodies=False)["data"],
+                         None)
+        self.assertEqual(self.run_quietly(add_transaction.validate_blockchain, folder, full=True), (True, None))
+
+    def test_prune_tree_folder(self):
+        folder = os.path.join(self.root, "dlt_tree")
+        for i in range(6):
+            self.run_quietly(add_transaction_tree.add_single_transaction, f"Transaction {i}", folder=folder)
+        self.assertEqual(self.run_quietly(prune_bodies.prune_folder, folder, below=4, compression="lzma"), 4)
+        self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree, folder), (True, None))
+        self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree_parallel, folder, workers=2),
+                         (True, None))
+        block = self.run_quietly(add_transaction_tree.add_single_transaction, "Transaction 6", folder=folder)
+        self.assertEqual(block.index, 7)
+
+    def test_damaged_archive_fails_validation(self):
+        folder = os.path.join(self.root, "dlt")
+        for i in range(3):
+            self.run_quietly(add_transaction.add_single_transaction, f"Transaction {i}", folder=folder)
+        self.run_quietly(prune_bodies.prune_folder, folder, below=3)
+        with open(archive_files(folder)[0], 'r+b') as file:
+            file.truncate(10)
+        is_valid, _ = self.run_quietly(add_transaction.validate_blockchain, folder, full=True)
+        self.assertFalse(is_valid)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+import sys
+import os
+import io
+import glob
+import json
+import hashlib
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+import convert_format
+from src.binary_codec import (BLOCK_VERSION_JSON, BLOCK_VERSION_BINARY, decode_block, encode_block,
+                              encode_header, load_block_file, storage_format)
+from src.block import Block
+from src.blockchain import Blockchain
+from src.index_store import IndexStore
+from src.proof_of_work import ProofOfWork
+from src.tree_index import INDEX_TABLE, open_tree_index
+from src.utils.timestamp import get_current_timestamp
+
+def block_data(block, **extra):
+    data = {
+        "index": block.index,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "data": block.data,
+        "nonce": block.nonce,
+        "merkle_root": block.merkle_root,
+        "version": block.version
+    }
+    data.update(extra)
+    return data
+
+class TestBinaryCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.block = Block(index=3, timestamp=get_current_timestamp(), data=["tx1", {"amount": 5}],
+                           previous_hash="ab" * 32, nonce=42, version=BLOCK_VERSION_BINARY)
+
+    def test_version_2_hashes_the_binary_header(self):
+        expected = hashlib.sha256(encode_header(block_data(self.block))).hexdigest()
+        self.assertEqual(self.block.hash, expected)
+        hasher = self.block.header_hasher()
+        for nonce in (0, 1, 2 ** 40):
+            self.block.nonce = nonce
+            self.assertEqual(hasher.hash(nonce),
+                             hashlib.sha256(encode_header(block_data(self.block))).hexdigest())
+
+    def test_version_1_hash_is_unchanged(self):
+        block = Block(index=3, timestamp=self.block.timestamp, data=self.block.data,
+                      previous_hash=self.block.previous_hash, nonce=42)
+        header = json.dumps({
+            "index": block.index,
+            "timestamp": block.timestamp,
+            "data": block.data,
+            "previous_hash": block.previous_hash,
+            "nonce": block.nonce,
+            "merkle_root": block.merkle_root
+        }, sort_keys=True).encode()
+        self.assertEqual(block.version, BLOCK_VERSION_JSON)
+        self.assertEqual(block.hash, hashlib.sha256(header).hexdigest())
+        self.assertNotEqual(block.hash, self.block.hash)
+
+    def test_round_trip(self):
+        records = [
+            block_data(self.block),
+            block_data(self.block, parent_hash="cd" * 32, left_child=None, right_child=None),
+            block_data(self.block, parent_hash=None, left_child=None, right_child=None)
+        ]
+        # A legacy genesis block: 63-zero previous_hash and a non-canonical timestamp
+        genesis = Block(index=0, timestamp="2024-01-01T00:00:00+00:00", data="Genesis Block", previous_hash="0" * 63)
+        records.append(block_data(genesis))
+        for record in records:
+            self.assertEqual(decode_block(encode_block(record)), record)
+
+        decoded = decode_block(encode_block(block_data(genesis)))
+        restored = Block(decoded["index"], decoded["timestamp"], decoded["data"], decoded["previous_hash"],
+                         decoded["nonce"], decoded["version"])
+        self.assertEqual(restored.hash, genesis.hash)
+
+    def test_binary_record_is_smaller(self):
+        record = block_data(self.block)
+        self.assertLess(len(encode_block(record)) * 2, len(json.dumps(record, indent=4)))
+
+    def test_invalid_records(self):
+        record = encode_block(block_data(self.block))
+        for damaged in (record[:50], record[:-1], b"JSON" + record[4:]):
+            with self.assertRaises(ValueError):
+                decode_block(damaged)
+        with self.assertRaises(ValueError):
+            Block(index=1, timestamp="not a time", data="x", previous_hash="0" * 64, version=BLOCK_VERSION_BINARY)
+
+    def test_mined_blocks_are_version_2(self):
+        blockchain = Blockchain(ProofOfWork(bits=4))
+        block = blockchain.append_block("tx")
+        blockchain.proof_of_work.mine(block)
+        self.assertEqual(block.version, BLOCK_VERSION_BINARY)
+        self.assertTrue(blockchain.proof_of_work.is_valid(block))
+
+class TestConvertFormat(unittest.TestCase):
+
+    def run_quietly(self, function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def test_linear_folder(self):
+        folder = os.path.join(tempfile.mkdtemp(), "dlt")
+        for i in range(3):
+            self.run_quietly(add_transaction.add_single_transaction, f"Transaction {i}", folder=folder)
+
+        self.assertEqual(self.run_quietly(convert_format.convert_folder, folder, "linear", "binary"), 4)
+        self.assertEqual(storage_format(folder), "binary")
+        self.assertEqual(glob.glob(os.path.join(folder, "block_*.json")), [])
+        self.assertEqual(self.run_quietly(add_transaction.validate_blockchain, folder, full=True), (True, None))
+
+        block = self.run_quietly(add_transaction.add_single_transaction, "Transaction 3", folder=folder)
+        self.assertEqual(load_block_file(glob.glob(os.path.join(folder, "block_4_*.blk"))[0])["hash"], block.hash)
+
+        self.run_quietly(convert_format.convert_folder, folder, "linear", "json")
+        self.assertEqual(len(glob.glob(os.path.join(folder, "block_*.json"))), 5)
+        self.assertEqual(self.run_quietly(add_transaction.validate_blockchain, folder, full=True), (True, None))
+
+    def test_tree_folder(self):
+        folder = os.path.join(tempfile.mkdtemp(), "dlt_tree")
+        for i in range(4):
+            self.run_quietly(add_transaction_tree.add_single_transaction, f"Transaction {i}", folder=folder)
+
+        self.run_quietly(convert_format.convert_folder, folder, "tree", "binary")
+        self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree, folder), (True, None))
+        block = self.run_quietly(add_transaction_tree.add_single_transaction, "Transaction 4", folder=folder)
+        self.assertEqual(block.index, 5)
+        self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree, folder), (True, None))
+
+    def test_legacy_tree_folder_keeps_links(self):
+        folder = os.path.join(tempfile.mkdtemp(), "dlt_tree")
+        for i in range(4):
+            self.run_quietly(add_transaction_tree.add_single_transaction, f"Transaction {i}", folder=folder)
+        # A folder written before the tree index existed: links in the files, no index
+        with open_tree_index(folder) as index:
+            links = {block_data["hash"]: index.children(block_data["hash"]) for block_data in index.iter_blocks()}
+        for file in glob.glob(os.path.join(folder, "*")):
+            if not os.path.basename(file).startswith("block_"):
+                os.remove(file)
+        for file in glob.glob(os.path.join(folder, "block_*.json")):
+            block_data = load_block_file(file)
+            block_data["left_child"], block_data["right_child"] = links[block_data["hash"]]
+            with open(file, 'w') as f:
+                json.dump(block_data, f, indent=4)
+
+        self.run_quietly(convert_format.convert_folder, folder, "tree", "binary")
+        for rebuild in (False, True):
+            if rebuild:
+                with IndexStore(folder) as store:
+                    store.table(INDEX_TABLE).clear()
+            self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree, folder), (True, None))
+            with open_tree_index(folder) as index:
+                self.assertEqual({block_hash: index.children(block_hash) for block_hash in links}, links)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,15 @@
 import unittest
 import sys
 import os
+import json
+import hashlib
+import pickle
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.block import Block
+from src.merkle_tree import MerkleTree
 from src.utils.hash_utils import hash_data
 from src.utils.timestamp import get_current_timestamp
 
@@ -36,5 +40,68 @@ class TestBlock(unittest.TestCase):
         # Test that the merkle root is not None
         self.assertIsNotNone(self.block.merkle_root)
 
+    def test_transaction_batch(self):
+        transactions = ["tx1", "tx2", "tx3"]
+        block = Block(index=2, timestamp=self.timestamp, data=transactions, previous_hash=self.previous_hash)
+        self.assertEqual(block.transactions, transactions)
+        self.assertEqual(block.merkle_root, MerkleTree(transactions).get_root())
+
+    def test_add_transaction(self):
+        block = Block(index=2, timestamp=self.timestamp, data=["tx1"], previous_hash=self.previous_hash)
+        block.add_transaction("tx2")
+        expected = Block(index=2, timestamp=self.timestamp, data=["tx1", "tx2"], previous_hash=self.previous_hash)
+        self.assertEqual(block.data, ["tx1", "tx2"])
+        self.assertEqual(block.merkle_root, expected.merkle_root)
+        self.assertEqual(block.hash, expected.hash)
+
+    def test_header_hasher_matches_calculate_hash(self):
+        # The midstate path must produce the same hashes as the full serialization
+        payloads = [self.data, {"from": "ana", "to": "luis", "amount": 5}, ["tx1", "tx2"], "unicode ñ €"]
+        for data in payloads:
+            block = Block(index=7, timestamp=self.timestamp, data=data, previous_hash=self.previous_hash)
+            hasher = block.header_hasher()
+            for nonce in (0, 1, 12345, 10 ** 12):
+                block.nonce = nonce
+                self.assertEqual(hasher.hash(nonce), block.calculate_hash())
+
+    def test_hash_matches_full_serialization(self):
+        block_string = json.dumps({
+            "index": self.block.index,
+            "timestamp": self.block.timestamp,
+            "data": self.block.data,
+            "previous_hash": self.block.previous_hash,
+            "nonce": self.block.nonce,
+            "merkle_root": self.block.merkle_root
+        }, sort_keys=True).encode()
+        self.assertEqual(self.block.hash, hashlib.sha256(block_string).hexdigest())
+
+    def test_compact_representation(self):
+        self.assertFalse(hasattr(self.block, "__dict__"))
+        with self.assertRaises(AttributeError):
+            self.block.extra = 1
+        # The tree is only built on request and gives the stored root
+        self.assertIsNone(self.block._merkle_tree)
+        self.assertEqual(self.block.merkle_tree.get_root(), self.block.merkle_root)
+
+    def test_header_fields_invalidate_cached_header(self):
+        block = Block(index=1, timestamp=self.timestamp, data=self.data, previous_hash=self.previous_hash)
+        block.update_hash()
+        for field, value in (("index", 2), ("timestamp", "2000-01-01 00:00:00"), ("previous_hash", "1" * 64),
+                             ("merkle_root", "2" * 64), ("data", "Other data")):
+            setattr(block, field, value)
+            block.update_hash()
+            expected = Block(index=block.index, timestamp=block.timestamp, data=block.data,
+                             previous_hash=block.previous_hash)
+            expected.merkle_root = block.merkle_root
+            expected.update_hash()
+            self.assertEqual(block.hash, expected.hash, field)
+
+    def test_pickle_round_trip(self):
+        self.block.header_hasher()
+        copy = pickle.loads(pickle.dumps(self.block))
+        for field in ("index", "timestamp", "data", "previous_hash", "nonce", "merkle_root", "hash"):
+            self.assertEqual(getattr(copy, field), getattr(self.block, field))
+        self.assertEqual(copy.calculate_hash(), self.block.hash)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
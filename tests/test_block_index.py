@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import io
+import glob
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+from src.block_index import INDEX_FILE, BlockIndex, iter_blocks
+from src.tree_index import open_tree_index, walk_tree
+
+class TestBlockIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.folder = os.path.join(self.root, "dlt")
+
+    def build(self, module, folder, count):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [module.add_single_transaction(f"Transaction {i}", folder=folder) for i in range(count)]
+
+    def test_iter_blocks_range(self):
+        blocks = self.build(add_transaction, self.folder, 5)
+        self.assertEqual([block["index"] for block in iter_blocks(self.folder)], list(range(6)))
+        self.assertEqual([block["hash"] for block in iter_blocks(self.folder, start=2, stop=4)],
+                         [blocks[1].hash, blocks[2].hash])
+        self.assertEqual(list(iter_blocks(self.folder, start=10)), [])
+
+    def test_missing_block(self):
+        self.build(add_transaction, self.folder, 4)
+        os.remove(glob.glob(f"{self.folder}/block_2_*.json")[0])
+        with self.assertRaises(FileNotFoundError):
+            list(iter_blocks(self.folder))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (False, 2))
+
+    def test_rebuild_from_legacy_folder(self):
+        self.build(add_transaction, self.folder, 3)
+        os.remove(os.path.join(self.folder, INDEX_FILE))
+        self.assertEqual(len(list(iter_blocks(self.folder))), 4)
+        with BlockIndex(self.folder) as index:
+            self.assertEqual(len(index), 4)
+            self.assertTrue(os.path.exists(index.path(3)))
+            self.assertIsNone(index.path(4))
+
+    def test_walk_tree(self):
+        folder = os.path.join(self.root, "dlt_tree")
+        self.build(add_transaction_tree, folder, 6)
+        walked = [(depth, block["index"], is_last) for depth, block, is_last in walk_tree(folder)]
+        self.assertEqual(walked, [(0, 0, True), (1, 1, False), (2, 3, False), (2, 4, True),
+                                  (1, 2, True), (2, 5, False), (2, 6, True)])
+
+    def test_tree_link_to_foreign_child(self):
+        folder = os.path.join(self.root, "dlt_tree")
+        self.build(add_transaction_tree, folder, 5)
+        # Block 3 lists block 5 as a child, but block 5's parent is block 2
+        with open_tree_index(folder) as index:
+            hashes = [index.frontier_hash(position) for position in range(6)]
+            index.add_child(hashes[3], hashes[5])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(folder), (False, 3))
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree_parallel(folder, workers=2), (False, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction_tree
+from src.fork_choice import FORK_CHOICE_TABLE, ForkChoice, hash_work, open_fork_choice
+from src.index_store import IndexStore
+from src.tree_index import open_tree_index
+
+def h(name):
+    # Readable 64-character "hashes" for the tree tests
+    return name.encode().hex().ljust(64, "0")
+
+class TestForkChoice(unittest.TestCase):
+
+    def setUp(self):
+        # root -> a -> a1 -> a2
+        #      -> b -> b1
+        #           -> b2
+        self.fork_choice = ForkChoice()
+        for block, parent in (("root", None), ("a", "root"), ("b", "root"), ("a1", "a"), ("b1", "b"),
+                              ("b2", "b"), ("a2", "a1")):
+            self.fork_choice.add_block(h(block), h(parent) if parent else None)
+
+    def test_subtree_weights(self):
+        self.assertEqual(self.fork_choice.weight(h("root")), 7)
+        self.assertEqual(self.fork_choice.weight(h("a")), 3)
+        self.assertEqual(self.fork_choice.weight(h("b")), 3)
+
+    def test_best_tip_and_canonical(self):
+        # a and b weigh the same, the first child added wins
+        self.assertEqual(self.fork_choice.best_tip(), h("a2"))
+        self.assertTrue(self.fork_choice.is_canonical(h("a1")))
+        self.assertFalse(self.fork_choice.is_canonical(h("b")))
+        
+        # One more block under b makes it the heaviest subtree, even with a shorter branch
+        self.fork_choice.add_block(h("b3"), h("b1"))
+        self.assertEqual(self.fork_choice.best_tip(), h("b3"))
+        self.assertTrue(self.fork_choice.is_canonical(h("b")))
+        self.assertFalse(self.fork_choice.is_canonical(h("a2")))
+        self.assertEqual(list(self.fork_choice.canonical_chain()), [h("root"), h("b"), h("b1"), h("b3")])
+
+    def test_unknown_parent(self):
+        with self.assertRaises(ValueError):
+            self.fork_choice.add_block(h("c"), h("missing"))
+        self.assertFalse(self.fork_choice.add_block(h("a"), h("root")))
+
+    def test_work_mode(self):
+        self.assertEqual(hash_work("000f" + "f" * 60), 1 << 12)
+        fork_choice = ForkChoice(mode="work")
+        fork_choice.add_block("0" * 63 + "1")
+        fork_choice.add_block("00" + "f" * 62, "0" * 63 + "1")
+        fork_choice.add_block("ff" + "f" * 62, "0" * 63 + "1")
+        fork_choice.add_block("f0" + "0" * 62, "ff" + "f" * 62)
+        # One hard block outweighs two easy ones
+        self.assertEqual(fork_choice.best_tip(), "00" + "f" * 62)
+
+    def test_tree_folder(self):
+        folder = os.path.join(tempfile.mkdtemp(), "dlt_tree")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(5):
+                add_transaction_tree.add_single_transaction(f"Transaction {i}", folder=folder)
+        with open_tree_index(folder) as index:
+            hashes = [index.frontier_hash(position) for position in range(6)]
+        
+        with open_fork_choice(folder) as fork_choice:
+            self.assertEqual(fork_choice.weight(hashes[0]), 6)
+            # Block 1 has children 3 and 4, block 2 only 5
+            self.assertEqual(fork_choice.best_tip(), hashes[3])
+            persisted = (fork_choice.weight(hashes[1]), fork_choice.best_tip())
+        
+        # Dropping the weights rebuilds the same ones from the tree index
+        with IndexStore(folder) as store:
+            store.table(FORK_CHOICE_TABLE).clear()
+        with open_fork_choice(folder) as fork_choice:
+            self.assertEqual((fork_choice.weight(hashes[1]), fork_choice.best_tip()), persisted)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+from src.blockchain import Blockchain
+from src.header_store import HeaderStore, np
+import add_transaction
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestHeaderStore(unittest.TestCase):
+
+    def setUp(self):
+        self.blockchain = Blockchain()
+        for i in range(9):
+            self.blockchain.append_block(f"Transaction {i}")
+
+    def test_from_blockchain(self):
+        store = HeaderStore.from_blockchain(self.blockchain)
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.verify_linkage(), (True, None))
+        self.assertEqual(store.hash_hex(4), self.blockchain.chain[4].hash)
+        # The 63-zero genesis previous_hash is padded to 32 bytes
+        self.assertEqual(store.hash_hex(0, "previous_hash"), "0" * 64)
+
+    def test_broken_link_and_gaps(self):
+        self.blockchain.chain[6].previous_hash = "f" * 64
+        del self.blockchain.chain[3]
+        store = HeaderStore.from_blockchain(self.blockchain)
+        self.assertEqual(store.gaps(), [(2, 4)])
+        self.assertEqual(store.broken_links(), [4, 6])
+        self.assertEqual(store.verify_linkage(), (False, 4))
+
+    def test_from_folder_and_save(self):
+        folder = tempfile.mkdtemp()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for block in self.blockchain.chain:
+                add_transaction.save_block_to_file(block, folder)
+        store = HeaderStore.from_folder(folder)
+        self.assertEqual(store.verify_linkage(), (True, None))
+        
+        path = os.path.join(folder, "headers.npy")
+        store.save(path)
+        loaded = HeaderStore.load(path)
+        self.assertEqual(loaded.headers.tobytes(), store.headers.tobytes())
+
+    def test_statistics(self):
+        for i, block in enumerate(self.blockchain.chain):
+            block.timestamp = f"2024-01-01T00:00:{2 * i:02d}Z"
+            block.nonce = i
+        stats = HeaderStore.from_blockchain(self.blockchain).statistics()
+        self.assertEqual(stats["blocks"], 10)
+        self.assertEqual(stats["block_interval"]["mean"], 2.0)
+        self.assertEqual(stats["nonce"]["max"], 9)
+        self.assertEqual(stats["nonce"]["median"], 4.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+import light_sync
+from src.light_client import HEADER_RECORD_SIZE, LightClient, folder_source
+from src.proof_of_work import ProofOfWork
+
+class TestLightClient(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def run_quietly(self, function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def full_node(self, layout="linear", blocks=4):
+        module = add_transaction if layout == "linear" else add_transaction_tree
+        folder = os.path.join(self.root, layout)
+        for i in range(blocks):
+            self.run_quietly(module.add_single_transaction, f"Transaction {i}", folder=folder, difficulty_bits=4)
+        headers = os.path.join(self.root, layout + ".headers")
+        self.run_quietly(light_sync.export_folder, folder, layout, headers)
+        return folder, headers
+
+    def client(self, folder=None, layout="linear", bits=4):
+        source = folder_source(folder) if folder else None
+        return LightClient(os.path.join(self.root, layout + "_light"), ProofOfWork(bits=bits), layout, source)
+
+    def test_sync_both_layouts(self):
+        for layout in ("linear", "tree"):
+            folder, headers = self.full_node(layout)
+            self.assertEqual(os.path.getsize(headers), 5 * HEADER_RECORD_SIZE)
+            with self.client(folder, layout) as client:
+                self.assertEqual(self.run_quietly(light_sync.sync_headers, client, headers), (True, None))
+                self.assertEqual(len(client), 5)
+                self.assertEqual(self.run_quietly(client.verify), (True, None))
+                self.assertEqual(client.tip()["hash"], client.get_block(4)["hash"])
+
+    def test_invalid_headers_are_rejected(self):
+        folder, headers = self.full_node()
+        with open(headers, 'rb') as file:
+            stream = bytearray(file.read())
+
+        # A changed nonce no longer hashes to the stored hash
+        tampered = bytearray(stream)
+        tampered[3 * HEADER_RECORD_SIZE + 81] ^= 1
+        path = os.path.join(self.root, "tampered.headers")
+        with open(path, 'wb') as file:
+            file.write(tampered)
+        with self.client() as client:
+            self.assertEqual(self.run_quietly(light_sync.sync_headers, client, path), (False, 3))
+            self.assertEqual(len(client), 3)
+
+        # A client demanding more work than the blocks carry rejects them
+        with LightClient(os.path.join(self.root, "strict"), ProofOfWork(bits=64)) as client:
+            self.assertEqual(self.run_quietly(light_sync.sync_headers, client, headers)[0], False)
+
+    def test_resumed_import(self):
+        folder, headers = self.full_node(blocks=2)
+        with self.client() as client:
+            self.run_quietly(light_sync.sync_headers, client, headers)
+        self.run_quietly(add_transaction.add_single_transaction, "Transaction 2", folder=folder, difficulty_bits=4)
+        self.run_quietly(light_sync.export_folder, folder, "linear", headers)
+        # A partially written record is dropped when the client opens
+        with open(os.path.join(self.root, "linear_light", "headers.bin"), 'ab') as file:
+            file.write(b"\x02" * 10)
+        with self.client() as client:
+            self.assertEqual(len(client), 3)
+            self.assertEqual(self.run_quietly(light_sync.sync_headers, client, headers), (True, None))
+            self.assertEqual(len(client), 4)
+
+    def test_bodies_are_fetched_lazily(self):
+        folder, headers = self.full_node()
+        fetched = []
+        source = folder_source(folder)
+        def counting_source(block_index):
+            fetched.append(block_index)
+            return source(block_index)
+
+        with LightClient(os.path.join(self.root, "light"), ProofOfWork(bits=4), source=counting_source) as client:
+            self.run_quietly(light_sync.sync_headers, client, headers)
+            self.assertEqual(fetched, [])
+            self.assertEqual(client.get_block(2)["data"], "Transaction 1")
+            self.assertEqual(client.get_block(2)["data"], "Transaction 1")
+            self.assertEqual(fetched, [2])
+
+    def test_bodies_must_match_headers(self):
+        folder, headers = self.full_node()
+        source = folder_source(folder)
+        def lying_source(block_index):
+            block_data = source(block_index)
+            block_data["data"] = "Forged transaction"
+            return block_data
+
+        with LightClient(os.path.join(self.root, "light"), ProofOfWork(bits=4), source=lying_source) as client:
+            self.run_quietly(light_sync.sync_headers, client, headers)
+            with self.assertRaises(ValueError):
+                client.get_block(2)
+            with self.assertRaises(IndexError):
+                client.get_block(5)
+        with self.client() as client:
+            with self.assertRaises(LookupError):
+                client.get_block(1)
+
+    def test_transaction_proofs(self):
+        folder, headers = self.full_node()
+        with self.client() as client:
+            self.run_quietly(light_sync.sync_headers, client, headers)
+            proof = light_sync.transaction_proof(folder, 3, "Transaction 2")
+            self.assertTrue(client.verify_transaction(3, "Transaction 2", proof))
+            self.assertFalse(client.verify_transaction(3, "Transaction 9", proof))
+            self.assertIsNone(light_sync.transaction_proof(folder, 2, "Transaction 2"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import sys
+import os
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.mempool import Mempool
+
+class TestMempool(unittest.TestCase):
+
+    def test_batches_by_count(self):
+        mempool = Mempool(max_count=3)
+        batches = list(mempool.batches(f"tx{i}" for i in range(7)))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual(sum(batches, []), [f"tx{i}" for i in range(7)])
+
+    def test_batches_by_bytes(self):
+        # Each transaction is 6 bytes of JSON ("tx10")
+        mempool = Mempool(max_count=None, max_bytes=13)
+        batches = list(mempool.batches(f"tx{i}" for i in range(10, 15)))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+    def test_batches_by_time_window(self):
+        def slow_source():
+            yield "tx1"
+            yield "tx2"
+            time.sleep(0.3)
+            yield "tx3"
+        
+        mempool = Mempool(max_count=None, max_wait=0.1)
+        self.assertEqual(list(mempool.batches(slow_source())), [["tx1", "tx2"], ["tx3"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,11 @@ import os
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.merkle_tree import MerkleTree
+import hashlib
+import json
+
+from src import merkle_tree as merkle_module
+from src.merkle_tree import MerkleTree, verify_proof
 
 class TestMerkleTree(unittest.TestCase):
 
@@ -38,6 +42,67 @@ class TestMerkleTree(unittest.TestCase):
         # With 3 transactions, the last one gets duplicated
         self.assertEqual(len(merkle_tree.tree[0]), 4)
 
+    def test_append_matches_rebuild(self):
+        merkle_tree = MerkleTree([])
+        for n in range(1, 40):
+            merkle_tree.append(f"tx{n}")
+            rebuilt = MerkleTree([f"tx{i}" for i in range(1, n + 1)])
+            self.assertEqual(merkle_tree.tree, rebuilt.tree)
+            self.assertEqual(merkle_tree.get_root(), rebuilt.get_root())
+
+    def test_update_matches_rebuild(self):
+        for n in (1, 2, 5, 8, 13):
+            transactions = [f"tx{i}" for i in range(n)]
+            merkle_tree = MerkleTree(transactions)
+            for i in range(n):
+                merkle_tree.update(i, f"changed{i}")
+                transactions[i] = f"changed{i}"
+                self.assertEqual(merkle_tree.get_root(), MerkleTree(transactions).get_root())
+
+    def test_proofs(self):
+        for n in (1, 2, 3, 5, 8, 11):
+            transactions = [f"tx{i}" for i in range(n)]
+            merkle_tree = MerkleTree(transactions)
+            root = merkle_tree.get_root()
+            for i, tx in enumerate(transactions):
+                proof = merkle_tree.get_proof(i)
+                self.assertTrue(verify_proof(tx, proof, root))
+                self.assertFalse(verify_proof("forged", proof, root))
+
+    def test_proof_index_out_of_range(self):
+        merkle_tree = MerkleTree(["tx1", "tx2"])
+        with self.assertRaises(IndexError):
+            merkle_tree.get_proof(2)
+
+    def test_bytes_mode(self):
+        merkle_tree = MerkleTree(["tx1", "tx2", "tx3"], mode="bytes")
+        leaves = [hashlib.sha256(json.dumps(tx).encode()).digest() for tx in ["tx1", "tx2", "tx3"]]
+        left = hashlib.sha256(leaves[0] + leaves[1]).digest()
+        right = hashlib.sha256(leaves[2] + leaves[2]).digest()
+        self.assertEqual(merkle_tree.get_root(), hashlib.sha256(left + right).hexdigest())
+        
+        root = merkle_tree.get_root()
+        for i, tx in enumerate(["tx1", "tx2", "tx3"]):
+            self.assertTrue(verify_proof(tx, merkle_tree.get_proof(i), root, mode="bytes"))
+
+    def test_bytes_mode_incremental(self):
+        merkle_tree = MerkleTree([], mode="bytes")
+        for n in range(1, 12):
+            merkle_tree.append(f"tx{n}")
+        self.assertEqual(merkle_tree.get_root(), MerkleTree([f"tx{n}" for n in range(1, 12)], mode="bytes").get_root())
+
+    def test_parallel_build_matches_sequential(self):
+        original_batch_size = merkle_module.PARALLEL_BATCH_SIZE
+        merkle_module.PARALLEL_BATCH_SIZE = 4
+        try:
+            transactions = [f"tx{i}" for i in range(101)]
+            for mode in ("hex", "bytes"):
+                sequential = MerkleTree(transactions, mode=mode)
+                parallel = MerkleTree(transactions, mode=mode, workers=4)
+                self.assertEqual(parallel.tree, sequential.tree)
+        finally:
+            merkle_module.PARALLEL_BATCH_SIZE = original_batch_size
+
     def get_current_timestamp():
         from datetime import datetime, timezone
         return datetime.now(timezone.utc).isoformat() + 'Z'
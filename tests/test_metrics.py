@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.block import Block
+from src.merkle_tree import MerkleTree
+from src.proof_of_work import ProofOfWork
+from src.utils import metrics
+from src.utils.timestamp import get_current_timestamp
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.enable_metrics()
+
+    def tearDown(self):
+        metrics.disable_metrics()
+
+    def test_mining_metrics(self):
+        block = Block(index=1, timestamp=get_current_timestamp(), data="Test", previous_hash="0" * 64)
+        ProofOfWork(difficulty=2).mine(block)
+        
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["counters"]["pow_blocks_mined_total"], 1)
+        self.assertEqual(snapshot["counters"]["pow_nonces_tried_total"], block.nonce + 1)
+        self.assertEqual(snapshot["histograms"]["pow_mine_seconds"]["count"], 1)
+        self.assertGreaterEqual(snapshot["counters"]["block_hash_calculations_total"], 1)
+
+    def test_prometheus_export(self):
+        MerkleTree(["tx1", "tx2", "tx3"])
+        text = self.registry.export_prometheus()
+        self.assertIn("# TYPE merkle_build_seconds histogram", text)
+        self.assertIn('merkle_build_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("merkle_leaves_hashed_total 3", text)
+
+    def test_write_json_and_profiles(self):
+        registry = metrics.enable_metrics(metrics.MetricsRegistry(profile_operations=["merkle_build_seconds"]))
+        MerkleTree(["tx1", "tx2"])
+        folder = tempfile.mkdtemp()
+        registry.write(os.path.join(folder, "metrics.json"))
+        registry.dump_profiles(folder)
+        with open(os.path.join(folder, "metrics.json"), 'r') as file:
+            self.assertEqual(json.load(file)["histograms"]["merkle_build_seconds"]["count"], 1)
+        self.assertTrue(os.path.exists(os.path.join(folder, "merkle_build_seconds.prof")))
+
+    def test_disabled_registry_is_noop(self):
+        metrics.disable_metrics()
+        registry = metrics.get_registry()
+        registry.counter("anything").inc()
+        with registry.timer("anything"):
+            pass
+        self.assertFalse(hasattr(registry, "counters"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.network_simulator import NetworkSimulator
+
+class TestNetworkSimulator(unittest.TestCase):
+
+    def test_nodes_converge(self):
+        simulator = NetworkSimulator(3, difficulty=2, latency=0.01, jitter=0.0, seed=1)
+        metrics = asyncio.run(simulator.run(0.5))
+        
+        self.assertGreater(metrics["blocks_mined"], 0)
+        self.assertGreater(metrics["main_chain_length"], 0)
+        self.assertGreaterEqual(metrics["orphan_rate"], 0.0)
+        self.assertLessEqual(metrics["orphan_rate"], 1.0)
+        self.assertIsNotNone(metrics["propagation_mean"])
+        
+        # Every block on a node's best chain must link back to genesis
+        for node in simulator.nodes:
+            chain = node.main_chain()
+            self.assertEqual(len(chain), node.best_height + 1)
+
+    def test_rejects_invalid_block(self):
+        simulator = NetworkSimulator(2, difficulty=2, seed=1)
+        node = simulator.nodes[0]
+        block = simulator.nodes[1].blocks[node.best_tip]
+        forged = type(block)(index=1, timestamp="t", data="forged", previous_hash=block.hash)
+        forged.hash = "00" + forged.hash[2:]
+        node.receive(forged, sender=None)
+        self.assertNotIn(forged.hash, node.blocks)
+
+if __name__ == '__main__':
+    unittest.main()
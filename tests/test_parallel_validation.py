@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import io
+import json
+import glob
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+
+def tamper(folder, index, field, value):
+    block_file = glob.glob(f"{folder}/block_{index}_*.json")[0]
+    with open(block_file, 'r') as file:
+        block_data = json.load(file)
+    block_data[field] = value
+    with open(block_file, 'w') as file:
+        json.dump(block_data, file)
+
+class TestParallelValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def build(self, module, folder, count):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                module.add_single_transaction(f"Transaction {i}", folder=folder)
+
+    def compare_linear(self, folder):
+        with contextlib.redirect_stdout(io.StringIO()):
+            sequential = add_transaction.validate_blockchain(folder, full=True)
+            parallel = add_transaction.validate_blockchain_parallel(folder, workers=2, chunk_size=2)
+        self.assertEqual(parallel, sequential)
+        return parallel
+
+    def compare_tree(self, folder, full=False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            sequential = add_transaction_tree.validate_blockchain_tree(folder, full=full)
+            parallel = add_transaction_tree.validate_blockchain_tree_parallel(folder, workers=2, chunk_size=2,
+                                                                              full=full)
+        self.assertEqual(parallel, sequential)
+        return parallel
+
+    def test_linear(self):
+        folder = os.path.join(self.root, "dlt")
+        self.build(add_transaction, folder, 6)
+        self.assertEqual(self.compare_linear(folder), (True, None))
+        
+        # Several corrupted blocks: both must report the first one
+        tamper(folder, 5, "data", "Tampered")
+        tamper(folder, 3, "previous_hash", "0" * 64)
+        self.assertEqual(self.compare_linear(folder), (False, 3))
+
+    def test_linear_reports_the_lowest_failure(self):
+        folder = os.path.join(self.root, "dlt")
+        self.build(add_transaction, folder, 6)
+        # A bad block before a missing file is the one reported
+        tamper(folder, 2, "data", "Tampered")
+        os.remove(glob.glob(f"{folder}/block_5_*.json")[0])
+        self.assertEqual(self.compare_linear(folder), (False, 2))
+        
+        tamper(folder, 2, "data", "Transaction 1")
+        self.assertEqual(self.compare_linear(folder), (False, 5))
+
+    def test_tree(self):
+        folder = os.path.join(self.root, "dlt_tree")
+        self.build(add_transaction_tree, folder, 6)
+        self.assertEqual(self.compare_tree(folder), (True, None))
+        
+        tamper(folder, 4, "data", "Tampered")
+        self.assertFalse(self.compare_tree(folder)[0])
+
+    def test_tree_missing_file(self):
+        folder = os.path.join(self.root, "dlt_tree")
+        self.build(add_transaction_tree, folder, 6)
+        os.remove(glob.glob(f"{folder}/block_4_*.json")[0])
+        self.assertEqual(self.compare_tree(folder), (False, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import threading
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.block import Block
+from src.proof_of_work import ProofOfWork, RetargetPolicy, mine_blocks, next_proof_of_work, read_difficulty
+from src.utils.timestamp import get_current_timestamp
+
+class TestProofOfWork(unittest.TestCase):
+
+    def setUp(self):
+        self.block = Block(index=1, timestamp=get_current_timestamp(), data="Test transaction data",
+                           previous_hash="0" * 64, nonce=0)
+
+    def test_mine_parallel(self):
+        pow = ProofOfWork(difficulty=3)
+        mined = pow.mine_parallel(self.block, workers=2)
+        self.assertIs(mined, self.block)
+        self.assertTrue(pow.is_valid(mined))
+        # The stored hash must match the winning nonce
+        self.assertEqual(mined.hash, mined.calculate_hash())
+
+    def test_mine_parallel_timeout(self):
+        # Difficulty 64 can never be reached, so the search has to time out
+        pow = ProofOfWork(difficulty=64)
+        self.assertIsNone(pow.mine_parallel(self.block, workers=2, timeout=0.2))
+
+    def test_mine_parallel_cancelled(self):
+        pow = ProofOfWork(difficulty=64)
+        cancel_event = threading.Event()
+        cancel_event.set()
+        self.assertIsNone(pow.mine_parallel(self.block, workers=2, cancel_event=cancel_event))
+
+    def test_mine_blocks(self):
+        pow = ProofOfWork(bits=8)
+        blocks = [Block(index=i, timestamp=get_current_timestamp(), data=f"Sibling {i}",
+                        previous_hash="ab" * 32, nonce=0) for i in range(1, 5)]
+        self.assertEqual(mine_blocks(pow, blocks, workers=2), blocks)
+        for block in blocks:
+            self.assertTrue(pow.is_valid(block))
+            self.assertEqual(block.hash, block.calculate_hash())
+
+    def test_bits_match_hex_difficulty(self):
+        self.assertEqual(ProofOfWork(difficulty=3).target_value, ProofOfWork(bits=12).target_value)
+        # The original attributes keep their types for whole hex digits
+        self.assertEqual((ProofOfWork().difficulty, ProofOfWork().target), (3, "000"))
+        self.assertIsInstance(ProofOfWork(bits=16).difficulty, int)
+        self.assertEqual(ProofOfWork(bits=14).difficulty, 3.5)
+        # A fractional difficulty can be passed back in, rounded to whole bits
+        self.assertEqual(ProofOfWork(difficulty=3.5).target_value, ProofOfWork(bits=14).target_value)
+        self.assertEqual((ProofOfWork(difficulty=3.5).difficulty, ProofOfWork(difficulty=3.3).bits), (3.5, 13))
+        self.assertEqual(ProofOfWork(difficulty=4.0).difficulty, 4)
+        pow = ProofOfWork(bits=13)
+        self.assertTrue(pow.is_valid_hash("0007" + "f" * 60))
+        self.assertFalse(pow.is_valid_hash("0008" + "0" * 60))
+        
+        mined = pow.mine(self.block)
+        self.assertLess(int(mined.hash, 16), 1 << (256 - 13))
+
+    def test_retarget(self):
+        policy = RetargetPolicy(target_block_time=10, interval=5)
+        pow = ProofOfWork(bits=16)
+        # Blocks came twice as fast as wanted, so the target halves (twice the work)
+        faster = policy.retarget(pow, "2024-01-01T00:00:00Z", "2024-01-01T00:00:20Z")
+        self.assertEqual(faster.target_value, pow.target_value // 2)
+        self.assertEqual(faster.bits, 17)
+        # Adjustments are limited to max_factor
+        slower = policy.retarget(pow, "2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z")
+        self.assertEqual(slower.target_value, pow.target_value * 4)
+        self.assertTrue(policy.is_retarget_height(10))
+        self.assertFalse(policy.is_retarget_height(7))
+
+    def test_next_proof_of_work(self):
+        folder = tempfile.mkdtemp()
+        timestamps = {i: f"2024-01-01T00:00:{i * 5:02d}Z" for i in range(10)}
+        policy = RetargetPolicy(target_block_time=10, interval=4)
+        
+        self.assertEqual(next_proof_of_work(folder, 0, timestamps.get, bits=8).bits, 8)
+        self.assertEqual(next_proof_of_work(folder, 3, timestamps.get, policy=policy).bits, 8)
+        # Blocks 0-3 took 15 seconds instead of 30
+        retargeted = next_proof_of_work(folder, 4, timestamps.get, policy=policy)
+        self.assertEqual(retargeted.bits, 9)
+        stored, since = read_difficulty(folder)
+        self.assertEqual((stored.target_value, since), (retargeted.target_value, 4))
+        # Mining block 4 again must not apply the retarget twice
+        self.assertEqual(next_proof_of_work(folder, 4, timestamps.get, policy=policy).target_value,
+                         retargeted.target_value)
+
+if __name__ == '__main__':
+    unittest.main()
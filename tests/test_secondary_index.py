@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import io
+import time
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+import block_explorer
+from src.block import Block
+from src.fork_choice import FORK_CHOICE_TABLE
+from src.index_store import IndexStore
+from src.merkle_tree import verify_proof
+from src.secondary_index import LOOKUP_TABLE, SecondaryIndex, open_secondary_index
+from src.tree_index import INDEX_TABLE
+
+class TestSecondaryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def save_linear(self, folder, timestamps):
+        # Blocks with controlled timestamps, saved through the script (not mined)
+        blocks = []
+        previous_hash = "0" * 64
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, timestamp in enumerate(timestamps):
+                block = Block(index=i, timestamp=timestamp, data=[f"tx{i}", "shared"], previous_hash=previous_hash)
+                add_transaction.save_block_to_file(block, folder)
+                blocks.append(block)
+                previous_hash = block.hash
+        return blocks
+
+    def test_lookups(self):
+        folder = os.path.join(self.root, "dlt")
+        timestamps = ["2024-01-01T00:00:00Z", "2024-01-01T00:01:00Z", "2024-01-01T00:00:30Z", "2024-01-01T00:02:00Z"]
+        blocks = self.save_linear(folder, timestamps)
+        
+        with open_secondary_index(folder) as lookup:
+            self.assertEqual(lookup.block_by_hash(blocks[2].hash)["index"], 2)
+            self.assertIsNone(lookup.block_by_hash(blocks[2].hash[:8] + "0" * 56))
+            self.assertEqual(lookup.block_by_index(3)["hash"], blocks[3].hash)
+            # Out-of-order timestamps are kept sorted
+            self.assertEqual(lookup.indices_in_range("2024-01-01T00:00:10Z", "2024-01-01T00:02:00Z"), [2, 1])
+            self.assertEqual(lookup.indices_in_range(), [0, 2, 1, 3])
+            self.assertEqual(lookup.find_transaction("tx1"), [(1, 0)])
+            self.assertEqual(lookup.find_transaction("shared"), [(i, 1) for i in range(4)])
+            self.assertEqual(lookup.find_transaction("missing"), [])
+            with self.assertRaises(ValueError):
+                lookup.indices_in_range("yesterday")
+        
+        index, position = 1, 0
+        proof = blocks[index].merkle_tree.get_proof(position)
+        self.assertTrue(verify_proof("tx1", proof, blocks[index].merkle_root))
+
+    def test_rebuild_matches_incremental(self):
+        folder = os.path.join(self.root, "dlt_tree")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(4):
+                add_transaction_tree.add_single_transaction(f"Transaction {i}", folder=folder)
+        with SecondaryIndex(folder) as lookup:
+            incremental = (lookup.indices_in_range(), lookup.find_transaction("Transaction 2"))
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(block_explorer.rebuild_indexes(folder, "tree"), 5)
+        with SecondaryIndex(folder) as lookup:
+            self.assertEqual((lookup.indices_in_range(), lookup.find_transaction("Transaction 2")), incremental)
+            self.assertEqual(incremental[1], [(3, 0)])
+
+    def fastest_append(self, module, folder, count=5):
+        times = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                start = time.perf_counter()
+                module.add_single_transaction(f"Timed {i}", folder=folder, difficulty_bits=1)
+                times.append(time.perf_counter() - start)
+        return min(times)
+
+    def test_append_cost_does_not_grow(self):
+        for module, name in ((add_transaction, "dlt"), (add_transaction_tree, "dlt_tree")):
+            folder = os.path.join(self.root, name)
+            before = self.fastest_append(module, folder)
+            # As many index entries as a chain of tens of thousands of blocks holds
+            with IndexStore(folder) as store, store.batch():
+                for table in (LOOKUP_TABLE, INDEX_TABLE, FORK_CHOICE_TABLE):
+                    entries = store.table(table)
+                    for i in range(50000):
+                        entries[f"x:{i:064x}"] = f"[[{i}, 0]]"
+            self.assertLess(self.fastest_append(module, folder), 3 * before + 0.005)
+
+if __name__ == '__main__':
+    unittest.main()
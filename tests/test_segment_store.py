@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.blockchain import Blockchain
+from src.segment_store import SegmentStore
+
+def block_to_dict(block):
+    return {
+        "index": block.index,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "data": block.data,
+        "nonce": block.nonce,
+        "merkle_root": block.merkle_root
+    }
+
+class TestSegmentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.blockchain = Blockchain()
+        for i in range(9):
+            self.blockchain.append_block(f"Transaction {i}")
+        self.blocks = [block_to_dict(block) for block in self.blockchain.chain]
+
+    def test_append_and_read(self):
+        # A small segment size forces several segment files
+        with SegmentStore(self.folder, segment_size=600) as store:
+            for block_data in self.blocks:
+                store.append(block_data)
+            self.assertEqual(len(store), len(self.blocks))
+            self.assertEqual(store.read(4), self.blocks[4])
+            self.assertEqual(store.read_by_hash(self.blocks[7]["hash"]), self.blocks[7])
+            self.assertIsNone(store.read_by_hash("f" * 64))
+        segments = [name for name in os.listdir(self.folder) if name.startswith("segment_")]
+        self.assertGreater(len(segments), 1)
+
+    def test_reopen_and_mmap(self):
+        with SegmentStore(self.folder, segment_size=600) as store:
+            for block_data in self.blocks[:5]:
+                store.append(block_data)
+        with SegmentStore(self.folder, segment_size=600, use_mmap=True) as store:
+            self.assertEqual(len(store), 5)
+            for block_data in self.blocks[5:]:
+                store.append(block_data)
+            self.assertEqual(list(store), self.blocks)
+            self.assertEqual(store.last_block, self.blocks[-1])
+
+    def test_rejects_out_of_order_block(self):
+        with SegmentStore(self.folder) as store:
+            with self.assertRaises(ValueError):
+                store.append(self.blocks[1])
+
+if __name__ == '__main__':
+    unittest.main()
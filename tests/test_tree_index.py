@@ -0,0 +1,219 @@
+import unittest
+import sys
+import os
+import io
+import json
+import glob
+import tempfile
+import contextlib
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction_tree
+from src.block import Block
+from src.journal import Journal
+from src.proof_of_work import ProofOfWork, RetargetPolicy, read_difficulty
+from src.index_store import IndexStore
+from src.tree_index import INDEX_TABLE, TreeIndex, open_tree_index
+from src.utils.timestamp import get_current_timestamp
+
+class TestTreeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = os.path.join(tempfile.mkdtemp(), "dlt_tree")
+
+    def add(self, data):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return add_transaction_tree.add_single_transaction(data, folder=self.folder)
+
+    def load_blocks(self):
+        blocks = {}
+        for file in glob.glob(f"{self.folder}/block_*.json"):
+            with open(file, 'r') as f:
+                block_data = json.load(f)
+            blocks[block_data["index"]] = block_data
+        return blocks
+
+    def test_breadth_first_insert(self):
+        for i in range(6):
+            self.add(f"Transaction {i}")
+        blocks = self.load_blocks()
+        
+        # Block k is a child of block (k - 1) // 2, as with the original full scan
+        for index in range(1, 7):
+            self.assertEqual(blocks[index]["parent_hash"], blocks[(index - 1) // 2]["hash"])
+        
+        with open_tree_index(self.folder) as index:
+            self.assertEqual(index.height, 6)
+            self.assertEqual(index.children(blocks[0]["hash"]), (blocks[1]["hash"], blocks[2]["hash"]))
+            self.assertEqual(index.next_parent(), blocks[3]["hash"])
+            self.assertTrue(index.locate(blocks[5]["hash"]).endswith(f"block_5_{blocks[5]['hash'][:8]}.json"))
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder), (True, None))
+
+    def test_parent_file_not_rewritten(self):
+        self.add("Transaction 0")
+        genesis_file = glob.glob(f"{self.folder}/block_0_*.json")[0]
+        mtime = os.stat(genesis_file).st_mtime_ns
+        self.add("Transaction 1")
+        self.assertEqual(os.stat(genesis_file).st_mtime_ns, mtime)
+
+    def test_rebuild_from_legacy_folder(self):
+        for i in range(4):
+            self.add(f"Transaction {i}")
+        blocks = self.load_blocks()
+        
+        # Write the child links into the files and drop the index, as in an old folder
+        with open_tree_index(self.folder) as index:
+            for block_data in blocks.values():
+                block_data["left_child"], block_data["right_child"] = index.children(block_data["hash"])
+        for file in os.listdir(self.folder):
+            if not file.startswith("block_"):
+                os.remove(os.path.join(self.folder, file))
+        for block_data in blocks.values():
+            with open(glob.glob(f"{self.folder}/block_{block_data['index']}_*.json")[0], 'w') as file:
+                json.dump(block_data, file, indent=4)
+        
+        with TreeIndex(self.folder) as index:
+            self.assertTrue(index.is_empty())
+        block = self.add("Transaction 4")
+        self.assertEqual(block.index, 5)
+        self.assertEqual(block.previous_hash, blocks[2]["hash"])
+
+    def write_legacy_links(self, links):
+        # Child links stored in the block files, as before the tree index, and no index
+        for index, (left, right) in links.items():
+            block_file = glob.glob(f"{self.folder}/block_{index}_*.json")[0]
+            with open(block_file, 'r') as file:
+                block_data = json.load(file)
+            block_data["left_child"], block_data["right_child"] = left, right
+            with open(block_file, 'w') as file:
+                json.dump(block_data, file, indent=4)
+        with IndexStore(self.folder) as store:
+            store.table(INDEX_TABLE).clear()
+
+    def test_rebuild_checks_legacy_links(self):
+        for i in range(4):
+            self.add(f"Transaction {i}")
+        hashes = {index: block_data["hash"] for index, block_data in self.load_blocks().items()}
+        
+        # Block 2 was added after the index existed, so block 0's file only lists block 1
+        self.write_legacy_links({0: (hashes[1], None), 1: (hashes[3], hashes[4])})
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder), (True, None))
+        with open_tree_index(self.folder) as index:
+            self.assertEqual(index.children(hashes[0]), (hashes[1], hashes[2]))
+        
+        # A stored link that disagrees with the child's parent_hash is kept for validation to report
+        self.write_legacy_links({2: (hashes[3], None)})
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder), (False, 2))
+        self.assertIn("Warning: Block 2 lists child", output.getvalue())
+
+    def test_rebuild_restores_child_links(self):
+        for i in range(5):
+            self.add(f"Transaction {i}")
+        with open_tree_index(self.folder) as index:
+            next_parent = index.next_parent()
+            links = [index.children(index.frontier_hash(position)) for position in range(6)]
+
+        # Child links only live in the index, which is rebuilt from the parent hashes
+        with IndexStore(self.folder) as store:
+            store.table(INDEX_TABLE).clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder), (True, None))
+        with open_tree_index(self.folder) as index:
+            self.assertEqual(index.next_parent(), next_parent)
+            self.assertEqual([index.children(index.frontier_hash(position)) for position in range(6)], links)
+        block = self.add("Transaction 5")
+        self.assertEqual(block.previous_hash, next_parent)
+
+    def test_full_validation_finds_unindexed_files(self):
+        for i in range(3):
+            self.add(f"Transaction {i}")
+        # A block file dropped into the folder that the tree index doesn't know about
+        block_file = glob.glob(f"{self.folder}/block_2_*.json")[0]
+        with open(block_file, 'r') as file:
+            content = file.read()
+        with open(f"{self.folder}/block_5_00000000.json", 'w') as file:
+            file.write(content)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder), (True, None))
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder, full=True), (False, 5))
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree_parallel(self.folder, workers=1, full=True),
+                             (False, 5))
+            self.assertIsNone(add_transaction_tree.add_single_transaction("Transaction 3", folder=self.folder,
+                                                                          full_validation=True))
+
+class TestTransactionBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = os.path.join(tempfile.mkdtemp(), "dlt_tree")
+
+    def run_quietly(self, function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def test_free_slots(self):
+        for i in range(3):
+            self.run_quietly(add_transaction_tree.add_single_transaction, f"Transaction {i}", folder=self.folder,
+                             difficulty_bits=4)
+        with open_tree_index(self.folder) as index:
+            hashes = [index.frontier_hash(position) for position in range(4)]
+            # Block 1 has one free slot left, blocks 2 and 3 two each
+            self.assertEqual(index.free_slots(4), [hashes[1], hashes[2], hashes[2], hashes[3]])
+            self.assertEqual(index.free_slots(10), [hashes[1]] + [hashes[2]] * 2 + [hashes[3]] * 2)
+
+    def test_batch_builds_the_same_tree(self):
+        blocks = self.run_quietly(add_transaction_tree.add_transaction_batch,
+                                  [f"Transaction {i}" for i in range(10)], workers=2, folder=self.folder,
+                                  difficulty_bits=4)
+        self.assertEqual([block.index for block in blocks], list(range(1, 11)))
+        self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree, self.folder), (True, None))
+        with open_tree_index(self.folder) as index:
+            hashes = [index.frontier_hash(position) for position in range(11)]
+            for block in blocks:
+                # Block k is a child of block (k - 1) // 2, as when adding blocks one by one
+                self.assertEqual(block.previous_hash, hashes[(block.index - 1) // 2])
+                self.assertEqual(block.hash, hashes[block.index])
+        block = self.run_quietly(add_transaction_tree.add_single_transaction, "Transaction 10", folder=self.folder)
+        self.assertEqual(block.previous_hash, hashes[5])
+
+    def test_rounds_stop_at_retarget_heights(self):
+        policy = RetargetPolicy(target_block_time=60, interval=4)
+        blocks = self.run_quietly(add_transaction_tree.add_transaction_batch,
+                                  [f"Transaction {i}" for i in range(8)], workers=1, folder=self.folder,
+                                  difficulty_bits=4, retarget_policy=policy)
+        self.assertEqual(len(blocks), 8)
+        self.assertEqual(read_difficulty(self.folder)[1], 8)
+
+    def test_interrupted_round_is_completed(self):
+        self.run_quietly(add_transaction_tree.add_transaction_batch, ["Transaction 0", "Transaction 1"],
+                         folder=self.folder, difficulty_bits=4)
+        # A crash after the round was journaled but before its files and links were written
+        parent_hash = self.frontier_hash(1)
+        blocks = [Block(index=3 + i, timestamp=get_current_timestamp(), data=f"Transaction {2 + i}",
+                        previous_hash=parent_hash, nonce=0) for i in range(2)]
+        for block in blocks:
+            ProofOfWork(bits=4).mine(block)
+        with Journal(self.folder) as journal:
+            for block in blocks:
+                journal.append(add_transaction_tree.tree_block_data(block, block.previous_hash))
+            journal.commit()
+
+        block = self.run_quietly(add_transaction_tree.add_single_transaction, "Transaction 4", folder=self.folder)
+        self.assertEqual(block.index, 5)
+        self.assertEqual(self.run_quietly(add_transaction_tree.validate_blockchain_tree, self.folder), (True, None))
+        with open_tree_index(self.folder) as index:
+            self.assertEqual(index.children(parent_hash), (blocks[0].hash, blocks[1].hash))
+
+    def frontier_hash(self, position):
+        with open_tree_index(self.folder) as index:
+            return index.frontier_hash(position)
+
+if __name__ == '__main__':
+    unittest.main()
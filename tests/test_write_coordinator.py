@@ -0,0 +1,193 @@
+import unittest
+import sys
+import os
+import io
+import glob
+import json
+import tempfile
+import time
+import threading
+import contextlib
+import subprocess
+import multiprocessing
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'operaciones_simulacion')))
+
+import add_transaction
+import add_transaction_tree
+import write_coordinator
+from src.file_lock import FileLock
+from src.journal import Journal, JOURNAL_FILE
+
+def add_transactions(module, folder, count):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            module.add_single_transaction(f"Transaction {os.getpid()}-{i}", folder=folder)
+
+def hold_lock(path, locked, release):
+    with FileLock(path):
+        locked.set()
+        release.wait(5)
+
+class TestFileLock(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "write.lock")
+
+    def test_reentrant(self):
+        with FileLock(self.path):
+            with FileLock(self.path, timeout=0.1):
+                pass
+            # Still held by this process after the inner release
+            child = multiprocessing.Process(target=FileLock(self.path, timeout=0.1).acquire)
+            child.start()
+            child.join()
+            self.assertNotEqual(child.exitcode, 0)
+
+    def test_timeout_while_another_process_holds_it(self):
+        locked, release = multiprocessing.Event(), multiprocessing.Event()
+        holder = multiprocessing.Process(target=hold_lock, args=(self.path, locked, release))
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(5))
+            with self.assertRaises(TimeoutError):
+                FileLock(self.path, timeout=0.05).acquire()
+        finally:
+            release.set()
+            holder.join()
+        with FileLock(self.path, timeout=1):
+            pass
+
+class TestConcurrentWriters(unittest.TestCase):
+
+    def run_writers(self, module, folder, processes=3, count=3):
+        writers = [multiprocessing.Process(target=add_transactions, args=(module, folder, count))
+                   for _ in range(processes)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        return [json.load(open(file)) for file in glob.glob(os.path.join(folder, "block_*.json"))]
+
+    def test_linear_indices_are_unique(self):
+        folder = os.path.join(tempfile.mkdtemp(), "dlt")
+        blocks = self.run_writers(add_transaction, folder)
+        self.assertEqual(sorted(block["index"] for block in blocks), list(range(10)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction.validate_blockchain(folder, full=True), (True, None))
+
+    def test_tree_links_are_consistent(self):
+        folder = os.path.join(tempfile.mkdtemp(), "dlt_tree")
+        blocks = self.run_writers(add_transaction_tree, folder)
+        self.assertEqual(sorted(block["index"] for block in blocks), list(range(10)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(folder), (True, None))
+
+class TestGroupCommit(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = os.path.join(tempfile.mkdtemp(), "dlt")
+
+    def test_group_is_committed_with_one_fsync(self):
+        coordinator = write_coordinator.WriteCoordinator("linear", self.folder, group_size=4)
+        self.assertFalse(coordinator.submit("Transaction 0"))
+        for i in range(1, 4):
+            full = coordinator.submit(f"Transaction {i}")
+        self.assertTrue(full)
+        fsyncs = []
+        real_fsync = os.fsync
+        os.fsync = lambda fd: fsyncs.append(fd) or real_fsync(fd)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                blocks = coordinator.commit()
+        finally:
+            os.fsync = real_fsync
+        self.assertEqual([block.index for block in blocks], [1, 2, 3, 4])
+        self.assertEqual(len(fsyncs), 1)
+        with Journal(self.folder) as journal:
+            self.assertEqual(len(journal.records()), 5)
+
+    def test_lost_and_torn_files_are_recovered(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(3):
+                add_transaction.add_single_transaction(f"Transaction {i}", folder=self.folder)
+        lost = glob.glob(os.path.join(self.folder, "block_2_*.json"))[0]
+        torn = glob.glob(os.path.join(self.folder, "block_3_*.json"))[0]
+        os.remove(lost)
+        with open(torn, 'r+') as file:
+            file.truncate(20)
+        # A crash in the middle of a journal record
+        with open(os.path.join(self.folder, JOURNAL_FILE), 'ab') as file:
+            file.write(b'{"index": 4, "ha')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            block = add_transaction.add_single_transaction("Transaction 3", folder=self.folder)
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (True, None))
+        self.assertEqual(block.index, 4)
+        self.assertTrue(os.path.exists(lost))
+
+    def test_writer_killed_before_recording_the_tip(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(2):
+                add_transaction.add_single_transaction(f"Transaction {i}", folder=self.folder)
+        # The writer dies right after saving block 3, before the tip is updated
+        script = "\n".join([
+            "import os, sys",
+            f"sys.path.insert(0, {os.path.dirname(add_transaction.__file__)!r})",
+            "import add_transaction",
+            "add_transaction.write_chain_tip = lambda *args, **kwargs: os._exit(1)",
+            f"add_transaction.add_single_transaction('Transaction 2', folder={self.folder!r})",
+        ])
+        result = subprocess.run([sys.executable, "-c", script], stdout=subprocess.DEVNULL)
+        self.assertEqual(result.returncode, 1)
+        saved = glob.glob(os.path.join(self.folder, "block_3_*.json"))
+        self.assertEqual(len(saved), 1)
+        with Journal(self.folder) as journal:
+            self.assertEqual(journal.records()[-1]["index"], 3)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            block = add_transaction.add_single_transaction("Transaction 3", folder=self.folder)
+            self.assertEqual(add_transaction.validate_blockchain(self.folder, full=True), (True, None))
+        self.assertEqual(block.index, 4)
+        self.assertEqual(glob.glob(os.path.join(self.folder, "block_3_*.json")), saved)
+        with open(saved[0], 'r') as file:
+            self.assertEqual(block.previous_hash, json.load(file)["hash"])
+
+    def test_recovery_without_blocks_past_the_tip_opens_nothing(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(3):
+                add_transaction.add_single_transaction(f"Transaction {i}", folder=self.folder)
+        opened = []
+        real_open = add_transaction.open_block_index
+        add_transaction.open_block_index = lambda folder: opened.append(folder) or real_open(folder)
+        try:
+            with Journal(self.folder) as journal:
+                self.assertEqual(add_transaction.recover_journal(journal, self.folder), 0)
+        finally:
+            add_transaction.open_block_index = real_open
+        self.assertEqual(opened, [])
+
+    def test_append_daemon(self):
+        coordinator = write_coordinator.WriteCoordinator("tree", self.folder, group_size=8)
+        daemon = write_coordinator.AppendDaemon(coordinator, os.path.join(tempfile.mkdtemp(), "daemon.sock"),
+                                                authkey="test", max_wait=0.2)
+        server = threading.Thread(target=daemon.serve_forever, daemon=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            server.start()
+            while daemon.listener is None:
+                time.sleep(0.01)
+            results = []
+            clients = [threading.Thread(target=lambda i=i: results.append(write_coordinator.submit_transaction(
+                f"Transaction {i}", daemon.address, authkey="test"))) for i in range(4)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            daemon.shutdown()
+            self.assertEqual(add_transaction_tree.validate_blockchain_tree(self.folder), (True, None))
+        self.assertEqual(sorted(result["index"] for result in results), [1, 2, 3, 4])
+
+if __name__ == '__main__':
+    unittest.main()